@@ -6,9 +6,8 @@ from itertools import count
 import pytest
 from pytest import fixture
 
-from tests.stubs import DAPServerConnection
 from vidb.client import DAPClient
-from vidb.connection import DAPConnection
+from vidb.connection import DAPConnection, DAPServerConnection
 
 
 async def create_pipe_connection():
@@ -1,12 +1,19 @@
+import asyncio
 from contextlib import asynccontextmanager
 from copy import deepcopy
 
 from prompt_toolkit import HTML
 from prompt_toolkit.formatted_text import to_formatted_text
+from prompt_toolkit.input.defaults import create_pipe_input
+from prompt_toolkit.output import DummyOutput
 from pytest import fixture
 
-from vidb.connection import BaseDAPConnection
+from vidb.__main__ import initial_load
+from vidb.client import DAPClient, disconnect
 from vidb.dap import Response, Event, Request
+from vidb.fake_adapter import FakeAdapter, serve_in_process
+from vidb.session import Session
+from vidb.ui import UI
 
 
 class DAPServerMixin:
@@ -44,12 +51,116 @@ class DAPServerMixin:
         assert to_formatted_text(formatted) == to_formatted_text(HTML(expected))
 
 
-class DAPServerConnection(BaseDAPConnection):
-    def send_message(self, msg: Response | Event):
-        assert msg["type"] in ["response", "event"]
-        self.write_message(self.writer, msg)
+def response(command, body=None):
+    return {
+        "seq": None,
+        "type": "response",
+        "request_seq": None,
+        "success": True,
+        "command": command,
+        "body": body,
+    }
+
+
+STOPPED_EVENT = {
+    "seq": None,
+    "type": "event",
+    "event": "stopped",
+    "body": {
+        "reason": "pause",
+        "threadId": 1,
+        "allThreadsStopped": True,
+    },
+}
+
+
+def make_frame(frame_id, name, line, path="/app/worker.py"):
+    return {
+        "id": frame_id,
+        "name": name,
+        "line": line,
+        "column": 1,
+        "source": {"path": path, "sourceReference": 0},
+    }
+
+
+def make_session(stacks):
+    session = Session()
+    session.set_threads([{"id": thread_id, "name": f"Worker {thread_id}"} for thread_id in stacks])
+    frame_ids = iter(range(1000))
+    for thread_id, stack in stacks.items():
+        session.set_stack_trace(
+            thread_id,
+            [make_frame(next(frame_ids), name, line) for name, line in stack],
+        )
+    return session
+
+
+IDLE = [("wait", 320), ("get", 171), ("worker", 12)]
+BUSY = [("handle", 40), ("worker", 15)]
+
+
+def set_breakpoints_response(*lines, first_id=1, verified=True):
+    return response(
+        "setBreakpoints",
+        {
+            "breakpoints": [
+                {"id": first_id + i, "verified": verified, "line": line} for i, line in enumerate(lines)
+            ],
+        },
+    )
+
+
+async def wait_until(predicate, timeout=5.0):
+    async def _poll():
+        while not predicate():
+            await asyncio.sleep(0.01)
+
+    await asyncio.wait_for(_poll(), timeout)
+
+
+def settled(stepper):
+    return stepper._settle_handle is None and (stepper._refresh_task is None or stepper._refresh_task.done())
+
+
+def variables_loaded(app):
+    frame_id = app.stacktrace_widget.current_value
+    scope_refs = app.session.frame_scopes.get(frame_id)
+    return (
+        app.variables_widget.frame_id == frame_id
+        and scope_refs is not None
+        and all(ref in app.session.children for ref in scope_refs)
+    )
+
+
+class RecordingAdapter(FakeAdapter):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = []
+
+    def respond(self, request):
+        self.requests.append((request["command"], request.get("arguments") or {}))
+        return super().respond(request)
+
+    def commands(self, *names):
+        return [(command, arguments) for command, arguments in self.requests if command in names]
+
+
+async def start(adapter):
+    connection, task = await serve_in_process(adapter)
+    client = DAPClient(connection=connection)
+    app = UI(input=create_pipe_input(), output=DummyOutput())
+    app.stepper.settle_delay = 0
+    await initial_load(client, app)
+    # the stops of the initial pause settle into a full refresh
+    await wait_until(lambda: len(app.session.frames_of(app.threads_widget.current_value)) == adapter.depth)
+    await wait_until(lambda: settled(app.stepper))
+    await wait_until(lambda: variables_loaded(app))
+    adapter.requests.clear()
+    return client, task, app
+
 
-    async def recv_message(self) -> Request:
-        message = await super().recv_message()
-        assert message["type"] == "request"
-        return message
+async def stop(client, task):
+    await disconnect(client)
+    await task
+    client.connection.close()
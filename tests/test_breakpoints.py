@@ -0,0 +1,104 @@
+import asyncio
+
+from tests.stubs import DAPServerMixin, set_breakpoints_response
+from vidb.breakpoints import BreakpointStore
+from vidb.pathmap import PathMapper
+
+
+class TestBreakpointStore(DAPServerMixin):
+    async def test_sync_sends_changed_files_concurrently(self, client):
+        client.path_mapper = PathMapper([{"localRoot": "/home/me/project", "remoteRoot": "/opt/app"}])
+        store = BreakpointStore()
+        store.add("/home/me/project/a.py", 10)
+        store.add("/home/me/project/a.py", 3)
+        store.add("/home/me/project/b.py", 7)
+
+        async def server():
+            # both requests are in flight before either is answered
+            async with self.assert_request_response(
+                "setBreakpoints",
+                response=set_breakpoints_response(3, 10),
+            ) as request_a:
+                async with self.assert_request_response(
+                    "setBreakpoints",
+                    response=set_breakpoints_response(7, first_id=3, verified=False),
+                ) as request_b:
+                    pass
+
+            assert request_a["arguments"] == {
+                "source": {"path": "/opt/app/a.py", "name": "a.py"},
+                "breakpoints": [{"line": 3}, {"line": 10}],
+            }
+            assert request_b["arguments"]["source"]["path"] == "/opt/app/b.py"
+
+        await asyncio.gather(server(), store.sync(client))
+
+        assert store.verification("/home/me/project/a.py", 10)["verified"]
+        assert not store.verification("/home/me/project/b.py", 7)["verified"]
+        assert store.changed_files() == []
+
+    async def test_sync_only_sends_what_changed(self, client):
+        store = BreakpointStore()
+        store.add("/a.py", 1)
+        store.add("/b.py", 2)
+
+        async def server(*files):
+            for file, lines in files:
+                async with self.assert_request_response(
+                    "setBreakpoints",
+                    response=set_breakpoints_response(*lines),
+                ) as request:
+                    assert request["arguments"]["source"]["path"] == file
+                    assert [bp["line"] for bp in request["arguments"]["breakpoints"]] == lines
+
+        await asyncio.gather(server(("/a.py", [1]), ("/b.py", [2])), store.sync(client))
+
+        store.remove("/b.py", 2)
+        assert store.changed_files() == ["/b.py"]
+        await asyncio.gather(server(("/b.py", [])), store.sync(client))
+
+        # nothing changed, nothing is sent
+        await store.sync(client)
+        assert store.sent.keys() == {"/a.py"}
+
+    async def test_breakpoint_event_updates_verification(self, client):
+        store = BreakpointStore()
+        store.watch_events(client)
+        store.add("/a.py", 5)
+
+        async def server():
+            async with self.assert_request_response(
+                "setBreakpoints",
+                response=set_breakpoints_response(5, first_id=42, verified=False),
+            ):
+                pass
+
+        await asyncio.gather(server(), store.sync(client))
+        changed = asyncio.Event()
+        store.subscribe(lambda path: changed.set())
+
+        self.send_message({
+            "seq": None,
+            "type": "event",
+            "event": "breakpoint",
+            "body": {"reason": "changed", "breakpoint": {"id": 42, "verified": True, "line": 6}},
+        })
+        await changed.wait()
+
+        assert store.verification("/a.py", 5) == {"id": 42, "verified": True, "line": 6}
+
+
+class TestBreakpointPersistence:
+    def test_saved_and_loaded(self, tmp_path):
+        path = tmp_path / "vidb" / "breakpoints.json"
+        store = BreakpointStore(path)
+        store.toggle("/a.py", 3)
+        store.toggle("/a.py", 1)
+        store.toggle("/b.py", 2)
+        store.toggle("/b.py", 2)
+
+        loaded = BreakpointStore(path)
+
+        assert loaded.files == {"/a.py": {1: {"line": 1}, 3: {"line": 3}}}
+        # nothing has been sent to this session's adapter yet
+        assert loaded.changed_files() == ["/a.py"]
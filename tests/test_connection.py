@@ -1,5 +1,7 @@
 import asyncio
 
+import pytest
+
 from vidb.connection import DAPConnection
 
 
@@ -109,3 +111,29 @@ class TestConnection:
         connection.start_listening()
         response = await connection.request(request_message)
         assert response == response_message
+
+    async def test_lost_connection_ends_the_session(self, create_reader_pipe):
+        # the adapter exits right away
+        reader = await create_reader_pipe(b"")
+        connection = DAPConnection(reader, None)
+        pending = connection.dispatch_message({"type": "request", "seq": 1})
+        events = []
+        connection.dispatcher.events["terminated"] = {events.append}
+
+        await connection.handle_messages()
+
+        assert isinstance(pending.exception(), ConnectionError)
+        assert [event["event"] for event in events] == ["terminated"]
+
+    async def test_requests_fail_once_closed(self, pipe_connection_factory):
+        reader, writer = await pipe_connection_factory()
+        connection = DAPConnection(reader, writer)
+        connection.start_listening()
+        pending = connection.send_message({"type": "request", "seq": 1})
+
+        connection.close()
+
+        assert isinstance(pending.exception(), ConnectionError)
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(connection.request({"type": "request", "seq": 2}), 1)
+        assert not connection.dispatcher.futures
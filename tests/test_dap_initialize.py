@@ -78,8 +78,9 @@ ATTACH_RESPONSE = {
 class TestInitialize(DAPServerMixin):
     async def test_attach_initialize_sequence(self, client):
         async def server_initialize():
-            async with self.assert_request_response("initialize", response=INITIALIZE_RESPONSE):
-                pass
+            async with self.assert_request_response("initialize", response=INITIALIZE_RESPONSE) as request:
+                # variables only come with a memoryReference when asked for
+                assert request["arguments"]["supportsMemoryReferences"] is True
 
             async with self.assert_request_response("attach", response=ATTACH_RESPONSE):
                 self.send_message(INITIALIZED_EVENT)
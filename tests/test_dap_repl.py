@@ -0,0 +1,177 @@
+import asyncio
+
+from prompt_toolkit.application.current import set_app
+from prompt_toolkit.completion import CompleteEvent
+from prompt_toolkit.document import Document
+from prompt_toolkit.input.defaults import create_pipe_input
+from prompt_toolkit.output import DummyOutput
+
+from tests.stubs import DAPServerMixin
+from vidb.client import evaluate
+from vidb.ui import UI, ReplWidget, ScrollbackControl, GroupableRadioList
+
+
+EVALUATE_RESPONSE = {
+    "seq": 1,
+    "type": "response",
+    "request_seq": 1,
+    "success": True,
+    "command": "evaluate",
+    "body": {
+        "result": "3",
+        "type": "int",
+        "variablesReference": 0,
+    },
+}
+
+COMPLETIONS_RESPONSE = {
+    "seq": 1,
+    "type": "response",
+    "request_seq": 1,
+    "success": True,
+    "command": "completions",
+    "body": {
+        "targets": [
+            {"label": "append", "type": "function"},
+            {"label": "clear", "type": "function"},
+            {"label": "copy", "type": "function"},
+        ],
+    },
+}
+
+
+class TestRepl(DAPServerMixin):
+    async def test_evaluate_request(self, client):
+        async def server_evaluate():
+            async with self.assert_request_response(
+                "evaluate",
+                response=EVALUATE_RESPONSE,
+            ) as evaluate_request:
+                assert evaluate_request["arguments"] == {
+                    "expression": "foo + bar",
+                    "context": "repl",
+                    "frameId": 2,
+                }
+
+        _, result = await asyncio.gather(
+            server_evaluate(),
+            evaluate(client, expression="foo + bar", frame_id=2),
+        )
+        assert result["result"] == "3"
+
+    async def test_repl_evaluates_in_selected_frame(self, client):
+        stacktrace_widget = GroupableRadioList(values=[(2, "Frame 2")])
+        widget = ReplWidget()
+        await widget.attach(client, stacktrace_widget)
+
+        async def server_evaluate():
+            async with self.assert_request_response(
+                "evaluate",
+                response=EVALUATE_RESPONSE,
+            ) as evaluate_request:
+                assert evaluate_request["arguments"]["frameId"] == 2
+
+        await asyncio.gather(
+            server_evaluate(),
+            widget.evaluate("foo + bar"),
+        )
+        assert widget.output.lines == [">>> foo + bar", "3", ""]
+
+    async def test_completions_are_cached_per_frame_and_stem(self, client):
+        client.capabilities = {"supportsCompletionsRequest": True}
+        stacktrace_widget = GroupableRadioList(values=[(2, "Frame 2")])
+        widget = ReplWidget()
+        await widget.attach(client, stacktrace_widget)
+
+        def complete(text):
+            return [
+                c.text
+                for c in widget.completer.get_completions(Document(text), CompleteEvent())
+            ]
+
+        async def server_completions():
+            async with self.assert_request_response(
+                "completions",
+                response=COMPLETIONS_RESPONSE,
+            ) as completions_request:
+                assert completions_request["arguments"] == {
+                    "text": "foo.",
+                    "column": 5,
+                    "frameId": 2,
+                }
+
+        assert complete("foo.c") == []
+        await asyncio.gather(server_completions(), *widget.completer.pending.values())
+
+        assert complete("foo.c") == ["clear", "copy"]
+        assert complete("foo.co") == ["copy"]
+        assert complete("foo.") == ["append", "clear", "copy"]
+
+        widget.session.clear()
+        assert widget.completer.cache == {}
+
+    async def test_completions_need_the_capability(self, client):
+        widget = ReplWidget()
+        await widget.attach(client, GroupableRadioList(values=[(2, "Frame 2")]))
+
+        assert list(widget.completer.get_completions(Document("foo."), CompleteEvent())) == []
+        assert widget.completer.pending == {}
+
+    async def test_failed_completions_are_not_requested_again(self, client):
+        client.capabilities = {"supportsCompletionsRequest": True}
+        widget = ReplWidget()
+        await widget.attach(client, GroupableRadioList(values=[(2, "Frame 2")]))
+
+        async def server_completions():
+            async with self.assert_request_response(
+                "completions",
+                response=dict(COMPLETIONS_RESPONSE, success=False, message="not available", body={}),
+            ):
+                pass
+
+        list(widget.completer.get_completions(Document("foo."), CompleteEvent()))
+        await asyncio.gather(server_completions(), *widget.completer.pending.values())
+
+        assert list(widget.completer.get_completions(Document("foo.c"), CompleteEvent())) == []
+        assert widget.completer.pending == {}
+
+
+async def test_letters_are_typed_into_the_repl():
+    app = UI(input=create_pipe_input(), output=DummyOutput())
+
+    def shortcuts():
+        return [
+            key
+            for key in "qMTVWSBPRX!nsrcDEO"
+            if any(binding.filter() for binding in app.global_bindings.get_bindings_for_keys((key,)))
+        ]
+
+    with set_app(app._ptk):
+        app._ptk.layout.focus(app.source_widget)
+        assert shortcuts() == list("qMTVWSBPRX!nsrcDEO")
+        app._ptk.layout.focus(app.repl_widget.input_buffer)
+        assert shortcuts() == []
+
+
+class TestScrollbackControl:
+    def test_write_partial_lines(self):
+        control = ScrollbackControl()
+        control.write("hello")
+        control.write(" world\nfoo")
+        assert control.lines == ["hello world", "foo"]
+
+    def test_long_lines_are_wrapped(self):
+        control = ScrollbackControl(max_line_length=4)
+        control.write("abcdefghij\nxy")
+        assert control.lines == ["abcd", "efgh", "ij", "xy"]
+
+    def test_old_lines_are_dropped(self):
+        control = ScrollbackControl(max_lines=4)
+        control.write("\n".join(str(i) for i in range(10)))
+        assert len(control.lines) <= 5
+        assert control.lines[-1] == "9"
+
+    async def test_write_stream(self):
+        control = ScrollbackControl(max_line_length=100)
+        await control.write_stream("x" * 250, chunk_size=30)
+        assert control.lines == ["x" * 100, "x" * 100, "x" * 50]
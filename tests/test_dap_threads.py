@@ -1,4 +1,5 @@
 import asyncio
+from copy import deepcopy
 
 from prompt_toolkit import HTML
 from prompt_toolkit.formatted_text import to_formatted_text
@@ -51,3 +52,78 @@ class TestThreads(DAPServerMixin):
             widget_task,
             return_exceptions=True,
         )
+
+    async def test_attach_pauses_all_threads_at_once(self, client):
+        async def server():
+            async with self.assert_request_response("threads", response=THREADS_RESPONSE):
+                pass
+            async with self.assert_request_response(
+                "pause",
+                response={"seq": None, "type": "response", "request_seq": None, "success": True, "command": "pause"},
+            ) as pause_request:
+                assert pause_request["arguments"] == {"threadId": 1}
+            self.send_message({
+                "seq": None,
+                "type": "event",
+                "event": "stopped",
+                "body": {"reason": "pause", "threadId": 1, "allThreadsStopped": True},
+            })
+
+        widget = ThreadsWidget()
+        await asyncio.gather(server(), widget.attach(client))
+
+        # the other threads weren't paused one by one
+        assert next(client.sequence) == 3
+
+    async def test_thread_events_update_the_list(self, client):
+        widget = ThreadsWidget()
+        widget.session.watch_events(client)
+        widget.session.subscribe(widget._on_session_changed)
+
+        async def server():
+            async with self.assert_request_response("threads", response=THREADS_RESPONSE):
+                pass
+
+        await asyncio.gather(server(), widget.update_threads(client))
+
+        changed = asyncio.Event()
+        widget.session.subscribe(lambda kind, key: changed.set())
+        for reason, thread_id in [("started", 4), ("exited", 2)]:
+            changed.clear()
+            self.send_message({
+                "seq": None,
+                "type": "event",
+                "event": "thread",
+                "body": {"reason": reason, "threadId": thread_id},
+            })
+            await changed.wait()
+        # rendered once for both events
+        await asyncio.sleep(0)
+
+        assert [value for value, _ in widget.values] == [1, 3, 4]
+        assert widget.values[-1][1] == "4"
+
+    async def test_stop_in_unknown_thread_resyncs(self, client):
+        widget = ThreadsWidget()
+        widget.session.watch_events(client)
+
+        async def server(response):
+            async with self.assert_request_response("threads", response=response):
+                pass
+
+        await asyncio.gather(server(THREADS_RESPONSE), widget.update_threads(client))
+
+        resynced = deepcopy(THREADS_RESPONSE)
+        resynced["seq"] = None
+        resynced["request_seq"] = None
+        resynced["body"]["threads"].append({"id": 5, "name": "Worker 5"})
+        self.send_message({
+            "seq": None,
+            "type": "event",
+            "event": "stopped",
+            "body": {"reason": "breakpoint", "threadId": 5},
+        })
+        await server(resynced)
+        await widget.session._resync
+
+        assert widget.session.threads[5]["name"] == "Worker 5"
@@ -0,0 +1,103 @@
+import asyncio
+
+from vidb.disassembly import DisassemblyCache
+from vidb.session import Session
+from vidb.ui import DisassemblyControl
+
+
+class DisassemblyClient:
+    """ one 4 byte nop per instruction, at the address of the reference plus 4 per instruction """
+
+    def __init__(self, *, fail=False):
+        self.capabilities = {"supportsDisassembleRequest": True}
+        self.requests = []
+        self.fail = fail
+
+    def remote_call(self, request_cls, command, arguments):
+        assert command == "disassemble"
+        reference, offset = arguments["memoryReference"], arguments["instructionOffset"]
+        self.requests.append((reference, offset))
+
+        async def _respond():
+            if self.fail:
+                raise Exception("Unable to disassemble")
+            return {"instructions": [
+                {"address": hex(int(reference, 0) + 4 * (offset + i)), "instruction": "nop"}
+                for i in range(arguments["instructionCount"])
+            ]}
+
+        return _respond()
+
+
+async def test_cached_by_reference_and_page():
+    client = DisassemblyClient()
+    cache = DisassemblyCache(page_size=16)
+
+    await cache.request(client, "0x1000", 0)
+    await cache.request(client, "0x2000", 0)
+    assert cache.request(client, "0x1000", 0) is None
+    assert client.requests == [("0x1000", 0), ("0x2000", 0)]
+
+    assert cache.instruction("0x1000", 3)["address"] == "0x100c"
+    assert cache.instruction("0x1000", 16) is None
+
+
+async def test_pages_around_the_screen_are_prefetched():
+    client = DisassemblyClient()
+    cache = DisassemblyCache(page_size=16, prefetch=1)
+    control = DisassemblyControl(cache)
+    control.client = client
+    control.reference = "0x1000"
+    control.top_row = -5
+
+    content = control.create_content(width=80, height=10)
+    await asyncio.gather(*cache._pending.values())
+
+    # the pages of rows -5 to 4, and one more on either side
+    assert sorted(offset for _, offset in client.requests) == [-32, -16, 0, 16]
+    assert content.get_line(5)[0][1].startswith("=> 0x1000")
+    assert content.get_line(4)[0][1].startswith("   0xffc")
+
+    # the rows scrolled to are there already, the page after them is fetched ahead
+    control.scroll(20)
+    content = control.create_content(width=80, height=10)
+    assert all("nop" in content.get_line(i)[0][1] for i in range(10))
+    assert list(cache._pending) == [("0x1000", 2)]
+    await asyncio.gather(*cache._pending.values())
+
+
+async def test_failures_are_not_retried():
+    client = DisassemblyClient(fail=True)
+    cache = DisassemblyCache(page_size=16)
+
+    await cache.request(client, "0x1000", 0)
+
+    assert cache.request(client, "0x1000", 0) is None
+    assert cache.fetched("0x1000", 0) and cache.instruction("0x1000", 0) is None
+
+
+async def test_failures_are_retried_after_the_session_is_cleared():
+    session = Session()
+    client = DisassemblyClient(fail=True)
+    cache = DisassemblyCache(session, page_size=16)
+    await cache.request(client, "0x1000", 0)
+    client.fail = False
+    await cache.request(client, "0x2000", 0)
+    in_flight = cache.request(client, "0x3000", 0)
+
+    session.clear()
+
+    # the page that failed is fetched again, the one that didn't is kept
+    await asyncio.sleep(0)
+    assert in_flight.cancelled()
+    assert not cache.fetched("0x1000", 0) and cache.fetched("0x2000", 0) and not cache.fetched("0x3000", 0)
+    await cache.request(client, "0x1000", 0)
+    assert cache.instruction("0x1000", 0)["instruction"] == "nop"
+    assert cache.request(client, "0x2000", 0) is None
+    assert not cache.failed
+
+    cache.close()
+    client.fail = True
+    await cache.request(client, "0x4000", 0)
+    session.clear()
+    assert cache.fetched("0x4000", 0)
@@ -0,0 +1,96 @@
+import asyncio
+
+from tests.stubs import DAPServerMixin, IDLE, BUSY, STOPPED_EVENT, make_session, response
+from tests.test_dap_stacktrace import STACK_TRACE_RESPONSE
+from tests.test_dap_threads import THREADS_RESPONSE
+from vidb.dump import dump, format_text, groups_to_dict
+
+
+class TestDump(DAPServerMixin):
+    async def test_dump_pauses_once_and_resumes(self, client):
+        async def server():
+            async with self.assert_request_response("threads", response=THREADS_RESPONSE):
+                pass
+
+            async with self.assert_request_response("pause", response=response("pause")) as request:
+                assert request["arguments"] == {"threadId": 1}
+            self.send_message(STOPPED_EVENT)
+
+            for thread_id in [1, 2, 3]:
+                async with self.assert_request_response(
+                    "stackTrace",
+                    response=dict(STACK_TRACE_RESPONSE, seq=None, request_seq=None),
+                ) as request:
+                    assert request["arguments"] == {"threadId": thread_id}
+
+            async with self.assert_request_response(
+                "continue",
+                response=response("continue", {"allThreadsContinued": True}),
+            ) as request:
+                assert request["arguments"] == {"threadId": 1}
+
+        _, (threads, timer) = await asyncio.gather(server(), dump(client))
+
+        assert timer.ended is not None
+        assert timer.duration >= 0
+        assert [thread["name"] for thread in threads] == ["MainThread", "Worker 2", "Worker 3"]
+        assert threads[0]["frames"][1] == {
+            "name": "<module>",
+            "path": "/opt/app/app/bin/testscript.py",
+            "line": 29,
+            "column": 1,
+            "scopes": [],
+        }
+
+
+class TestFormatText:
+    def test_format_text(self):
+        threads = [
+            {
+                "id": 1,
+                "name": "MainThread",
+                "error": None,
+                "frames": [
+                    {
+                        "name": "main",
+                        "path": "/app/main.py",
+                        "line": 3,
+                        "column": 1,
+                        "scopes": [
+                            {
+                                "name": "Locals",
+                                "variables": [
+                                    {"name": "foo", "type": "int", "value": "1", "children": None},
+                                ],
+                            },
+                        ],
+                    },
+                ],
+            },
+            {"id": 2, "name": "Worker", "error": "thread exited", "frames": []},
+        ]
+        assert format_text(threads) == "\n".join([
+            "Thread 1 - MainThread",
+            '  File "/app/main.py", line 3, in main',
+            "      foo = 1",
+            "",
+            "Thread 2 - Worker",
+            "  <thread exited>",
+            "",
+        ])
+
+
+class TestGroups:
+    def test_thread_with_failed_variables_is_listed_once(self):
+        session = make_session({1: IDLE, 2: IDLE, 3: BUSY})
+        errors = {2: "variables failed", 4: "thread exited"}
+        session.set_threads(list(session.threads.values()) + [{"id": 4, "name": "Worker 4"}])
+
+        groups = groups_to_dict(session, errors)
+
+        assert [(group["count"], [thread["id"] for thread in group["threads"]], group["error"]) for group in groups] == [
+            (2, [1, 2], "thread 2: variables failed"),
+            (1, [3], None),
+            (1, [4], "thread exited"),
+        ]
+        assert sum(group["count"] for group in groups) == 4
@@ -0,0 +1,113 @@
+import asyncio
+
+from vidb.bench import Result, compare, run_benchmarks
+from vidb.client import DAPClient, disconnect
+from vidb.fake_adapter import FakeAdapter, serve_in_process
+from vidb.session import Session
+from vidb.stacks import load_all_threads
+
+
+async def connect(adapter):
+    connection, task = await serve_in_process(adapter)
+    client = DAPClient(connection=connection)
+    await client.initialize()
+    return client, task
+
+
+class TestFakeAdapter:
+    async def test_generates_configured_session(self):
+        client, task = await connect(FakeAdapter(threads=3, depth=4, variables=8, string_size=50))
+        session = Session()
+        thread_ids = [thread["id"] for thread in await session.load_threads(client)]
+        await load_all_threads(client, session, thread_ids, depth=2)
+        await disconnect(client)
+        await task
+        client.connection.close()
+
+        assert thread_ids == [1, 2, 3]
+        assert all(len(session.frames_of(thread_id)) == 4 for thread_id in thread_ids)
+        assert len(session.frames) == 12
+
+        frame = session.frames_of(2)[0]
+        scope_list = session.scopes_of(frame["id"])
+        assert [scope["name"] for scope in scope_list] == ["Locals", "Globals"]
+
+        local_variables = session.children_of(scope_list[0]["variablesReference"])
+        assert len(local_variables) == 8
+        assert local_variables[0]["value"] == repr("x" * 50)
+
+        containers = [variable for variable in local_variables if variable["variablesReference"]]
+        assert len(containers) == 2
+        items = session.children_of(containers[0]["variablesReference"])
+        assert len(items) == 8
+        assert not any(item["variablesReference"] for item in items)
+
+        # every variablesReference is distinct across the whole session
+        references = [ref for ref in session.children]
+        assert len(references) == len(set(references))
+
+    async def test_flood(self):
+        adapter = FakeAdapter()
+        client, task = await connect(adapter)
+        received = []
+        done = asyncio.Event()
+
+        def on_output(event):
+            received.append(event)
+            if len(received) == 250:
+                done.set()
+
+        client.add_event_listener("output", on_output)
+        await adapter.flood(250, size=10)
+        await asyncio.wait_for(done.wait(), 5)
+        await disconnect(client)
+        await task
+        client.connection.close()
+
+        assert received[0]["body"]["output"] == "x" * 9 + "\n"
+
+    async def test_unsupported_request_fails(self):
+        client, task = await connect(FakeAdapter())
+        try:
+            await client.remote_call(dict, "setExpression", arguments={})
+        except Exception as e:
+            assert "not supported" in str(e)
+        else:
+            assert False, "expected the request to fail"
+        await disconnect(client)
+        await task
+        client.connection.close()
+
+
+class TestBench:
+    async def test_run_benchmarks(self):
+        config = {
+            "adapter": dict(threads=2, depth=3, variables=4, string_size=10),
+            "events": 100,
+        }
+        results = await run_benchmarks(config, repeat=1)
+
+        assert set(results) == {"throughput", "dispatch", "load_all_threads", "stop_to_render", "memory"}
+        assert all(result.value > 0 for result in results.values())
+
+    def test_compare(self):
+        baseline = {
+            "results": {
+                "throughput": {"value": 1000.0},
+                "stop_to_render": {"value": 100.0},
+                "memory": {"value": 10.0},
+            },
+        }
+        results = {
+            "throughput": Result(700.0, "events/s", higher_is_better=True),
+            "stop_to_render": Result(110.0, "ms"),
+            "memory": Result(20.0, "MiB"),
+            "dispatch": Result(1.0, "us"),
+        }
+
+        regressions = compare(results, baseline, tolerance=0.2)
+
+        assert [(name, before, after) for name, before, after, _ in regressions] == [
+            ("throughput", 1000.0, 700.0),
+            ("memory", 10.0, 20.0),
+        ]
@@ -0,0 +1,143 @@
+from prompt_toolkit.formatted_text import to_formatted_text
+
+from vidb.history import StopHistory
+from vidb.session import Session
+from vidb.ui import VariablesWidget
+
+
+def stop_at(session, frame_id, local_values, *, items=("1", "2")):
+    """ a stop in the same function, with new frame and variable ids like adapters give """
+    session.clear()
+    session.set_stack_trace(1, [{"id": frame_id, "name": "loop", "source": {"path": "/a.py"}, "line": 3}])
+    locals_ref, globals_ref, items_ref = frame_id * 10, frame_id * 10 + 1, frame_id * 10 + 2
+    session.set_scopes(frame_id, [
+        {"name": "Locals", "variablesReference": locals_ref},
+        {"name": "Globals", "variablesReference": globals_ref},
+    ])
+    session.set_variables(locals_ref, [
+        {"name": name, "value": value, "type": "int", "variablesReference": 0, "evaluateName": name}
+        for name, value in local_values.items()
+    ] + [
+        {"name": "items", "value": "[...]", "type": "list", "variablesReference": items_ref, "evaluateName": "items"},
+    ])
+    session.set_variables(items_ref, [
+        {"name": str(i), "value": value, "type": "int", "variablesReference": 0, "evaluateName": f"items[{i}]"}
+        for i, value in enumerate(items)
+    ])
+    session.set_variables(globals_ref, [
+        {"name": "CONFIG", "value": "{...}", "type": "dict", "variablesReference": 0, "evaluateName": "CONFIG"},
+    ])
+
+
+class TestStopHistory:
+    def test_changes_since_previous_stop(self):
+        session = Session()
+        history = StopHistory(session)
+
+        stop_at(session, 1, {"i": "0", "total": "0"})
+        history.snapshot(1)
+        assert history.changes(1) == set()
+
+        stop_at(session, 2, {"i": "1", "total": "0", "new": "5"}, items=("1", "3"))
+        history.snapshot(2)
+        assert history.changes(2) == {"i", "new", "items[1]"}
+
+    def test_unchanged_parts_are_shared(self):
+        session = Session()
+        history = StopHistory(session)
+
+        stop_at(session, 1, {"i": "0", "total": "0"})
+        first = history.snapshot(1)
+        stop_at(session, 2, {"i": "1", "total": "0"})
+        second = history.snapshot(2)
+
+        assert second is not first
+        assert second.children["Globals"] is first.children["Globals"]
+        locals_before, locals_after = first.children["Locals"].children, second.children["Locals"].children
+        assert locals_after["total"] is locals_before["total"]
+        assert locals_after["items"] is locals_before["items"]
+        assert locals_after["i"] is not locals_before["i"]
+
+    def test_identical_stop_is_shared_whole(self):
+        session = Session()
+        history = StopHistory(session)
+
+        stop_at(session, 1, {"i": "0"})
+        first = history.snapshot(1)
+        stop_at(session, 2, {"i": "0"})
+
+        assert history.snapshot(2) is first
+        assert history.changes(2) == set()
+
+    def test_recursive_frames_are_told_apart(self):
+        session = Session()
+        history = StopHistory(session)
+
+        def stop(first_frame_id, depths):
+            """ a stop inside a recursive function, with n as its argument at each level, returns the changes """
+            session.clear()
+            frame_ids = [first_frame_id + level for level in range(len(depths))]
+            session.set_stack_trace(1, [
+                {"id": frame_id, "name": "walk", "source": {"path": "/a.py"}, "line": 3} for frame_id in frame_ids
+            ])
+            for frame_id, n in zip(frame_ids, depths):
+                session.set_scopes(frame_id, [{"name": "Locals", "variablesReference": frame_id * 10}])
+                session.set_variables(frame_id * 10, [
+                    {"name": "n", "value": n, "type": "int", "variablesReference": 0, "evaluateName": "n"},
+                ])
+            changes = []
+            for frame_id in frame_ids:
+                # like the variables pane, which compares as soon as it loaded a frame
+                history.snapshot(frame_id)
+                changes.append(history.changes(frame_id))
+            return changes
+
+        stop(1, ["2", "1"])
+
+        assert stop(10, ["2", "1"]) == [set(), set()]
+        assert stop(20, ["3", "1"]) == [{"n"}, set()]
+
+    def test_bounded(self):
+        session = Session()
+        history = StopHistory(session, maxlen=3)
+
+        for frame_id in range(1, 6):
+            stop_at(session, frame_id, {"i": str(frame_id)})
+            history.snapshot(frame_id)
+
+        assert len(history.records) == 3
+        assert history.changes(5) == {"i"}
+
+
+async def test_changed_rows_are_highlighted():
+    session = Session()
+    widget = VariablesWidget(session)
+    stop_at(session, 1, {"i": "0", "total": "0"})
+    widget.frame_id = 1
+    widget.history.snapshot(1)
+    widget.render()
+    unchanged_row = widget.values[2][1]
+
+    stop_at(session, 2, {"i": "1", "total": "0"})
+    widget.frame_id = 2
+    widget.history.snapshot(2)
+    widget.changed = widget.history.changes(2)
+    widget.render()
+
+    rows = {to_formatted_text(row)[1][1]: row for _, row in widget.values[1:4]}
+    assert all("class:variables-changed" in style for style, _ in to_formatted_text(rows["i"]))
+    assert not any("class:variables-changed" in style for style, _ in to_formatted_text(rows["total"]))
+    # the row that didn't change isn't formatted again
+    assert rows["total"] is unchanged_row
+
+
+async def test_variables_without_type_or_evaluate_name():
+    session = Session()
+    widget = VariablesWidget(session)
+    session.set_scopes(1, [{"name": "Locals", "variablesReference": 10}])
+    session.set_variables(10, [{"name": "x", "value": "1", "variablesReference": 0}])
+    widget.frame_id = 1
+    widget.history.snapshot(1)
+    widget.render()
+
+    assert "".join(text for _, text in to_formatted_text(widget.values[1][1])) == "- x:  = 1"
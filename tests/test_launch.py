@@ -0,0 +1,120 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+from tests.stubs import wait_until
+from vidb.client import DAPClient
+from vidb.launch import AdapterProcess, LaunchError, LaunchTimer, adapter_command, launch_configuration, load_profile
+
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+FAKE_ADAPTER = [sys.executable, "-m", "vidb", "fake-adapter", "--stdio", "--threads", "2", "--depth", "3"]
+
+LAUNCH_JSON = """
+{
+    // comments are allowed
+    "configurations": [
+        {"name": "tests", "type": "debugpy", "request": "attach", "connect": {"port": 5678}},
+        {
+            "name": "app",
+            "type": "debugpy",
+            "request": "launch",
+            "program": "${workspaceFolder}/app.py",
+            "args": ["--config", "${workspaceFolder}/app.toml"],
+            "env": {"HOME": "${env:HOME}"}
+        },
+        {"name": "fake", "adapter": "python -m vidb fake-adapter --stdio", "program": "fake.py"}
+    ]
+}
+"""
+
+
+@pytest.fixture
+def launch_json(tmp_path, monkeypatch):
+    monkeypatch.setenv("HOME", "/home/user")
+    path = tmp_path / ".vscode" / "launch.json"
+    path.parent.mkdir()
+    path.write_text(LAUNCH_JSON)
+    return path
+
+
+class TestProfiles:
+    def test_variables_are_expanded(self, launch_json, tmp_path):
+        profile = load_profile(launch_json, "app")
+
+        assert profile["program"] == f"{tmp_path}/app.py"
+        assert profile["args"] == ["--config", f"{tmp_path}/app.toml"]
+        assert profile["env"] == {"HOME": "/home/user"}
+        assert adapter_command(profile) == [sys.executable, "-m", "debugpy.adapter"]
+        assert launch_configuration(profile)["program"] == f"{tmp_path}/app.py"
+
+    def test_first_launch_configuration_by_default(self, launch_json):
+        # the attach configuration is skipped
+        assert load_profile(launch_json)["name"] == "app"
+
+    def test_adapter_command(self, launch_json):
+        profile = load_profile(launch_json, "fake")
+
+        assert adapter_command(profile) == ["python", "-m", "vidb", "fake-adapter", "--stdio"]
+        assert adapter_command(profile, "node adapter.js") == ["node", "adapter.js"]
+        assert "adapter" not in launch_configuration(profile)
+        with pytest.raises(LaunchError, match="--adapter"):
+            adapter_command({"type": "cppdbg"})
+
+    def test_unknown_name(self, launch_json):
+        with pytest.raises(LaunchError, match="there's 'app', 'fake'"):
+            load_profile(launch_json, "missing")
+
+    def test_missing_file(self, tmp_path):
+        with pytest.raises(LaunchError, match="doesn't exist"):
+            load_profile(tmp_path / "launch.json")
+
+
+class TestAdapterProcess:
+    async def test_launch_to_first_stop(self, monkeypatch):
+        monkeypatch.setenv("PYTHONPATH", str(PROJECT_ROOT))
+        timer = LaunchTimer()
+        adapter = AdapterProcess(FAKE_ADAPTER)
+        connection = await adapter.start()
+        timer.mark("adapter started")
+        timer.watch(connection)
+        client = DAPClient(connection=connection)
+        processes = []
+        client.add_event_listener("process", processes.append)
+
+        await client.initialize(
+            request="launch",
+            configuration={"program": "app.py", "args": ["-v"], "env": {"DEBUG": "1"}, "stopOnEntry": True},
+        )
+        await wait_until(lambda: timer.first_stop is not None)
+
+        assert processes[0]["body"]["name"] == "app.py"
+        assert list(timer.marks) == ["adapter started", "initialized", "debuggee started", "first stop"]
+        assert timer.report().startswith(f"launch to first stop: {timer.first_stop:.3f}s (adapter started ")
+        # closing stdin is enough for the adapter to exit
+        assert await adapter.stop() == 0
+
+    async def test_stuck_adapter_is_killed(self):
+        adapter = AdapterProcess([
+            sys.executable,
+            "-c",
+            "import signal, time; signal.signal(signal.SIGTERM, signal.SIG_IGN); time.sleep(60)",
+        ])
+        await adapter.start()
+
+        assert await adapter.stop(timeout=0.5) == -9
+
+    async def test_missing_adapter(self):
+        with pytest.raises(LaunchError, match="can't start the debug adapter"):
+            await AdapterProcess(["vidb-no-such-adapter"]).start()
+
+
+def test_no_stop_is_reported():
+    times = iter([0.0, 0.5])
+    timer = LaunchTimer(clock=lambda: next(times))
+    timer.mark("initialized")
+
+    assert timer.report() == "launch: no stop, initialized after 0.500s"
+    assert timer.first_stop is None
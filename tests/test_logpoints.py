@@ -0,0 +1,115 @@
+import asyncio
+
+from tests.stubs import DAPServerMixin, set_breakpoints_response
+from vidb.breakpoints import BreakpointStore
+from vidb.logpoints import LogpointCounter, LogpointStats, template_pattern
+
+
+def output_event(output, **body):
+    return {"seq": None, "type": "event", "event": "output", "body": dict(output=output, **body)}
+
+
+class TestCapabilityGating(DAPServerMixin):
+    async def test_unsupported_logpoint_is_not_sent(self, client):
+        client.capabilities = {"supportsConditionalBreakpoints": True}
+        store = BreakpointStore()
+        store.add("/a.py", 1)
+        store.update("/a.py", 2, condition="x > 1")
+        store.update("/a.py", 3, logMessage="x is {x}")
+
+        async def server():
+            async with self.assert_request_response(
+                "setBreakpoints",
+                response=set_breakpoints_response(1, 2),
+            ) as request:
+                # sending the logpoint without its logMessage would stop the debuggee
+                assert request["arguments"]["breakpoints"] == [{"line": 1}, {"line": 2, "condition": "x > 1"}]
+
+        await asyncio.gather(server(), store.sync(client))
+
+        assert store.verification("/a.py", 2)["verified"]
+        assert store.verification("/a.py", 3) == {
+            "verified": False,
+            "message": "logMessage not supported by the debugger",
+        }
+
+    async def test_update_unsets_empty_options(self):
+        store = BreakpointStore()
+        store.update("/a.py", 3, logMessage="x is {x}", hitCondition=">10")
+        store.update("/a.py", 3, logMessage="")
+
+        assert store.files["/a.py"][3] == {"line": 3, "hitCondition": ">10"}
+        assert store.logpoints() == {}
+
+
+class TestLogpointStats(DAPServerMixin):
+    async def test_hits_are_counted_per_logpoint(self, client):
+        store = BreakpointStore()
+        store.update("/a.py", 3, logMessage="request {path} took {elapsed}ms")
+        store.update("/b.py", 9, logMessage="cache miss")
+        now = [100.0]
+        stats = LogpointStats(store, clock=lambda: now[0])
+        stats.watch_events(client)
+        received = asyncio.Event()
+        client.add_event_listener("output", lambda event: received.set())
+
+        for output, body in [
+            ("request /users took 12ms\n", {}),
+            ("request /items took 7ms\n", {}),
+            ("cache miss\n", {"source": {"path": "/b.py"}, "line": 9}),
+            ("unrelated print\n", {}),
+        ]:
+            received.clear()
+            self.send_message(output_event(output, category="console", **body))
+            await received.wait()
+
+        assert stats.counters[("/a.py", 3)].count == 2
+        assert stats.counters[("/a.py", 3)].last_message == "request /items took 7ms"
+        assert stats.counters[("/b.py", 9)].count == 1
+        assert len(stats.counters) == 2
+
+    async def test_logpoint_without_text_is_only_matched_by_line(self, client):
+        store = BreakpointStore()
+        store.update("/a.py", 3, logMessage="{request}")
+        stats = LogpointStats(store)
+        stats.watch_events(client)
+        received = asyncio.Event()
+        client.add_event_listener("output", lambda event: received.set())
+
+        for output, body in [
+            ("<Request GET />\n", {"source": {"path": "/a.py"}, "line": 3}),
+            ("unrelated print\n", {}),
+        ]:
+            received.clear()
+            self.send_message(output_event(output, category="console", **body))
+            await received.wait()
+
+        assert stats.counters[("/a.py", 3)].count == 1
+
+
+class TestLogpointCounter:
+    def test_rate_and_sparkline(self):
+        counter = LogpointCounter()
+        for second, hits in [(100, 1), (101, 4), (103, 2)]:
+            for _ in range(hits):
+                counter.hit("message", second + 0.5)
+
+        assert counter.per_second(5, now=103.9) == [0, 1, 4, 0, 2]
+        assert counter.rate(now=103.9, seconds=5) == 7 / 5
+        assert counter.sparkline(now=103.9, width=5) == " ▂█ ▄"
+
+    def test_old_buckets_are_dropped(self):
+        counter = LogpointCounter(window=10)
+        counter.hit("a", 0)
+        counter.hit("b", 50)
+
+        assert len(counter.buckets) == 1
+        assert counter.count == 2
+
+
+def test_template_pattern():
+    pattern = template_pattern("user {user.id} has {len(items)} items")
+
+    assert pattern.fullmatch("user 12 has 3 items")
+    assert not pattern.fullmatch("user 12 has 3 things")
+    assert template_pattern(" {user} {items} ") is None
@@ -0,0 +1,135 @@
+import asyncio
+import base64
+
+from prompt_toolkit.application.current import set_app
+from prompt_toolkit.input.defaults import create_pipe_input
+from prompt_toolkit.output import DummyOutput
+
+from vidb.memory import MemoryPages
+from vidb.session import Session
+from vidb.ui import UI, MemoryControl
+
+
+class MemoryClient:
+    """ serves readMemory from a bytes object mapped at 0x1000, reads past its end are unreadable """
+
+    def __init__(self, memory: bytes):
+        self.memory = memory
+        self.reads = []
+
+    def remote_call(self, request_cls, command, arguments):
+        assert command == "readMemory"
+        assert arguments["memoryReference"] == "0x1000"
+        offset, count = arguments["offset"], arguments["count"]
+        self.reads.append(offset)
+        data = self.memory[offset:offset + count]
+
+        async def _respond():
+            return {
+                "address": hex(0x1000 + offset),
+                "data": base64.b64encode(data).decode("ascii"),
+                "unreadableBytes": count - len(data),
+            }
+
+        return _respond()
+
+
+MEMORY = bytes(range(256)) * 64
+
+
+async def test_rows():
+    pages = MemoryPages(MemoryClient(b"hello, world\x00\x01"), "0x1000", page_size=64)
+
+    assert pages.format_row(0) is None
+    await pages.request(0)
+
+    assert pages.format_row(0) == (
+        "0x000000001000  68 65 6c 6c 6f 2c 20 77 6f 72 6c 64 00 01 ?? ??  hello, world..  "
+    )
+    assert pages.format_row(16) == "0x000000001010  " + " ".join(["??"] * 16) + "  " + " " * 16
+
+
+async def test_pages_are_cached_and_bounded():
+    client = MemoryClient(MEMORY)
+    pages = MemoryPages(client, "0x1000", page_size=256, max_pages=2)
+
+    await asyncio.gather(pages.request(0), pages.request(0))
+    await pages.request(1)
+    assert pages.request(0) is None
+    assert client.reads == [0, 256]
+
+    # page 1 is the least recently used, page 0 was just viewed
+    pages.view(0, 16)
+    await pages.request(2)
+    assert sorted(pages.pages) == [0, 2]
+    assert pages.view(256, 16) is None
+    assert pages.view(512, 4).tobytes() == b"\x00\x01\x02\x03"
+    assert len(pages.buffer) == 2 * 256
+
+
+async def test_only_visible_rows_are_read():
+    client = MemoryClient(MEMORY)
+    pages = MemoryPages(client, "0x1000", page_size=256)
+    control = MemoryControl(pages)
+    control.top_row = 100
+
+    content = control.create_content(width=80, height=10)
+    lines = [content.get_line(i) for i in range(content.line_count)]
+    assert all("reading" in text for _, text in lines[0])
+    await asyncio.gather(*pages._pending.values())
+
+    # rows 100 to 109 are bytes 1600 to 1759, in pages 6
+    assert client.reads == [6 * 256]
+    content = control.create_content(width=80, height=10)
+    assert content.get_line(0)[0][1].startswith("0x000000001640  40 41 42")
+
+
+async def test_pages_are_read_again_after_the_debuggee_ran():
+    session = Session()
+    client = MemoryClient(MEMORY)
+    pages = MemoryPages(client, "0x1000", session=session, page_size=256)
+    await pages.request(0)
+    in_flight = pages.request(1)
+
+    session.clear()
+    client.memory = b"\xff" * 512
+    # a read from before isn't kept
+    await asyncio.sleep(0)
+    assert in_flight.cancelled()
+    assert pages.format_row(0) is None and pages.format_row(256) is None
+
+    await pages.request(0)
+    assert pages.view(0, 4).tobytes() == b"\xff" * 4
+    assert client.reads == [0, 0]
+
+    pages.close()
+    session.clear()
+    assert pages.view(0, 4) is not None
+
+
+class TestViewMemory:
+    async def test_opens_the_variables_memory(self):
+        app = UI(input=create_pipe_input(), output=DummyOutput())
+        client = MemoryClient(MEMORY)
+        client.capabilities = {"supportsReadMemoryRequest": True}
+
+        with set_app(app._ptk):
+            app.view_memory(app._ptk, client, {"name": "buf", "value": "b''", "memoryReference": "0x1000"})
+
+        assert app.memory_viewer.visible
+        assert app.prompt_line.message == ""
+
+    async def test_says_why_there_is_nothing_to_show(self):
+        app = UI(input=create_pipe_input(), output=DummyOutput())
+        client = MemoryClient(MEMORY)
+        client.capabilities = {"supportsReadMemoryRequest": True}
+
+        with set_app(app._ptk):
+            app.view_memory(app._ptk, client, {"name": "n", "value": "1"})
+            assert app.prompt_line.message == "n has no memory reference"
+
+            client.capabilities = {}
+            app.view_memory(app._ptk, client, {"name": "buf", "value": "b''", "memoryReference": "0x1000"})
+            assert app.prompt_line.message == "the debug adapter can't read memory"
+
+        assert not app.memory_viewer.visible
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+from vidb.monitor import LoopMonitor, callback_name, percentile
+
+
+def block(seconds):
+    time.sleep(seconds)
+
+
+class TestLoopMonitor:
+    async def test_slow_callbacks_and_lag(self):
+        monitor = LoopMonitor(slow_callback_duration=0.02, lag_interval=0.01, profiler="none")
+        monitor.start()
+        try:
+            await asyncio.sleep(0.03)
+            loop = asyncio.get_running_loop()
+            for _ in range(2):
+                loop.call_soon(block, 0.05)
+                await asyncio.sleep(0.03)
+        finally:
+            monitor.stop()
+
+        assert not asyncio.get_running_loop().get_debug()
+        [(name, durations)] = [
+            (name, durations)
+            for name, durations in monitor.slow_callbacks.durations.items()
+            if "block" in name
+        ]
+        assert len(durations) == 2
+        assert min(durations) >= 0.05
+        assert max(monitor.lags) >= 0.03
+
+        report = monitor.report()
+        assert "Loop lag:" in report
+        assert "block" in report
+
+    async def test_cprofile_report(self):
+        monitor = LoopMonitor(profiler="cprofile")
+        monitor.start()
+        await asyncio.sleep(0)
+        block(0.001)
+        monitor.stop()
+
+        assert "block" in monitor.report()
+
+    def test_percentile(self):
+        values = [float(i) for i in range(1, 101)]
+        assert percentile(values, 50) == 50.0
+        assert percentile(values, 99) == 99.0
+        assert percentile([3.0], 90) == 3.0
+
+    def test_callback_name(self):
+        assert callback_name("<Task pending name='Task-12' coro=<f() at 0x7f00ab>>") == (
+            "<Task pending name='Task' coro=<f()>>"
+        )
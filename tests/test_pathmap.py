@@ -0,0 +1,94 @@
+import time
+
+import pytest
+
+from tests.stubs import DAPServerMixin
+from vidb.pathmap import PathMapper, PathTrie, parse_mapping, split_path
+from vidb.ui import SourceWidget
+
+
+MAPPINGS = [
+    {"localRoot": "/home/me/project", "remoteRoot": "/opt/app"},
+    {"localRoot": "/home/me/venv/site-packages", "remoteRoot": "/opt/app/venv/lib/python3.10/site-packages"},
+]
+
+
+class TestPathTrie:
+    def test_longest_prefix(self):
+        trie = PathTrie()
+        trie.insert("/opt", "opt")
+        trie.insert("/opt/app/", "app")
+
+        assert trie.longest_prefix("/opt/app/main.py") == ("app", ("main.py",))
+        assert trie.longest_prefix("/opt/application.py") == ("opt", ("application.py",))
+        assert trie.longest_prefix("/opt/app") == ("app", ())
+        assert trie.longest_prefix("/srv/main.py") is None
+
+    def test_split_path(self):
+        assert split_path("/opt/app/") == ("", "opt", "app")
+        assert split_path("C:\\app\\main.py") == ("C:", "app", "main.py")
+
+
+class TestPathMapper:
+    def test_to_local_uses_longest_root(self):
+        mapper = PathMapper(MAPPINGS)
+
+        assert mapper.to_local("/opt/app/vidb/main.py") == "/home/me/project/vidb/main.py"
+        assert mapper.to_local("/opt/app/venv/lib/python3.10/site-packages/six.py") == (
+            "/home/me/venv/site-packages/six.py"
+        )
+
+    def test_to_remote(self):
+        mapper = PathMapper(MAPPINGS)
+
+        assert mapper.to_remote("/home/me/project/vidb/main.py") == "/opt/app/vidb/main.py"
+
+    def test_unmapped_paths_are_unchanged(self):
+        mapper = PathMapper(MAPPINGS)
+
+        assert mapper.to_local("/usr/lib/python3.10/os.py") == "/usr/lib/python3.10/os.py"
+        assert mapper.to_local("/opt/application/main.py") == "/opt/application/main.py"
+        assert PathMapper().to_local("/opt/app/main.py") == "/opt/app/main.py"
+
+    def test_windows_remote(self):
+        mapper = PathMapper([{"localRoot": "/home/me/project", "remoteRoot": "C:\\app"}])
+
+        assert mapper.to_local("C:\\app\\pkg\\main.py") == "/home/me/project/pkg/main.py"
+        assert mapper.to_remote("/home/me/project/pkg/main.py") == "C:\\app\\pkg\\main.py"
+
+    def test_many_mappings(self):
+        mapper = PathMapper(
+            [{"localRoot": f"/local/pkg{i}", "remoteRoot": f"/remote/site-packages/pkg{i}"} for i in range(1000)]
+        )
+        paths = [f"/remote/site-packages/pkg{i}/module{j}.py" for i in range(0, 1000, 10) for j in range(100)]
+
+        started = time.perf_counter()
+        translated = [mapper.to_local(path) for path in paths]
+        assert time.perf_counter() - started < 1.0
+        assert translated[-1] == "/local/pkg990/module99.py"
+
+        mapper.to_local(paths[-1])
+        assert mapper.to_local.cache_info().hits >= 1
+
+    def test_from_file(self, tmp_path):
+        path = tmp_path / "mappings.json"
+        path.write_text('[{"localRoot": "/home/me/project", "remoteRoot": "/opt/app"}]')
+
+        assert PathMapper.from_file(path).to_local("/opt/app/x.py") == "/home/me/project/x.py"
+
+    def test_parse_mapping(self):
+        assert parse_mapping("/home/me/project=/opt/app") == MAPPINGS[0]
+        with pytest.raises(ValueError):
+            parse_mapping("/home/me/project")
+
+
+class TestSourceWidgetPathMapping(DAPServerMixin):
+    async def test_opens_mapped_local_file(self, client, tmp_path):
+        (tmp_path / "main.py").write_text("print('local')\n")
+        client.path_mapper = PathMapper([{"localRoot": str(tmp_path), "remoteRoot": "/opt/app"}])
+
+        # no source request is made for a file that exists locally
+        file = await SourceWidget().open_source(client, {"path": "/opt/app/main.py", "sourceReference": 0})
+
+        assert file.read() == "print('local')\n"
+        file.close()
@@ -0,0 +1,192 @@
+import asyncio
+
+import pytest
+
+from tests.stubs import DAPServerMixin
+from tests.test_dap_stacktrace import STACK_TRACE_RESPONSE
+from tests.test_dap_threads import THREADS_RESPONSE
+from vidb.client import DAPClient, stack_trace, threads
+from vidb.connection import DAPConnection, DAPServerConnection
+from vidb.recording import (
+    RecordingDispatcher,
+    ReplayError,
+    ReplayServer,
+    SessionRecorder,
+    read_log,
+    session_log_path,
+)
+
+
+THREAD_EVENT = {
+    "seq": 2,
+    "type": "event",
+    "event": "thread",
+    "body": {"reason": "started", "threadId": 4},
+}
+
+RECORDED_SESSION = [
+    (0.0, {"seq": 7, "type": "request", "command": "threads", "arguments": None}),
+    (0.01, dict(THREADS_RESPONSE, request_seq=7)),
+    (0.02, THREAD_EVENT),
+    (0.03, {"seq": 8, "type": "request", "command": "stackTrace", "arguments": {"threadId": 1}}),
+    (0.04, dict(STACK_TRACE_RESPONSE, seq=3, request_seq=8)),
+]
+
+START_DEBUGGING_REQUEST = {
+    "seq": 4,
+    "type": "request",
+    "command": "startDebugging",
+    "arguments": {"request": "attach", "configuration": {"subProcessId": 42}},
+}
+
+# the adapter asks for a child session, vidb answers it between its own requests
+RECORDED_REVERSE_REQUEST = [
+    (0.0, {"seq": 7, "type": "request", "command": "threads", "arguments": None}),
+    (0.01, dict(THREADS_RESPONSE, request_seq=7)),
+    (0.02, START_DEBUGGING_REQUEST),
+    (0.03, {"seq": 8, "type": "response", "request_seq": 4, "command": "startDebugging", "success": True}),
+    (0.04, {"seq": 9, "type": "request", "command": "stackTrace", "arguments": {"threadId": 1}}),
+    (0.05, dict(STACK_TRACE_RESPONSE, seq=5, request_seq=9)),
+]
+
+
+class TestSessionRecorder:
+    @pytest.mark.parametrize("file_name", ["session.jsonl", "session.jsonl.gz"])
+    def test_record_and_read_log(self, tmp_path, file_name):
+        path = tmp_path / file_name
+        recorder = SessionRecorder(path)
+        for _, message in RECORDED_SESSION:
+            recorder.record(message)
+        recorder.close()
+
+        log = list(read_log(path))
+        assert [message for _, message in log] == [message for _, message in RECORDED_SESSION]
+        timestamps = [timestamp for timestamp, _ in log]
+        assert timestamps == sorted(timestamps)
+
+    def test_log_is_appended(self, tmp_path):
+        path = tmp_path / "session.jsonl"
+        for _ in range(2):
+            recorder = SessionRecorder(path)
+            recorder.record(THREAD_EVENT)
+            recorder.close()
+
+        assert len(list(read_log(path))) == 2
+
+    def test_subprocess_sessions_are_logged_next_to_the_main_one(self):
+        assert session_log_path("logs/session.jsonl.gz", 1) == "logs/session.jsonl.gz"
+        assert session_log_path("logs/session.jsonl.gz", 2) == "logs/session.2.jsonl.gz"
+        assert session_log_path("session", 3) == "session.3"
+
+
+class TestRecordingDispatcher(DAPServerMixin):
+    async def test_records_both_directions(self, tmp_path, bidirectional_pipe):
+        reader, server_writer, server_reader, writer = bidirectional_pipe
+        recorder = SessionRecorder(tmp_path / "session.jsonl")
+        connection = DAPConnection(reader, writer, dispatcher=RecordingDispatcher(recorder))
+        client = DAPClient(connection=connection)
+        connection.start_listening()
+
+        async def server():
+            async with self.assert_request_response("threads", response=THREADS_RESPONSE):
+                pass
+
+        await asyncio.gather(server(), threads(client))
+        recorder.close()
+
+        log = [message for _, message in read_log(tmp_path / "session.jsonl")]
+        assert [(message["type"], message["command"]) for message in log] == [
+            ("request", "threads"),
+            ("response", "threads"),
+        ]
+
+    async def test_records_reverse_requests_and_their_responses(self, tmp_path, bidirectional_pipe):
+        reader, server_writer, server_reader, writer = bidirectional_pipe
+        recorder = SessionRecorder(tmp_path / "session.jsonl")
+        connection = DAPConnection(reader, writer, dispatcher=RecordingDispatcher(recorder))
+        client = DAPClient(connection=connection)
+        client.handle_request("startDebugging", lambda arguments: asyncio.sleep(0))
+        connection.start_listening()
+
+        server = DAPServerConnection(server_reader, server_writer)
+        server.send_message(START_DEBUGGING_REQUEST)
+        assert (await server.recv_message())["request_seq"] == 4
+        recorder.close()
+
+        log = [message for _, message in read_log(tmp_path / "session.jsonl")]
+        assert [(message["type"], message["command"]) for message in log] == [
+            ("request", "startDebugging"),
+            ("response", "startDebugging"),
+        ]
+
+
+class TestReplayServer:
+    async def test_replay_rewrites_request_seq(self, client, server_connection):
+        events = []
+        client.add_event_listener("thread", events.append)
+        replay = ReplayServer(RECORDED_SESSION, max_speed=True)
+        server_task = asyncio.create_task(replay.serve(server_connection))
+
+        thread_list = await threads(client)
+        frames = await stack_trace(client, thread_id=1)
+        await server_task
+
+        assert thread_list == THREADS_RESPONSE["body"]
+        assert frames == STACK_TRACE_RESPONSE["body"]
+        assert events == [THREAD_EVENT]
+
+    async def test_replay_with_original_timing(self, client, server_connection):
+        replay = ReplayServer(RECORDED_SESSION, max_speed=False)
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        server_task = asyncio.create_task(replay.serve(server_connection))
+
+        await threads(client)
+        await stack_trace(client, thread_id=1)
+        await server_task
+
+        assert loop.time() - started >= 0.04
+
+    async def test_replay_mismatch(self, client, server_connection):
+        replay = ReplayServer(RECORDED_SESSION, max_speed=True)
+        server_task = asyncio.create_task(replay.serve(server_connection))
+
+        request = asyncio.create_task(stack_trace(client, thread_id=1))
+        with pytest.raises(ReplayError, match="expected 'threads' request, got 'stackTrace'"):
+            await server_task
+        # the mismatched request is never answered
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
+
+    async def test_replay_reverse_requests(self, client, server_connection):
+        requests = []
+
+        async def start_debugging(arguments):
+            requests.append(arguments)
+
+        client.handle_request("startDebugging", start_debugging)
+        replay = ReplayServer(RECORDED_REVERSE_REQUEST, max_speed=True)
+        server_task = asyncio.create_task(replay.serve(server_connection))
+
+        await threads(client)
+        # the stack trace is only answered once the reverse request was
+        frames = await stack_trace(client, thread_id=1)
+        await server_task
+
+        assert requests == [START_DEBUGGING_REQUEST["arguments"]]
+        assert frames == STACK_TRACE_RESPONSE["body"]
+
+    async def test_replay_expects_the_reverse_request_answered(self, client, server_connection):
+        # nothing answers startDebugging, the stack trace request comes instead
+        client.handle_request("startDebugging", lambda arguments: asyncio.Future())
+        replay = ReplayServer(RECORDED_REVERSE_REQUEST, max_speed=True)
+        server_task = asyncio.create_task(replay.serve(server_connection))
+
+        await threads(client)
+        request = asyncio.create_task(stack_trace(client, thread_id=1))
+        with pytest.raises(ReplayError, match="expected the response to 'startDebugging', got request 'stackTrace'"):
+            await server_task
+        request.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await request
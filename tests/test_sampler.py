@@ -0,0 +1,73 @@
+import asyncio
+
+import pytest
+
+from tests.stubs import DAPServerMixin, IDLE, BUSY, STOPPED_EVENT, make_session, response
+from vidb.sampler import main, next_delay, profile, Profile
+
+
+class TestProfile:
+    def test_collapsed_stacks_are_root_first(self):
+        result = Profile()
+        result.add_sample(make_session({1: BUSY, 2: IDLE}), 0.01)
+        result.add_sample(make_session({1: IDLE, 2: IDLE}), 0.03)
+
+        assert result.collapsed() == (
+            "worker (worker.py:12);get (worker.py:171);wait (worker.py:320) 3\n"
+            "worker (worker.py:15);handle (worker.py:40) 1\n"
+        )
+        assert result.pauses == [0.01, 0.03]
+
+    @pytest.mark.parametrize(
+        "interval, pause_duration, max_overhead, expected",
+        [
+            # within the overhead budget, sample every interval
+            (0.1, 0.002, 0.05, 0.098),
+            # a slow pause stretches the interval to keep the overhead at 5%
+            (0.1, 0.01, 0.05, 0.19),
+            (0.1, 0.2, 0.5, 0.2),
+        ],
+    )
+    def test_next_delay(self, interval, pause_duration, max_overhead, expected):
+        assert next_delay(interval, pause_duration, max_overhead) == pytest.approx(expected)
+
+    @pytest.mark.parametrize("max_overhead", ["0", "1", "1.5", "-0.1", "five"])
+    def test_max_overhead_is_a_fraction(self, max_overhead, capsys):
+        with pytest.raises(SystemExit):
+            main(["5678", "--max-overhead", max_overhead])
+
+        assert "--max-overhead" in capsys.readouterr().err
+
+
+class TestSampler(DAPServerMixin):
+    async def test_single_sample(self, client):
+        async def server():
+            async with self.assert_request_response(
+                "threads",
+                response=response("threads", {"threads": [{"id": 1, "name": "MainThread"}]}),
+            ):
+                pass
+            async with self.assert_request_response("pause", response=response("pause")):
+                pass
+            self.send_message(STOPPED_EVENT)
+            async with self.assert_request_response(
+                "stackTrace",
+                response=response(
+                    "stackTrace",
+                    {
+                        "stackFrames": [
+                            {"id": 1, "name": "select", "line": 469, "column": 1, "source": {"path": "/usr/lib/selectors.py"}},
+                            {"id": 2, "name": "main", "line": 3, "column": 1, "source": {"path": "/app/main.py"}},
+                        ],
+                    },
+                ),
+            ):
+                pass
+            async with self.assert_request_response("continue", response=response("continue", {})):
+                pass
+
+        _, result = await asyncio.gather(server(), profile(client, samples=1))
+
+        assert result.collapsed() == "main (main.py:3);select (selectors.py:469) 1\n"
+        assert len(result.pauses) == 1
+        assert 0 < result.overhead <= 1
@@ -0,0 +1,181 @@
+import asyncio
+
+from tests.stubs import DAPServerMixin
+from tests.test_dap_stacktrace import STACK_TRACE_RESPONSE, BOTTOM_MOST_FRAME_ID
+from vidb.session import Session
+from vidb.ui import VariablesWidget
+
+
+SCOPES_RESPONSE = {
+    "seq": None,
+    "type": "response",
+    "request_seq": None,
+    "success": True,
+    "command": "scopes",
+    "body": {
+        "scopes": [
+            {"name": "Locals", "variablesReference": 11, "expensive": False},
+            {"name": "Globals", "variablesReference": 12, "expensive": False},
+        ],
+    },
+}
+
+
+class TestSession(DAPServerMixin):
+    async def test_load_stack_trace_indexes_frames(self, client):
+        session = Session()
+
+        async def server():
+            async with self.assert_request_response("stackTrace", response=STACK_TRACE_RESPONSE):
+                pass
+
+        await asyncio.gather(
+            server(),
+            session.load_stack_trace(client, 1),
+        )
+
+        assert session.frames[BOTTOM_MOST_FRAME_ID]["name"] == "select"
+        assert session.frame_thread[BOTTOM_MOST_FRAME_ID] == 1
+        assert session.thread_frames[1] == [BOTTOM_MOST_FRAME_ID, 2]
+        assert session.frames_of(1) == STACK_TRACE_RESPONSE["body"]["stackFrames"]
+
+    async def test_concurrent_loads_share_one_request(self, client):
+        session = Session()
+        notifications = []
+        session.subscribe(lambda kind, key: notifications.append((kind, key)))
+
+        async def server():
+            async with self.assert_request_response("scopes", response=SCOPES_RESPONSE) as request:
+                assert request["arguments"] == {"frameId": 2}
+
+        first, second, _ = await asyncio.gather(
+            session.load_scopes(client, 2),
+            session.load_scopes(client, 2),
+            server(),
+        )
+
+        assert first == second == SCOPES_RESPONSE["body"]["scopes"]
+        assert session.scopes[11]["name"] == "Locals"
+        assert session.frame_scopes[2] == [11, 12]
+        assert notifications == [("scopes", 2)]
+
+        # cached, does not send another request
+        assert await session.load_scopes(client, 2) == first
+
+    async def test_clear(self):
+        session = Session()
+        notifications = []
+        session.subscribe(lambda kind, key: notifications.append((kind, key)))
+
+        session.set_stack_trace(1, STACK_TRACE_RESPONSE["body"]["stackFrames"])
+        session.set_variables(11, [{"name": "foo", "value": "1", "variablesReference": 0}])
+        session.clear()
+
+        assert session.frames == {}
+        assert session.children_of(11) == []
+        assert notifications == [("frames", 1), ("variables", 11), ("clear", None)]
+
+
+def invalidated_event(**body):
+    return {"seq": None, "type": "event", "event": "invalidated", "body": body}
+
+
+def paused_session():
+    """ two threads, the first with two frames, each frame with one scope, and one expanded variable """
+    session = Session()
+    session.set_threads([{"id": 1, "name": "MainThread"}, {"id": 2, "name": "Worker"}])
+    session.set_stack_trace(1, [{"id": 10, "name": "f"}, {"id": 11, "name": "g"}])
+    session.set_stack_trace(2, [{"id": 20, "name": "h"}])
+    for frame_id in [10, 11, 20]:
+        session.set_scopes(frame_id, [{"name": "Locals", "variablesReference": frame_id * 10}])
+        session.set_variables(frame_id * 10, [{"name": "x", "value": "[1]", "variablesReference": frame_id * 10 + 1}])
+        session.set_variables(frame_id * 10 + 1, [{"name": "0", "value": "1", "variablesReference": 0}])
+    return session
+
+
+class TestInvalidation:
+    def test_variables_of_one_frame(self):
+        session = paused_session()
+        notifications = []
+        session.subscribe(lambda kind, key: notifications.append((kind, key)))
+
+        session.handle_invalidated_event(invalidated_event(areas=["variables"], threadId=2, stackFrameId=10))
+
+        # the expanded variable goes with its scope
+        assert sorted(session.children) == [110, 111, 200, 201]
+        assert session.frame_scopes[10] == [100]
+        assert session.thread_frames[1] == [10, 11]
+        assert notifications == [("invalidated", ("variables", 10))]
+
+    def test_variables_of_one_thread(self):
+        session = paused_session()
+
+        session.handle_invalidated_event(invalidated_event(areas=["variables"], threadId=1))
+
+        assert sorted(session.children) == [200, 201]
+
+    def test_stacks_of_one_thread(self):
+        session = paused_session()
+        notifications = []
+        session.subscribe(lambda kind, key: notifications.append((kind, key)))
+
+        session.handle_invalidated_event(invalidated_event(areas=["stacks"], threadId=1))
+
+        assert 1 not in session.thread_frames
+        assert session.frames.keys() == {20}
+        assert session.frame_scopes.keys() == {20}
+        assert sorted(session.children) == [200, 201]
+        assert session.threads.keys() == {1, 2}
+        assert notifications == [("invalidated", ("stacks", 1))]
+
+    def test_unknown_frame_is_ignored(self):
+        session = paused_session()
+        notifications = []
+        session.subscribe(lambda kind, key: notifications.append((kind, key)))
+
+        session.handle_invalidated_event(invalidated_event(areas=["stacks"], stackFrameId=99))
+
+        assert session.frames.keys() == {10, 11, 20}
+        assert len(session.children) == 6
+        assert notifications == []
+
+    def test_all(self):
+        session = paused_session()
+        notifications = []
+        session.subscribe(lambda kind, key: notifications.append((kind, key)))
+
+        session.handle_invalidated_event({"seq": None, "type": "event", "event": "invalidated"})
+
+        assert session.frames == {}
+        assert session.children == {}
+        assert notifications == [("invalidated", ("threads", None)), ("invalidated", ("stacks", None))]
+
+
+class TestInvalidationReloads(DAPServerMixin):
+    async def test_variables_widget_reloads_only_variables(self, client):
+        session = paused_session()
+        session.watch_events(client)
+        widget = VariablesWidget(session)
+        widget.client = client
+        widget.frame_id = 10
+        session.subscribe(widget._on_session_changed)
+
+        self.send_message(invalidated_event(areas=["variables"], stackFrameId=10))
+        async with self.assert_request_response(
+            "variables",
+            response={
+                "seq": None,
+                "type": "response",
+                "request_seq": None,
+                "success": True,
+                "command": "variables",
+                "body": {"variables": [{"name": "x", "value": "[2]", "variablesReference": 0}]},
+            },
+        ) as request:
+            # the scopes are still cached
+            assert request["arguments"] == {"variablesReference": 100}
+
+        changed = asyncio.Event()
+        session.subscribe(lambda kind, key: kind == "variables" and changed.set())
+        await changed.wait()
+        assert session.children_of(100)[0]["value"] == "[2]"
@@ -0,0 +1,173 @@
+import asyncio
+
+from prompt_toolkit.input.defaults import create_pipe_input
+from prompt_toolkit.output import DummyOutput
+
+from tests.stubs import RecordingAdapter, wait_until
+from vidb.__main__ import initial_load
+from vidb.client import DAPClient, disconnect
+from vidb.connection import DAPConnection, DAPServerConnection
+from vidb.fake_adapter import serve_in_process
+from vidb.sessions import SessionManager, connect_address
+from vidb.ui import UI
+
+
+async def start_with_children():
+    parent = RecordingAdapter(threads=2, depth=3)
+    children = []
+
+    async def open_connection(configuration=None):
+        child = RecordingAdapter(threads=3, depth=3)
+        connection, task = await serve_in_process(child)
+        children.append((child, task))
+        return connection
+
+    connection, task = await serve_in_process(parent)
+    app = UI(input=create_pipe_input(), output=DummyOutput())
+    app.breakpoints.toggle("/fake/module_1.py", 5)
+    manager = SessionManager(open_connection, session=app.session, breakpoints=app.breakpoints)
+    manager.add(DAPClient(connection=connection), "main")
+    await app.sessions_widget.attach(manager)
+    await initial_load(manager.client, app)
+    await wait_until(lambda: app.stacktrace_widget.thread_id is not None)
+    return parent, task, children, manager, app
+
+
+async def test_child_session_is_attached_with_its_configuration():
+    parent, task, children, manager, app = await start_with_children()
+
+    parent.start_debugging({"name": "worker", "subProcessId": 42})
+    await wait_until(lambda: children and children[0][0].commands("configurationDone"))
+    child, child_task = children[0]
+
+    [(_, attach_arguments)] = child.commands("attach")
+    assert attach_arguments["subProcessId"] == 42
+    [(_, breakpoint_arguments)] = child.commands("setBreakpoints")
+    assert breakpoint_arguments["breakpoints"] == [{"line": 5}]
+    assert [(s.name, s.parent and s.parent.name) for s in manager.sessions.values()] == [
+        ("main", None),
+        ("worker", "main"),
+    ]
+
+    # the child stopping in the background doesn't touch what's shown
+    parent.requests.clear()
+    child.stop(1)
+    worker = manager.sessions[2]
+    await wait_until(lambda: worker.state == "stopped")
+    assert sorted(app.session.threads) == [1, 2]
+    assert manager.current.name == "main"
+
+    await app.sessions_widget.switch(worker)
+    await wait_until(lambda: app.stacktrace_widget.thread_id is not None and app.stacktrace_widget.frames)
+    assert sorted(app.session.threads) == [1, 2, 3]
+    assert child.commands("stackTrace")
+    assert not parent.commands("threads", "stackTrace")
+
+    await disconnect(worker.client)
+    await disconnect(manager.sessions[1].client)
+    await child_task
+    await task
+
+
+async def test_child_session_can_be_launched():
+    parent, task, children, manager, app = await start_with_children()
+
+    parent.start_debugging({"name": "worker", "program": "worker.py"}, request="launch")
+    await wait_until(lambda: children and children[0][0].commands("configurationDone"))
+    child, child_task = children[0]
+
+    assert child.launched["program"] == "worker.py"
+    assert not child.commands("attach")
+
+    await disconnect(manager.sessions[2].client)
+    await disconnect(manager.sessions[1].client)
+    await child_task
+    await task
+
+
+async def test_terminated_child_session_is_dropped():
+    parent, task, children, manager, app = await start_with_children()
+    parent.start_debugging({"name": "worker", "subProcessId": 42})
+    parent.start_debugging({"name": "worker", "subProcessId": 43})
+    await wait_until(lambda: len(children) == 2 and all(child.commands("configurationDone") for child, _ in children))
+    first, second = manager.sessions[2], manager.sessions[3]
+    await app.sessions_widget.switch(second)
+
+    children[0][0].send_event("terminated")
+    children[1][0].send_event("terminated")
+    await asyncio.gather(*[child_task for _, child_task in children])
+
+    # the connections are closed, and the one shown gives way to its parent
+    await wait_until(lambda: manager.current.name == "main" and app.stacktrace_widget.thread_id is not None)
+    assert list(manager.sessions) == [1]
+    assert first.state == second.state == "terminated"
+    assert first.client.connection.dispatcher.closed
+
+    # switching to a session that ended doesn't wait on its closed connection
+    await asyncio.wait_for(app.sessions_widget.switch(first), 1)
+    assert not await asyncio.wait_for(manager.switch(first), 1)
+    assert manager.current.name == "main"
+    await asyncio.wait_for(app.breakpoints.sync(manager.client), 1)
+
+    await disconnect(manager.sessions[1].client)
+    await task
+
+
+async def test_child_session_connects_where_its_configuration_says():
+    parent = RecordingAdapter(threads=2, depth=3)
+    child = RecordingAdapter(threads=3, depth=3)
+    served = []
+
+    async def serve_child(reader, writer):
+        served.append(asyncio.ensure_future(child.serve(DAPServerConnection(reader, writer))))
+
+    # like the listener for subprocesses of the adapter that's already running
+    server = await asyncio.start_server(serve_child, "localhost", 0)
+    port = server.sockets[0].getsockname()[1]
+    opened = []
+
+    async def open_connection(configuration=None):
+        opened.append(configuration)
+        address = connect_address(configuration)
+        assert address is not None
+        return await DAPConnection.from_tcp(*address)
+
+    connection, task = await serve_in_process(parent)
+    manager = SessionManager(open_connection)
+    manager.add(DAPClient(connection=connection), "main")
+    await manager.client.initialize()
+
+    configuration = {"name": "worker", "subProcessId": 42, "connect": {"host": "localhost", "port": port}}
+    parent.start_debugging(configuration)
+    await wait_until(lambda: child.commands("configurationDone"))
+
+    assert opened == [configuration]
+    [(_, attach_arguments)] = child.commands("attach")
+    assert attach_arguments["subProcessId"] == 42
+
+    await disconnect(manager.sessions[2].client)
+    await disconnect(manager.sessions[1].client)
+    await asyncio.gather(task, *served)
+    server.close()
+    await server.wait_closed()
+
+
+def test_connect_address():
+    assert connect_address({"connect": {"host": "127.0.0.1", "port": 5678}}) == ("127.0.0.1", 5678)
+    assert connect_address({"connect": {"port": "5678"}}) == ("localhost", 5678)
+    assert connect_address({"connect": {}}) is None
+    assert connect_address({"program": "worker.py"}) is None
+    assert connect_address(None) is None
+
+
+async def test_unsupported_reverse_requests_are_answered():
+    parent, task, children, manager, app = await start_with_children()
+    client = manager.sessions[1].client
+
+    parent.connection.send_message({"seq": 99, "type": "request", "command": "runInTerminal", "arguments": {}})
+    await wait_until(lambda: len(client.connection.dispatcher._messages) and any(
+        message.get("command") == "runInTerminal" for message in client.connection.dispatcher._messages
+    ))
+
+    await disconnect(client)
+    await task
@@ -0,0 +1,66 @@
+import pytest
+
+from tests.stubs import IDLE, BUSY, make_session
+from vidb.__main__ import cli
+from vidb.client import DAPClient, source, variables
+from vidb.dump import dump
+from vidb.snapshot import SnapshotConnection, load, save, session_to_snapshot
+
+
+@pytest.fixture
+def snapshot():
+    session = make_session({1: BUSY, 2: IDLE})
+    session.set_scopes(0, [{"name": "Locals", "variablesReference": 7, "expensive": False}])
+    session.set_variables(7, [{"name": "request_id", "value": "'abc'", "variablesReference": 0}])
+    return session_to_snapshot(
+        session,
+        capabilities={"supportsConfigurationDoneRequest": True},
+        sources={"path:/app/worker.py": "def worker():\n    ...\n", "ref:5": "generated"},
+    )
+
+
+class TestSnapshot:
+    def test_save_load_roundtrip(self, snapshot, tmp_path):
+        path = tmp_path / "snapshot.vidb"
+        save(path, snapshot)
+
+        loaded = load(path)
+
+        assert loaded == snapshot
+        assert list(loaded["stackTraces"]) == [1, 2]
+
+    def test_load_rejects_unknown_version(self, snapshot, tmp_path):
+        path = tmp_path / "snapshot.vidb"
+        save(path, dict(snapshot, version=999))
+
+        with pytest.raises(ValueError, match="unsupported snapshot version"):
+            load(path)
+
+    @pytest.mark.parametrize("argv", [["open"], ["open", "missing.vidb"]])
+    def test_open_needs_a_snapshot(self, argv, capsys):
+        with pytest.raises(SystemExit):
+            cli(argv)
+
+        assert capsys.readouterr().err.startswith("usage: vidb open")
+
+    async def test_snapshot_connection_answers_requests(self, snapshot):
+        client = DAPClient(connection=SnapshotConnection(snapshot))
+        await client.initialize()
+
+        threads, timer = await dump(client)
+        assert [frame["name"] for frame in threads[0]["frames"]] == ["handle", "worker"]
+
+        assert await variables(client, variables_reference=7) == {
+            "variables": [{"name": "request_id", "value": "'abc'", "variablesReference": 0}],
+        }
+        assert (await source(client, source={"path": "/app/worker.py"}))["content"].startswith("def worker")
+        assert (await source(client, source={"sourceReference": 5}))["content"] == "generated"
+
+    async def test_snapshot_connection_reports_missing_data(self, snapshot):
+        client = DAPClient(connection=SnapshotConnection(snapshot))
+
+        with pytest.raises(Exception, match="not captured in the snapshot"):
+            await variables(client, variables_reference=999)
+
+        with pytest.raises(Exception, match="not available in a snapshot"):
+            await client.remote_call(dict, "stepIn", {"threadId": 1})
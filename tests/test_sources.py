@@ -0,0 +1,134 @@
+import asyncio
+import time
+
+from prompt_toolkit.completion import CompleteEvent
+from prompt_toolkit.document import Document
+
+from tests.stubs import DAPServerMixin, response
+from vidb.sources import SourceIndex
+from vidb.ui import SourceIndexCompleter
+
+
+def loaded_source(reason, path):
+    return {"event": "loadedSource", "body": {"reason": reason, "source": {"path": path}}}
+
+
+def module_event(reason, module_id, name, path=None):
+    module = {"id": module_id, "name": name}
+    if path:
+        module["path"] = path
+    return {"event": "module", "body": {"reason": reason, "module": module}}
+
+
+def django_index(apps=200, files=100):
+    index = SourceIndex()
+    for app in range(apps):
+        for file in range(files):
+            index.handle_loaded_source_event(loaded_source("new", f"/srv/site/app_{app}/views/view_{file}.py"))
+    index.handle_loaded_source_event(
+        loaded_source("new", "/usr/lib/python3/site-packages/django/contrib/admin/views/main.py"),
+    )
+    return index
+
+
+class TestSearch:
+    def test_words_in_any_order(self):
+        index = django_index(apps=2, files=2)
+
+        labels = [entry.label for entry in index.search("views admin")]
+
+        assert labels == ["/usr/lib/python3/site-packages/django/contrib/admin/views/main.py"]
+
+    def test_file_name_matches_first(self):
+        index = SourceIndex()
+        for path in ["/a/main/other.py", "/b/long/path/to/main.py", "/c/main.py"]:
+            index.handle_loaded_source_event(loaded_source("new", path))
+
+        assert [entry.label for entry in index.search("main")] == [
+            "/c/main.py",
+            "/b/long/path/to/main.py",
+            "/a/main/other.py",
+        ]
+
+    def test_typos_fall_back_to_similar(self):
+        index = django_index(apps=2, files=2)
+
+        assert index.search("contrib/admn/views")[0].label.endswith("django/contrib/admin/views/main.py")
+
+    def test_fast_on_large_index(self):
+        index = django_index()
+        assert len(index) == 20_001
+
+        started = time.perf_counter()
+        for _ in range(100):
+            results = index.search("app_17/ view_42")
+        elapsed = (time.perf_counter() - started) / 100
+
+        assert [entry.label for entry in results] == ["/srv/site/app_17/views/view_42.py"]
+        assert elapsed < 0.005
+
+
+class TestEvents:
+    def test_removed_sources_are_not_found(self):
+        index = SourceIndex()
+        index.handle_loaded_source_event(loaded_source("new", "/a/views.py"))
+        index.handle_loaded_source_event(loaded_source("removed", "/a/views.py"))
+
+        assert index.search("views") == []
+        assert index._postings == {}
+
+    def test_modules(self):
+        index = SourceIndex()
+        index.handle_module_event(module_event("new", 1, "json", "/lib/json/__init__.py"))
+        index.handle_module_event(module_event("new", 2, "_speedups"))
+        index.handle_module_event(module_event("changed", 1, "json", "/venv/json/__init__.py"))
+
+        assert [entry.label for entry in index.search("json")] == ["/venv/json/__init__.py"]
+        assert index.search("speedups")[0].source == {"name": "_speedups"}
+
+        index.handle_module_event(module_event("removed", 1, "json"))
+        assert index.search("json") == []
+
+
+class TestLoad(DAPServerMixin):
+    async def test_loaded_once(self, client):
+        client.capabilities = {"supportsLoadedSourcesRequest": True, "supportsModulesRequest": True}
+        index = SourceIndex()
+
+        async def server():
+            async with self.assert_request_response(
+                "loadedSources",
+                response=response("loadedSources", {"sources": [{"path": "/a/views.py"}]}),
+            ):
+                pass
+            async with self.assert_request_response(
+                "modules",
+                response=response("modules", {"modules": [{"id": 1, "name": "a", "path": "/a/__init__.py"}]}),
+            ) as request:
+                assert request["arguments"] == {"startModule": 0, "moduleCount": 0}
+
+        await asyncio.gather(server(), index.load(client))
+        await index.load(client)
+
+        assert sorted(entry.label for entry in index.entries.values()) == ["/a/__init__.py", "/a/views.py"]
+
+    async def test_failed_load_is_reported_and_tried_again(self, client):
+        client.capabilities = {"supportsLoadedSourcesRequest": True}
+        index = SourceIndex()
+
+        async def server(body, success=True):
+            async with self.assert_request_response(
+                "loadedSources",
+                response=dict(response("loadedSources", body), success=success, message="not yet"),
+            ):
+                pass
+
+        await asyncio.gather(server({}, success=False), index.load(client))
+        assert not index.loaded
+        assert index.error.startswith("can't list the loaded sources: not yet")
+        completions = list(SourceIndexCompleter(index).get_completions(Document("views"), CompleteEvent()))
+        assert [completion.display_text for completion in completions] == [index.error]
+
+        await asyncio.gather(server({"sources": [{"path": "/a/views.py"}]}), index.load(client))
+        assert index.loaded and index.error is None
+        assert [entry.label for entry in index.search("views")] == ["/a/views.py"]
@@ -0,0 +1,38 @@
+from tests.stubs import IDLE, BUSY, make_frame, make_session
+from vidb.stacks import frame_signature, group_stacks
+from vidb.ui import ThreadsWidget
+
+
+class TestGroupStacks:
+    def test_frame_signature_ignores_frame_id(self):
+        assert frame_signature(make_frame(1, "wait", 320)) == frame_signature(make_frame(2, "wait", 320))
+        assert frame_signature(make_frame(1, "wait", 320)) != frame_signature(make_frame(1, "wait", 321))
+
+    def test_identical_stacks_are_grouped_largest_first(self):
+        session = make_session({1: BUSY, 2: IDLE, 3: IDLE, 4: IDLE})
+
+        groups = group_stacks(session)
+
+        assert [(group.count, group.thread_ids) for group in groups] == [(3, [2, 3, 4]), (1, [1])]
+        assert groups[0].frames == session.frames_of(2)
+
+    def test_threads_without_loaded_stack_are_skipped(self):
+        session = make_session({1: IDLE})
+        session.set_threads([{"id": 1, "name": "Worker 1"}, {"id": 2, "name": "Worker 2"}])
+
+        assert [group.thread_ids for group in group_stacks(session)] == [[1]]
+
+
+class TestThreadsWidgetGrouping:
+    async def test_render_grouped(self):
+        widget = ThreadsWidget(make_session({1: BUSY, 2: IDLE, 3: IDLE}))
+
+        await widget.set_grouped(True)
+
+        assert widget.values == [
+            (2, "2 threads: wait worker.py:320"),
+            (1, "1 - Worker 1: handle worker.py:40"),
+        ]
+
+        await widget.set_grouped(False)
+        assert [value for value, _ in widget.values] == [1, 2, 3]
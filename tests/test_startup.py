@@ -0,0 +1,47 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# generous upper bound for `import vidb.ui`, it's meant to catch a heavy
+# module being pulled in at import time, not to measure small differences
+UI_IMPORT_BUDGET_US = 1_500_000
+
+
+def import_times(module: str) -> dict[str, int]:
+    """ cumulative import time (us) of each module loaded by `import module`, from `python -X importtime` """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+class TestStartup:
+    @pytest.mark.parametrize("module", ["vidb.client", "vidb.connection", "vidb.session"])
+    def test_headless_modules_do_not_import_ui(self, module):
+        times = import_times(module)
+        assert module in times
+        assert "prompt_toolkit" not in times
+
+    def test_ui_defers_heavy_imports(self):
+        times = import_times("vidb.ui")
+        assert "ptterm" not in times
+        assert "pygments.lexers.python" not in times
+
+    def test_ui_import_time(self):
+        times = import_times("vidb.ui")
+        assert times["vidb.ui"] < UI_IMPORT_BUDGET_US
@@ -0,0 +1,127 @@
+import asyncio
+
+from tests.stubs import RecordingAdapter, settled, start, stop, wait_until
+from vidb.client import DAPClient
+from vidb.fake_adapter import serve_in_process
+from vidb.session import Session
+
+
+class NoStopAdapter(RecordingAdapter):
+    """ steps run on without stopping, or end the session when `ends` is given """
+
+    def __init__(self, *, ends=None, **kwargs):
+        super().__init__(**kwargs)
+        self.ends = ends
+
+    def stop(self, thread_id=1, *, reason="breakpoint"):
+        if reason != "step":
+            super().stop(thread_id, reason=reason)
+        elif self.ends is not None:
+            self.send_event(self.ends, {"exitCode": 0} if self.ends == "exited" else None)
+
+
+class TestStepper:
+    async def test_burst_of_steps_is_coalesced(self):
+        adapter = RecordingAdapter(threads=2, depth=5, variables=4)
+        client, task, app = await start(adapter)
+        app.stepper.settle_delay = 60
+        thread_id = app.threads_widget.current_value
+
+        # a held down key, faster than the adapter can step
+        accepted = [app.stepper.step("next") for _ in range(5)]
+        await app.stepper._step_task
+
+        assert accepted == [True, True, False, False, False]
+        assert [command for command, _ in adapter.commands("next")] == ["next", "next"]
+        # only the top frame and its locals are refreshed
+        await wait_until(lambda: app.variables_widget.frame_id == app.session.frames_of(thread_id)[0]["id"])
+        assert adapter.commands("stackTrace") == [("stackTrace", {"threadId": thread_id, "levels": 1})]
+        assert adapter.commands("threads") == []
+        top = app.session.frames_of(thread_id)[0]
+        assert top["line"] == 4
+        await wait_until(lambda: top["id"] in app.session.frame_scopes)
+        scope_refs = app.session.frame_scopes[top["id"]]
+        await wait_until(lambda: scope_refs[0] in app.session.children)
+        assert scope_refs[1] not in app.session.children
+
+        # the rest follows once stepping has settled
+        app.stepper.schedule_full_refresh(0)
+        await wait_until(lambda: settled(app.stepper))
+        await wait_until(lambda: scope_refs[1] in app.session.children)
+        assert len(app.session.frames_of(thread_id)) == 5
+
+        await stop(client, task)
+
+    async def test_continue_drops_queued_steps(self):
+        adapter = RecordingAdapter(threads=1, depth=3, variables=2)
+        client, task, app = await start(adapter)
+
+        app.stepper.step("next")
+        app.stepper.step("stepIn")
+        app.stepper.step("continue")
+        await app.stepper._step_task
+
+        assert [command for command, _ in adapter.commands("next", "stepIn", "continue")] == ["next", "continue"]
+        assert not app.stepper.stepping
+
+        await stop(client, task)
+
+    async def test_step_that_never_stops_times_out(self):
+        adapter = NoStopAdapter(threads=1, depth=3, variables=2)
+        client, task, app = await start(adapter)
+        app.stepper.stop_timeout = 0.05
+
+        app.stepper.step("next")
+        app.stepper.step("next")
+        await app.stepper._step_task
+        assert not app.stepper.stepping
+
+        # the queued step was dropped, the next one is sent
+        assert app.stepper.step("next")
+        await app.stepper._step_task
+        assert len(adapter.commands("next")) == 2
+
+        await stop(client, task)
+
+    async def test_debuggee_exiting_ends_the_step(self):
+        for ends in ("terminated", "exited"):
+            adapter = NoStopAdapter(ends=ends, threads=1, depth=3, variables=2)
+            client, task, app = await start(adapter)
+
+            app.stepper.step("next")
+            await asyncio.wait_for(app.stepper._step_task, 1)
+            assert not app.stepper.stepping
+
+            await stop(client, task)
+
+    async def test_other_stops_refresh_everything(self):
+        adapter = RecordingAdapter(threads=3, depth=4, variables=2)
+        client, task, app = await start(adapter)
+
+        adapter.stop(2)
+        await wait_until(lambda: app.threads_widget.current_value == 2)
+        await wait_until(lambda: len(app.session.frames_of(2)) == 4)
+
+        # the thread list is kept from thread events
+        assert adapter.commands("threads") == []
+        assert ("stackTrace", {"threadId": 2}) in adapter.requests
+
+        await stop(client, task)
+
+
+class TestPartialStack:
+    async def test_whole_stack_is_loaded_after_the_top(self):
+        adapter = RecordingAdapter(threads=1, depth=6, variables=2)
+        connection, task = await serve_in_process(adapter)
+        client = DAPClient(connection=connection)
+        await client.initialize()
+        session = Session()
+
+        assert len(await session.load_stack_trace(client, 1, levels=1)) == 1
+        # the top is already there
+        assert len(await session.load_stack_trace(client, 1, levels=1)) == 1
+        assert len(await session.load_stack_trace(client, 1)) == 6
+        assert len(await session.load_stack_trace(client, 1, levels=1)) == 6
+        assert len(adapter.commands("stackTrace")) == 2
+
+        await stop(client, task)
@@ -0,0 +1,120 @@
+import asyncio
+
+from tests.stubs import RecordingAdapter, start, wait_until
+from vidb.client import disconnect
+from vidb.session import Session
+from vidb.sweep import SweepResult, evaluate_everywhere, filter_results, sort_results
+
+
+class ThreadsClient:
+    """ threads 1 to n, each two frames deep, where `request_id` is the thread id times 10 """
+
+    def __init__(self, threads=5, *, stuck=(), running=(), delay=0.01):
+        self.thread_count = threads
+        self.stuck = set(stuck)
+        self.running = set(running)
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def remote_call(self, request_cls, command, arguments):
+        async def _respond():
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                await asyncio.sleep(self.delay)
+                if command == "threads":
+                    return {"threads": [{"id": i, "name": f"worker-{i}"} for i in range(1, self.thread_count + 1)]}
+                if command == "stackTrace":
+                    thread_id = arguments["threadId"]
+                    if thread_id in self.running:
+                        return {"stackFrames": []}
+                    levels = arguments.get("levels") or 2
+                    return {"stackFrames": [
+                        {"id": thread_id * 10 + level, "name": f"level_{level}", "line": 1, "column": 1}
+                        for level in range(levels)
+                    ]}
+                assert command == "evaluate"
+                thread_id, level = divmod(arguments["frameId"], 10)
+                if thread_id in self.stuck:
+                    await asyncio.sleep(10)
+                if level:
+                    raise Exception("name 'request_id' is not defined")
+                return {"result": str(thread_id * 10), "type": "int"}
+            finally:
+                self.in_flight -= 1
+
+        return _respond()
+
+
+async def test_top_frames_with_bounded_concurrency():
+    client = ThreadsClient(threads=20)
+    seen = []
+
+    results = await evaluate_everywhere(
+        client, Session(), "request_id", concurrency=4, on_result=seen.append,
+    )
+
+    assert client.max_in_flight <= 4
+    assert seen == results
+    assert sorted(result.value for result in results) == sorted(str(i * 10) for i in range(1, 21))
+    assert all(result.level == 0 for result in results)
+
+
+async def test_stuck_threads_time_out_alone():
+    client = ThreadsClient(threads=3, stuck={2})
+
+    results = await evaluate_everywhere(client, Session(), "request_id", all_frames=True, timeout=0.2)
+
+    by_frame = {(result.thread_id, result.level): result for result in results}
+    assert len(by_frame) == 6
+    assert by_frame[1, 0].value == "10"
+    assert by_frame[2, 0].error == "timed out after 0.2s"
+    assert "not defined" in by_frame[3, 1].error
+
+
+async def test_threads_without_frames_are_reported():
+    client = ThreadsClient(threads=3, running={2})
+
+    results = await evaluate_everywhere(client, Session(), "request_id")
+
+    assert sorted((result.thread_id, result.value, result.error) for result in results) == [
+        (1, "10", None),
+        (2, None, "no frames"),
+        (3, "30", None),
+    ]
+
+
+def test_sort_and_filter():
+    results = [
+        SweepResult(1, "main", 10, "serve", value="30"),
+        SweepResult(2, "worker-2", 20, "wait", value="4"),
+        SweepResult(3, "worker-3", 30, "wait", error="not defined"),
+        SweepResult(4, "worker-4", 40, "serve", value="'abc'"),
+    ]
+
+    by_value = sort_results(results, "value")
+    assert [result.thread_id for result in by_value] == [2, 1, 4, 3]
+    assert [result.thread_id for result in sort_results(results, "frame")] == [1, 4, 2, 3]
+    assert [result.thread_id for result in sort_results(results, "thread", reverse=True)] == [4, 3, 2, 1]
+    assert [result.thread_id for result in filter_results(results, "WORKER")] == [2, 3, 4]
+    assert [result.thread_id for result in filter_results(results, "defined")] == [3]
+
+
+async def test_selecting_a_result_selects_its_thread_and_frame():
+    adapter = RecordingAdapter(threads=5, depth=6)
+    client, task, app = await start(adapter)
+
+    viewer = app.sweep_viewer
+    viewer.all_frames = True
+    viewer.run(client, "x")
+    await viewer.task
+    assert len(viewer.results) == 5 * 6
+
+    result = next(result for result in viewer.results if result.thread_id == 3 and result.level == 2)
+    app.select_frame(result)
+    await wait_until(lambda: app.stacktrace_widget.current_value == result.frame_id)
+    assert app.stacktrace_widget.thread_id == 3
+
+    await disconnect(client)
+    await task
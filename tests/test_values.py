@@ -0,0 +1,159 @@
+import asyncio
+from pathlib import Path
+
+from prompt_toolkit.application.current import set_app
+from prompt_toolkit.formatted_text import to_formatted_text
+from prompt_toolkit.input.defaults import create_pipe_input
+from prompt_toolkit.output import DummyOutput
+
+from tests.stubs import DAPServerMixin, response
+from vidb.session import Session
+from vidb.ui import UI, PromptLine, VariablesWidget, save_and_report
+from vidb.values import iter_full_value, preview, save_value
+
+
+BIG = "'" + "x" * 300_000 + "'"
+
+
+def variable(name, value, variables_reference=0, **kwargs):
+    return dict(name=name, value=value, type="str", variablesReference=variables_reference, evaluateName=name, **kwargs)
+
+
+async def collect(chunks):
+    return [chunk async for chunk in chunks]
+
+
+class TestPreview:
+    def test_short_values_are_whole(self):
+        value = "'short'"
+        assert preview(value) is value
+
+    def test_long_values_are_cut(self):
+        assert preview("x" * 500, length=10) == "xxxxxxxxxx… (500 chars)"
+
+    def test_only_the_first_line(self):
+        assert preview("first\nsecond") == "first… (12 chars)"
+
+    async def test_variables_widget_rows_are_bounded(self):
+        session = Session()
+        session.set_stack_trace(1, [{"id": 1, "name": "f"}])
+        session.set_scopes(1, [{"name": "Locals", "variablesReference": 10}])
+        session.set_variables(10, [variable("big", BIG)])
+        widget = VariablesWidget(session)
+        widget.frame_id = 1
+        widget.render()
+
+        text = "".join(fragment for _, fragment in to_formatted_text(widget.values[1][1]))
+        assert len(text) < 300
+        assert widget.selected_variable() is None
+        widget._selected_index = 1
+        assert widget.selected_variable()["value"] is BIG
+
+
+class TestFullValue(DAPServerMixin):
+    async def test_evaluated_in_clipboard_context(self, client):
+        client.capabilities = {"supportsClipboardContext": True}
+
+        async def server():
+            async with self.assert_request_response(
+                "evaluate",
+                response=response("evaluate", {"result": BIG, "variablesReference": 0}),
+            ) as request:
+                assert request["arguments"] == {"expression": "big", "context": "clipboard", "frameId": 7}
+
+        _, chunks = await asyncio.gather(
+            server(),
+            collect(iter_full_value(client, variable("big", "'xxx…"), frame_id=7, chunk_size=100_000)),
+        )
+
+        assert [len(chunk) for chunk in chunks] == [100_000, 100_000, 100_000, 2]
+        assert "".join(chunks) == BIG
+
+    async def test_containers_are_paged(self, client):
+        items = variable("items", "[...]", 5, indexedVariables=5)
+
+        async def server():
+            for start, count in [(0, 2), (2, 2), (4, 1)]:
+                async with self.assert_request_response(
+                    "variables",
+                    response=response("variables", {
+                        "variables": [variable(str(i), str(i)) for i in range(start, start + count)],
+                    }),
+                ) as request:
+                    assert request["arguments"] == {
+                        "variablesReference": 5,
+                        "filter": "indexed",
+                        "start": start,
+                        "count": count,
+                    }
+
+        _, chunks = await asyncio.gather(server(), collect(iter_full_value(client, items, page_size=2)))
+
+        assert "".join(chunks) == "0 = 0\n1 = 1\n2 = 2\n3 = 3\n4 = 4\n"
+
+    async def test_save_value(self, client, tmp_path):
+        path = tmp_path / "big.txt"
+
+        async def server():
+            async with self.assert_request_response(
+                "evaluate",
+                response=response("evaluate", {"result": BIG, "variablesReference": 0}),
+            ) as request:
+                assert request["arguments"]["context"] == "repl"
+
+        _, written = await asyncio.gather(server(), save_value(client, variable("big", "'xxx…"), path))
+
+        assert written == len(BIG)
+        assert path.read_text() == BIG
+
+
+async def lines(count):
+    for i in range(count):
+        yield f"line {i}\n"
+
+
+class TestValueViewer:
+    async def test_start_of_a_long_value_stays(self, tmp_path):
+        app = UI(input=create_pipe_input(), output=DummyOutput())
+        viewer = app.value_viewer
+        viewer.max_lines = 10
+        saved = []
+
+        async def save(path):
+            saved.append(path)
+            return 1234
+
+        with set_app(app._ptk):
+            viewer.open(app._ptk, "big", lines(1000), save=save)
+            await viewer.task
+
+        assert viewer.output.lines[0] == "line 0"
+        assert len(viewer.output.lines) < 20
+        assert saved and saved[0].endswith(".txt")
+        assert viewer.output.lines[-1] == f"saved 1,234 characters to {saved[0]}"
+        assert app.prompt_line.message == viewer.output.lines[-1]
+        Path(saved[0]).unlink()
+
+    async def test_short_value_is_shown_whole(self):
+        app = UI(input=create_pipe_input(), output=DummyOutput())
+        viewer = app.value_viewer
+        viewer.max_lines = 10
+
+        with set_app(app._ptk):
+            viewer.open(app._ptk, "small", lines(3))
+            await viewer.task
+
+        assert viewer.output.lines == ["line 0", "line 1", "line 2", ""]
+        assert app.prompt_line.message == ""
+
+
+async def test_failed_save_is_reported(tmp_path):
+    prompt_line = PromptLine()
+
+    async def save(path):
+        raise OSError("disk full")
+
+    message = await save_and_report(save, tmp_path / "value.txt", prompt_line)
+
+    assert message == f"couldn't save the value to {tmp_path / 'value.txt'}: disk full"
+    assert prompt_line.message == message
@@ -0,0 +1,85 @@
+import asyncio
+
+from vidb.session import Session
+from vidb.watches import Watches
+
+
+class SlowClient:
+    """ answers evaluate requests after the delay given for the expression """
+
+    def __init__(self, delays=None):
+        self.delays = delays or {}
+        self.evaluated = []
+
+    def remote_call(self, request_cls, command, arguments):
+        assert command == "evaluate"
+        assert arguments["context"] == "watch"
+        self.evaluated.append((arguments["frameId"], arguments["expression"]))
+
+        async def _respond():
+            await asyncio.sleep(self.delays.get(arguments["expression"], 0))
+            if arguments["expression"] == "undefined":
+                raise Exception("name 'undefined' is not defined")
+            return {"result": f"{arguments['expression']}@{arguments['frameId']}", "type": "int"}
+
+        return _respond()
+
+
+async def test_evaluated_concurrently():
+    client = SlowClient({"a": 0.2, "b": 0.2, "c": 0.2})
+    watches = Watches(Session(), ["a", "b", "c"])
+
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await watches.evaluate_all(client, 1)
+
+    assert loop.time() - started < 0.5
+    assert [watches.result(1, e).value for e in "abc"] == ["a@1", "b@1", "c@1"]
+
+
+async def test_slow_expression_times_out_alone():
+    client = SlowClient({"slow": 10})
+    watches = Watches(Session(), ["fast", "slow", "undefined"], timeout=0.1)
+    seen = []
+    watches.subscribe(lambda: seen.append(dict(watches.results)))
+
+    await watches.evaluate_all(client, 1)
+
+    assert watches.result(1, "fast").value == "fast@1"
+    assert watches.result(1, "slow").error == "timed out after 0.1s"
+    assert "not defined" in watches.result(1, "undefined").error
+    # the fast one didn't wait for the slow one to be shown
+    assert (1, "fast") in seen[0] and (1, "slow") not in seen[0]
+
+
+async def test_cached_until_the_next_stop():
+    session = Session()
+    client = SlowClient()
+    watches = Watches(session, ["x"])
+
+    await watches.evaluate_all(client, 1)
+    await watches.evaluate_all(client, 2)
+    await watches.evaluate_all(client, 1)
+    assert client.evaluated == [(1, "x"), (2, "x")]
+
+    watches.add("y")
+    await watches.evaluate_all(client, 1)
+    assert client.evaluated[2:] == [(1, "y")]
+
+    session.clear()
+    assert watches.result(1, "x") is None
+    await watches.evaluate_all(client, 1)
+    assert client.evaluated[3:] == [(1, "x"), (1, "y")]
+
+
+async def test_results_of_a_previous_stop_are_dropped():
+    session = Session()
+    client = SlowClient({"x": 0.1})
+    watches = Watches(session, ["x"])
+
+    evaluating = asyncio.ensure_future(watches.evaluate_all(client, 1))
+    await asyncio.sleep(0.01)
+    session.clear()
+    await evaluating
+
+    assert watches.result(1, "x") is None
@@ -1,37 +1,297 @@
+import argparse
 import asyncio
 import sys
+from pathlib import Path
 
-from prompt_toolkit.eventloop import use_asyncio_event_loop
 
-from vidb.client import DAPClient
-from vidb.connection import DAPConnection
-from vidb.ui import UI
+async def main(argv):
+    from vidb.breakpoints import BreakpointStore, default_path
+    from vidb.connection import DAPConnection
+    from vidb.pathmap import PathMapper, parse_mapping
 
+    parser = argparse.ArgumentParser(prog="vidb")
+    parser.add_argument("port", type=int, nargs="?", help="port the debug adapter listens on, unless --launch")
+    parser.add_argument(
+        "--launch",
+        nargs="?",
+        const="",
+        metavar="NAME",
+        help="start the debug adapter and launch the debuggee with the launch configuration NAME, default the first",
+    )
+    parser.add_argument(
+        "--launch-config",
+        metavar="FILE",
+        default=".vscode/launch.json",
+        help="launch.json with the launch configurations, default .vscode/launch.json",
+    )
+    parser.add_argument("--adapter", metavar="COMMAND", help="command that starts the debug adapter for --launch")
+    parser.add_argument(
+        "--path-mapping",
+        action="append",
+        default=[],
+        metavar="LOCAL=REMOTE",
+        help="where files under REMOTE in the debuggee are found locally, can be repeated",
+    )
+    parser.add_argument(
+        "--path-mappings",
+        metavar="FILE",
+        help='JSON list of {"localRoot": ..., "remoteRoot": ...} mappings',
+    )
+    parser.add_argument(
+        "--breakpoints",
+        metavar="FILE",
+        help="where the breakpoints are saved, default $XDG_DATA_HOME/vidb/breakpoints.json",
+    )
+    parser.add_argument(
+        "--watch",
+        action="append",
+        default=[],
+        metavar="EXPR",
+        help="watch EXPR, evaluated at every stop, can be repeated",
+    )
+    parser.add_argument("--record", metavar="LOG", help="record the DAP session to LOG, and those of subprocesses next to it")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="monitor slow callbacks and loop lag, and write a report on exit",
+    )
+    parser.add_argument(
+        "--profiler",
+        choices=["cprofile", "yappi", "none"],
+        default="cprofile",
+        help="profiler to run with --profile, default cprofile",
+    )
+    parser.add_argument("--profile-output", metavar="FILE", help="write the --profile report to FILE instead of stderr")
+    args = parser.parse_args(argv)
 
-async def main():
-    app = UI()
+    mappings = PathMapper.from_file(args.path_mappings).mappings if args.path_mappings else []
+    try:
+        mappings.extend(parse_mapping(mapping) for mapping in args.path_mapping)
+    except ValueError as e:
+        parser.error(str(e))
+    path_mapper = PathMapper(mappings)
 
-    portnum = sys.argv[1]
-    connection = await DAPConnection.from_tcp("localhost", portnum)
-    client = DAPClient(connection=connection)
-    initial_load_task = asyncio.create_task(initial_load(client, app))
+    if (args.port is None) == (args.launch is None):
+        parser.error("give either the port of the debug adapter or --launch")
+    request, configuration = "attach", None
+    adapters = []
+    timer = None
+    if args.launch is not None:
+        from vidb.launch import AdapterProcess, LaunchError, LaunchTimer, adapter_command, launch_configuration, load_profile
+
+        try:
+            profile = load_profile(args.launch_config, args.launch or None)
+            command = adapter_command(profile, args.adapter)
+        except LaunchError as e:
+            parser.error(str(e))
+        request, configuration = "launch", launch_configuration(profile)
+        timer = LaunchTimer()
+
+    async def start_adapter(dispatcher):
+        # unless a child session is given an address to connect to, it gets an adapter of its own
+        adapter = AdapterProcess(command)
+        adapters.append(adapter)
+        connection = await adapter.start(dispatcher)
+        if len(adapters) == 1:
+            timer.mark("adapter started")
+            timer.watch(connection)
+        return connection
+
+    recorders = []
+    monitor = None
+
+    def open_connection(configuration=None):
+        """ configuration is that of a child session, None for the main one """
+        from vidb.sessions import connect_address
+
+        # a dispatcher per connection, the sequence numbers of each session start at 1
+        dispatcher = None
+        if args.record:
+            from vidb.recording import RecordingDispatcher, SessionRecorder, session_log_path
+
+            recorders.append(SessionRecorder(session_log_path(args.record, len(recorders) + 1)))
+            dispatcher = RecordingDispatcher(recorders[-1])
+        address = connect_address(configuration)
+        if address is not None:
+            # e.g. debugpy's subprocesses, only the adapter that's already running knows them
+            return DAPConnection.from_tcp(*address, dispatcher=dispatcher)
+        if args.launch is not None:
+            return start_adapter(dispatcher)
+        return DAPConnection.from_tcp("localhost", args.port, dispatcher=dispatcher)
+
+    if args.profile:
+        from vidb.monitor import LoopMonitor
+
+        if args.profiler == "yappi":
+            try:
+                import yappi  # noqa: F401
+            except ImportError:
+                parser.error("--profiler yappi needs yappi to be installed")
+        monitor = LoopMonitor(profiler=args.profiler)
+        monitor.start()
+
+    try:
+        await run_ui(
+            open_connection,
+            path_mapper=path_mapper,
+            breakpoints=BreakpointStore(args.breakpoints or default_path()),
+            watches=args.watch,
+            request=request,
+            configuration=configuration,
+        )
+    finally:
+        await asyncio.gather(*[adapter.stop() for adapter in adapters])
+        if timer is not None:
+            print(timer.report(), file=sys.stderr)
+        for recorder in recorders:
+            recorder.close()
+        if monitor is not None:
+            monitor.stop()
+            if args.profile_output:
+                Path(args.profile_output).write_text(monitor.report())
+            else:
+                print(monitor.report(), file=sys.stderr)
+
+
+async def run_ui(open_connection, *, path_mapper=None, breakpoints=None, watches=(), request="attach", configuration=None):
+    from prompt_toolkit.eventloop import use_asyncio_event_loop
+
+    from vidb.ui import UI
+
+    app = UI(breakpoints=breakpoints, watches=watches)
+
+    # connect in the background so the first paint doesn't wait for the debuggee
+    connect_task = asyncio.create_task(connect(
+        app,
+        open_connection,
+        path_mapper=path_mapper,
+        request=request,
+        configuration=configuration,
+    ))
 
     use_asyncio_event_loop()
     await app.run()
-    for msg in client.connection.dispatcher._messages:
-        print(msg)
+    if not connect_task.done():
+        connect_task.cancel()
+
+
+async def connect(app, open_connection, *, path_mapper=None, request="attach", configuration=None):
+    from vidb.client import DAPClient
+    from vidb.sessions import SessionManager
+
+    try:
+        connection = await open_connection()
+        client = DAPClient(connection=connection, path_mapper=path_mapper)
+        # subprocesses get their own connection to the same debug adapter
+        manager = SessionManager(open_connection, session=app.session, breakpoints=app.breakpoints)
+        manager.add(client, "main")
+        await app.sessions_widget.attach(manager)
+        await initial_load(manager.client, app, request=request, configuration=configuration)
+    except Exception as e:
+        app.exit(exception=e)
+        raise
+    return client
+
 
+async def initial_load(client, app, *, request="attach", configuration=None):
+    from vidb.ui import create_background_task
 
-async def initial_load(client, app):
-    await client.initialize()
+    app.breakpoints.watch_events(client)
+    app.sources.watch_events(client)
+    await client.initialize(
+        configure=lambda: app.breakpoints.sync(client),
+        request=request,
+        configuration=configuration,
+    )
+    app.session.watch_events(client)
+    create_background_task(app.sources.load(client))
 
-    await app.threads_widget.attach(client)
+    await app.threads_widget.attach(client, pause=request == "attach")
 
     await app.variables_widget.attach(client, app.stacktrace_widget)
+    await app.watch_widget.attach(client, app.stacktrace_widget)
     await app.stacktrace_widget.attach(client, app.threads_widget)
     await app.source_widget.attach(client, app.stacktrace_widget)
+    await app.repl_widget.attach(client, app.stacktrace_widget)
+    await app.disassembly_viewer.attach(client, app.stacktrace_widget)
+    await app.breakpoint_widget.attach(client)
+    await app.logpoint_widget.attach(client)
+    app.stepper.attach(client)
 
     app.threads_widget.current_value = app.threads_widget.current_value
 
 
-asyncio.run(main())
+def dump(argv):
+    from vidb.dump import main
+
+    main(argv)
+
+
+def profile(argv):
+    from vidb.sampler import main
+
+    main(argv)
+
+
+def capture(argv):
+    from vidb.snapshot import main
+
+    main(argv)
+
+
+def replay(argv):
+    from vidb.recording import main
+
+    main(argv)
+
+
+def fake_adapter(argv):
+    from vidb.fake_adapter import main
+
+    main(argv)
+
+
+def bench(argv):
+    from vidb.bench import main
+
+    main(argv)
+
+
+def open_snapshot(argv):
+    from vidb.snapshot import SnapshotConnection, load
+
+    parser = argparse.ArgumentParser(prog="vidb open", description="Browse a snapshot saved by vidb capture")
+    parser.add_argument("snapshot")
+    args = parser.parse_args(argv)
+
+    try:
+        snapshot = load(args.snapshot)
+    except (OSError, ValueError) as e:
+        parser.error(f"can't open {args.snapshot}: {e}")
+
+    async def open_connection(configuration=None):
+        return SnapshotConnection(snapshot)
+
+    asyncio.run(run_ui(open_connection))
+
+
+COMMANDS = {
+    "dump": dump,
+    "profile": profile,
+    "capture": capture,
+    "open": open_snapshot,
+    "replay": replay,
+    "fake-adapter": fake_adapter,
+    "bench": bench,
+}
+
+
+def cli(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        return COMMANDS[argv[0]](argv[1:])
+    asyncio.run(main(argv))
+
+
+if __name__ == "__main__":
+    cli()
@@ -0,0 +1,298 @@
+"""
+Benchmarks against the synthetic adapter.
+
+    python -m vidb bench [--threads N] [--depth D] [--variables K] [--string-size BYTES]
+                         [--events E] [--repeat R] [--json]
+                         [--baseline FILE] [--save-baseline FILE] [--tolerance FRACTION]
+
+Measures how vidb scales with the size of the debuggee:
+
+- throughput: output events per second read and dispatched by a DAPConnection
+- dispatch: microseconds the Dispatcher spends matching a request with its response
+- load_all_threads: time to fetch the stacks of every thread
+- stop_to_render: time from a stopped event until the TUI has drawn the
+  variables of the top frame, with the TUI running on a dummy terminal
+- memory: peak memory allocated while loading every thread with its locals
+
+Timings are the median of --repeat runs. With --baseline the results are
+compared to a previous --save-baseline run on the same machine, and the
+command fails if anything got worse by more than --tolerance. The baseline
+also provides the adapter configuration unless it's given explicitly.
+
+Timings don't carry over between machines, so baselines aren't committed:
+save one before a change and compare with it after, e.g.
+
+    python -m vidb bench --save-baseline benchmarks/baseline.json
+    python -m vidb bench --baseline benchmarks/baseline.json
+
+benchmarks/ is ignored by git.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+from vidb.client import DAPClient, disconnect
+from vidb.connection import Dispatcher
+from vidb.fake_adapter import FakeAdapter, adapter_kwargs, serve_in_process
+from vidb.session import Session
+from vidb.stacks import load_all_threads
+
+
+DEFAULTS = dict(threads=50, depth=30, variables=50, string_size=1000, events=10_000)
+
+
+class Result:
+    def __init__(self, value: float, unit: str, *, higher_is_better=False):
+        self.value = value
+        self.unit = unit
+        self.higher_is_better = higher_is_better
+
+    def to_dict(self):
+        return {"value": self.value, "unit": self.unit, "higher_is_better": self.higher_is_better}
+
+
+async def connect(adapter: FakeAdapter) -> tuple[DAPClient, asyncio.Task]:
+    connection, task = await serve_in_process(adapter)
+    client = DAPClient(connection=connection)
+    await client.initialize()
+    return client, task
+
+
+async def close(client: DAPClient, task: asyncio.Task):
+    await disconnect(client)
+    await task
+    client.connection.close()
+
+
+async def median_of(repeat, run) -> float:
+    return statistics.median([await run() for _ in range(repeat)])
+
+
+async def bench_throughput(config, repeat) -> Result:
+    events = config["events"]
+
+    async def run():
+        adapter = FakeAdapter(**config["adapter"])
+        client, task = await connect(adapter)
+        received = 0
+        done = asyncio.Event()
+
+        def on_output(event):
+            nonlocal received
+            received += 1
+            if received == events:
+                done.set()
+
+        client.add_event_listener("output", on_output)
+        started = time.perf_counter()
+        await adapter.flood(events)
+        await done.wait()
+        elapsed = time.perf_counter() - started
+        await close(client, task)
+        return events / elapsed
+
+    return Result(await median_of(repeat, run), "events/s", higher_is_better=True)
+
+
+async def bench_dispatch(config, repeat) -> Result:
+    rounds = config["events"]
+
+    async def run():
+        dispatcher = Dispatcher()
+        started = time.perf_counter()
+        for seq in range(rounds):
+            dispatcher.handle_request({"seq": seq, "type": "request", "command": "threads"})
+            dispatcher.handle_response(
+                {"seq": seq, "type": "response", "request_seq": seq, "command": "threads", "success": True}
+            )
+        return (time.perf_counter() - started) / rounds * 1e6
+
+    return Result(await median_of(repeat, run), "us")
+
+
+async def bench_load_all_threads(config, repeat) -> Result:
+    async def run():
+        client, task = await connect(FakeAdapter(**config["adapter"]))
+        started = time.perf_counter()
+        session = Session()
+        thread_ids = [thread["id"] for thread in await session.load_threads(client)]
+        await load_all_threads(client, session, thread_ids)
+        elapsed = time.perf_counter() - started
+        await close(client, task)
+        return elapsed * 1000
+
+    return Result(await median_of(repeat, run), "ms")
+
+
+async def bench_memory(config, repeat) -> Result:
+    client, task = await connect(FakeAdapter(**config["adapter"]))
+    tracemalloc.start()
+    try:
+        session = Session()
+        thread_ids = [thread["id"] for thread in await session.load_threads(client)]
+        await load_all_threads(client, session, thread_ids, depth=1)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    await close(client, task)
+    return Result(peak / 1024 / 1024, "MiB")
+
+
+async def bench_stop_to_render(config, repeat) -> Result:
+    from prompt_toolkit.eventloop import get_event_loop, set_event_loop, use_asyncio_event_loop
+    from prompt_toolkit.input.defaults import create_pipe_input
+    from prompt_toolkit.output import DummyOutput
+
+    from vidb.__main__ import initial_load
+    from vidb.ui import UI
+
+    adapter = FakeAdapter(**config["adapter"])
+    app = UI(input=create_pipe_input(), output=DummyOutput())
+    rendered = asyncio.Event()
+    stale_values = None
+
+    def variables_shown():
+        frame_id = app.stacktrace_widget.current_value
+        scope_refs = app.session.frame_scopes.get(frame_id)
+        return (
+            scope_refs is not None
+            and all(ref in app.session.children for ref in scope_refs)
+            and app.variables_widget.frame_id == frame_id
+            and app.variables_widget.values is not stale_values
+        )
+
+    def after_render(_):
+        if variables_shown():
+            rendered.set()
+
+    app._ptk.after_render += after_render
+
+    async def run():
+        nonlocal stale_values
+        stale_values = app.variables_widget.values
+        rendered.clear()
+        started = time.perf_counter()
+        adapter.stop()
+        await rendered.wait()
+        return (time.perf_counter() - started) * 1000
+
+    async def measure():
+        connection, task = await serve_in_process(adapter)
+        client = DAPClient(connection=connection)
+        try:
+            await initial_load(client, app)
+            await rendered.wait()
+            return await median_of(repeat, run)
+        finally:
+            app.exit()
+            await close(client, task)
+
+    previous_loop = get_event_loop()
+    use_asyncio_event_loop()
+    try:
+        measure_task = asyncio.ensure_future(measure())
+        await app.run()
+        return Result(await measure_task, "ms")
+    finally:
+        # don't leave prompt_toolkit bound to this asyncio loop once it's closed
+        set_event_loop(previous_loop)
+
+
+BENCHMARKS = {
+    "throughput": bench_throughput,
+    "dispatch": bench_dispatch,
+    "load_all_threads": bench_load_all_threads,
+    "stop_to_render": bench_stop_to_render,
+    "memory": bench_memory,
+}
+
+
+async def run_benchmarks(config, *, repeat=5, names=None) -> dict[str, Result]:
+    results = {}
+    for name, benchmark in BENCHMARKS.items():
+        if names is None or name in names:
+            results[name] = await benchmark(config, repeat)
+    return results
+
+
+def compare(results: dict[str, Result], baseline: dict, *, tolerance=0.2):
+    """ returns (name, baseline value, value, relative change) of the results that got worse than tolerance """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline["results"]:
+            continue
+        before = baseline["results"][name]["value"]
+        change = (result.value - before) / before if before else 0.0
+        worse = -change if result.higher_is_better else change
+        if worse > tolerance:
+            regressions.append((name, before, result.value, change))
+    return regressions
+
+
+def format_results(results: dict[str, Result], baseline=None) -> str:
+    lines = []
+    for name, result in results.items():
+        line = f"{name:<20} {result.value:>12.2f} {result.unit}"
+        if baseline and name in baseline["results"]:
+            before = baseline["results"][name]["value"]
+            if before:
+                line += f"  ({(result.value - before) / before:+.1%} vs baseline {before:.2f})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vidb bench", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--threads", type=int, help=f"default {DEFAULTS['threads']}")
+    parser.add_argument("--depth", type=int, help=f"default {DEFAULTS['depth']}")
+    parser.add_argument("--variables", type=int, help=f"default {DEFAULTS['variables']}")
+    parser.add_argument("--string-size", type=int, metavar="BYTES", help=f"default {DEFAULTS['string_size']}")
+    parser.add_argument("--events", type=int, help=f"events for the throughput benchmark, default {DEFAULTS['events']}")
+    parser.add_argument("--repeat", type=int, default=5, help="runs of each timing, default 5")
+    parser.add_argument("--only", action="append", choices=list(BENCHMARKS), help="run only these benchmarks")
+    parser.add_argument("--json", action="store_true", help="output as JSON")
+    parser.add_argument("--baseline", help="compare with a baseline saved by --save-baseline")
+    parser.add_argument("--save-baseline", metavar="FILE", help="save the results as a baseline")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="fail when a result is worse than the baseline by more than this fraction, default 0.2",
+    )
+    args = parser.parse_args(argv)
+
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    settings = dict(DEFAULTS, **(baseline["config"] if baseline else {}))
+    for key in DEFAULTS:
+        if getattr(args, key) is not None:
+            settings[key] = getattr(args, key)
+    config = {"adapter": adapter_kwargs(argparse.Namespace(**settings)), "events": settings["events"]}
+
+    results = asyncio.run(run_benchmarks(config, repeat=args.repeat, names=args.only))
+
+    if args.json:
+        json.dump({"config": settings, "results": {k: r.to_dict() for k, r in results.items()}}, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_results(results, baseline))
+
+    if args.save_baseline:
+        Path(args.save_baseline).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.save_baseline).write_text(
+            json.dumps({"config": settings, "results": {k: r.to_dict() for k, r in results.items()}}, indent=2)
+            + "\n"
+        )
+
+    if baseline:
+        regressions = compare(results, baseline, tolerance=args.tolerance)
+        for name, before, after, change in regressions:
+            print(f"regression: {name} {before:.2f} -> {after:.2f} ({change:+.1%})", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
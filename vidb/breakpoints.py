@@ -0,0 +1,249 @@
+"""
+Breakpoints, kept across sessions.
+
+The BreakpointStore is the source of truth for the breakpoints the user has
+set, by local file and line. `sync` sends a setBreakpoints request only for
+the files whose breakpoints changed since they were last sent, all of them
+concurrently, so attaching with hundreds of saved breakpoints costs one
+flight of requests. Whether the adapter could verify a breakpoint comes back
+in the setBreakpoints response, and later `breakpoint` events update it in
+place without asking again.
+
+Breakpoints are saved as JSON, by default in
+$XDG_DATA_HOME/vidb/breakpoints.json.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+from pathlib import Path
+from typing import Callable
+
+from vidb.client import set_breakpoints
+from vidb.dap import Breakpoint, BreakpointEvent, SourceBreakpoint
+
+
+BREAKPOINTS_VERSION = 1
+
+# a breakpoint can't be sent without these options, it would stop the debuggee
+# every time it's hit instead of logging or only stopping when it should
+OPTION_CAPABILITIES = {
+    "condition": "supportsConditionalBreakpoints",
+    "hitCondition": "supportsHitConditionalBreakpoints",
+    "logMessage": "supportsLogPoints",
+}
+
+
+def default_path() -> Path:
+    data_home = os.environ.get("XDG_DATA_HOME") or Path.home() / ".local" / "share"
+    return Path(data_home) / "vidb" / "breakpoints.json"
+
+
+def unsupported_options(breakpoint: SourceBreakpoint, capabilities) -> list[str]:
+    return [
+        option
+        for option, capability in OPTION_CAPABILITIES.items()
+        if option in breakpoint and not capabilities.get(capability)
+    ]
+
+
+def fingerprint(breakpoints: list[SourceBreakpoint]) -> tuple:
+    return tuple(tuple(sorted(breakpoint.items())) for breakpoint in breakpoints)
+
+
+class BreakpointStore:
+    files: dict[str, dict[int, SourceBreakpoint]]
+    results: dict[str, dict[int, Breakpoint]]
+
+    def __init__(self, path=None):
+        self.path = path
+        self.listeners: set[Callable[[str], None]] = set()
+        # what the adapter was last sent for each file
+        self.sent: dict[str, tuple] = {}
+        self.files = {}
+        # the adapter's Breakpoint for each requested line, and the lines by breakpoint id
+        self.results = {}
+        self.ids: dict[int, tuple[str, int]] = {}
+        self._lock = asyncio.Lock()
+        if path is not None and Path(path).exists():
+            self.load()
+
+    def subscribe(self, listener):
+        self.listeners.add(listener)
+
+    def notify(self, path):
+        for listener in list(self.listeners):
+            listener(path)
+
+    #############
+    ## Editing ##
+    #############
+
+    def breakpoints_of(self, path: str) -> list[SourceBreakpoint]:
+        return [self.files[path][line] for line in sorted(self.files.get(path, {}))]
+
+    def add(self, path: str, line: int, **options):
+        self.files.setdefault(path, {})[line] = SourceBreakpoint(line=line, **options)
+        self._changed(path)
+
+    def remove(self, path: str, line: int):
+        lines = self.files.get(path, {})
+        lines.pop(line, None)
+        if not lines:
+            self.files.pop(path, None)
+        self._changed(path)
+
+    def update(self, path: str, line: int, **options):
+        """ set (or with an empty value, unset) options of a breakpoint, adding it if needed """
+        breakpoint = dict(self.files.get(path, {}).get(line, SourceBreakpoint(line=line)))
+        for option, value in options.items():
+            if value:
+                breakpoint[option] = value
+            else:
+                breakpoint.pop(option, None)
+        self.files.setdefault(path, {})[line] = breakpoint
+        self._changed(path)
+
+    def logpoints(self) -> dict[tuple[str, int], SourceBreakpoint]:
+        return {
+            (path, line): breakpoint
+            for path, lines in self.files.items()
+            for line, breakpoint in lines.items()
+            if breakpoint.get("logMessage")
+        }
+
+    def toggle(self, path: str, line: int):
+        if line in self.files.get(path, {}):
+            self.remove(path, line)
+        else:
+            self.add(path, line)
+
+    def _changed(self, path):
+        if self.path is not None:
+            self.save()
+        self.notify(path)
+
+    def verification(self, path: str, line: int) -> Breakpoint | None:
+        """ the adapter's view of the breakpoint, None if it hasn't been sent yet """
+        return self.results.get(path, {}).get(line)
+
+    #############
+    ## Syncing ##
+    #############
+
+    def changed_files(self) -> list[str]:
+        return [
+            path
+            for path in sorted(self.files.keys() | self.sent.keys())
+            if fingerprint(self.breakpoints_of(path)) != self.sent.get(path, ())
+        ]
+
+    def reset(self):
+        """ forget what was sent, e.g. for a new connection, so that the next sync sends everything """
+        self.sent = {}
+        self.results = {}
+        self.ids = {}
+
+    async def sync(self, client):
+        """ send the breakpoints of the files that changed since the last sync, concurrently """
+        async with self._lock:
+            paths = self.changed_files()
+            await asyncio.gather(*[self._sync_file(client, path) for path in paths])
+
+    async def _sync_file(self, client, path):
+        breakpoints = self.breakpoints_of(path)
+        supported, skipped = [], {}
+        for breakpoint in breakpoints:
+            options = unsupported_options(breakpoint, client.capabilities)
+            if options:
+                skipped[breakpoint["line"]] = {
+                    "verified": False,
+                    "message": f"{', '.join(options)} not supported by the debugger",
+                }
+            else:
+                supported.append(breakpoint)
+        try:
+            response = await set_breakpoints(
+                client,
+                source={"path": client.path_mapper.to_remote(path), "name": Path(path).name},
+                breakpoints=supported,
+            )
+        except Exception as e:
+            # not marked as sent, so it's retried by the next sync
+            self.results[path] = {
+                breakpoint["line"]: {"verified": False, "message": str(e)} for breakpoint in breakpoints
+            }
+            self.notify(path)
+            return
+        for breakpoint_id, (path_, _) in list(self.ids.items()):
+            if path_ == path:
+                del self.ids[breakpoint_id]
+        self.results[path] = dict(skipped)
+        for requested, result in zip(supported, response["breakpoints"]):
+            self.results[path][requested["line"]] = result
+            if "id" in result:
+                self.ids[result["id"]] = (path, requested["line"])
+        if breakpoints:
+            self.sent[path] = fingerprint(breakpoints)
+        else:
+            self.sent.pop(path, None)
+            self.results.pop(path, None)
+        self.notify(path)
+
+    async def send_all(self, client):
+        """ set every breakpoint in another session, e.g. of a subprocess, its results aren't tracked """
+        await asyncio.gather(*[
+            set_breakpoints(
+                client,
+                source={"path": client.path_mapper.to_remote(path), "name": Path(path).name},
+                breakpoints=[
+                    breakpoint for breakpoint in self.breakpoints_of(path)
+                    if not unsupported_options(breakpoint, client.capabilities)
+                ],
+            )
+            for path in sorted(self.files)
+        ])
+
+    def watch_events(self, client):
+        client.add_event_listener("breakpoint", self.handle_breakpoint_event)
+
+    def handle_breakpoint_event(self, event: BreakpointEvent):
+        breakpoint = event["body"]["breakpoint"]
+        key = self.ids.get(breakpoint.get("id"))
+        if key is None:
+            # breakpoints that weren't set by vidb aren't tracked
+            return
+        path, line = key
+        if event["body"]["reason"] == "removed":
+            self.results.get(path, {}).pop(line, None)
+            del self.ids[breakpoint["id"]]
+        else:
+            results = self.results.setdefault(path, {})
+            results[line] = dict(results.get(line, {}), **breakpoint)
+        self.notify(path)
+
+    #################
+    ## Persistence ##
+    #################
+
+    def save(self):
+        path = Path(self.path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "version": BREAKPOINTS_VERSION,
+            "files": {file: self.breakpoints_of(file) for file in sorted(self.files)},
+        }
+        tmp_path = path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, indent=1))
+        tmp_path.replace(path)
+
+    def load(self):
+        data = json.loads(Path(self.path).read_text())
+        if data.get("version") != BREAKPOINTS_VERSION:
+            raise ValueError(f"unsupported breakpoints version {data.get('version')}")
+        self.files = {
+            file: {breakpoint["line"]: breakpoint for breakpoint in breakpoints}
+            for file, breakpoints in data["files"].items()
+            if breakpoints
+        }
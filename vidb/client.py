@@ -8,16 +8,49 @@ from vidb.connection import DAPConnection
 from vidb.dap import (
     AttachRequest,
     AttachRequestArguments,
+    Capabilities,
     ConfigurationDoneRequest,
     ConfigurationDoneArguments,
+    CompletionsArguments,
+    CompletionsRequest,
+    ContinueArguments,
+    ContinueRequest,
+    DisassembleArguments,
+    DisassembleRequest,
+    DisconnectArguments,
+    DisconnectRequest,
+    EvaluateArguments,
+    EvaluateRequest,
     InitializeRequest,
     InitializeRequestArguments,
     InitializeResponse,
+    LaunchRequest,
+    LaunchRequestArguments,
+    LoadedSourcesRequest,
+    ModulesArguments,
+    ModulesRequest,
+    NextArguments,
+    NextRequest,
+    PauseArguments,
+    PauseRequest,
+    ReadMemoryArguments,
+    ReadMemoryRequest,
     ThreadsRequest,
     Request,
     StackTraceArguments,
     StackTraceRequest,
+    SetBreakpointsArguments,
+    SetBreakpointsRequest,
+    Source,
+    SourceArguments,
+    SourceBreakpoint,
+    SourceRequest,
+    StepInArguments,
+    StepInRequest,
+    StepOutArguments,
+    StepOutRequest,
 )
+from vidb.pathmap import PathMapper
 
 
 T = TypeVar("T", bound=Request)
@@ -37,6 +70,11 @@ async def initialize(client: DAPClient):
         columnsStartAt1=True,
         pathFormat="path",
         # supportsVariableType=True,
+        supportsInvalidatedEvent=True,
+        supportsVariablePaging=True,
+        # without it adapters leave out the memoryReference of variables
+        supportsMemoryReferences=True,
+        supportsStartDebuggingRequest=True,
     )
 
     response: InitializeResponse = await client.remote_call(
@@ -45,6 +83,7 @@ async def initialize(client: DAPClient):
         arguments,
     )
 
+    client.capabilities = response or {}
     client.server_support.configuration_done_request = response[
         "supportsConfigurationDoneRequest"
     ]
@@ -52,23 +91,17 @@ async def initialize(client: DAPClient):
     return response
 
 
-def attach(client: DAPClient):
+def attach(client: DAPClient, configuration=None):
+    """ configuration is what the debug adapter gave in a startDebugging request """
+    # paths are translated by client.path_mapper instead of pathMappings,
+    # which is specific to debugpy
     arguments: AttachRequestArguments = dict(
         justMyCode=False,
-        pathMappings=[
-            # {
-            #     "localRoot": "/home/lieryan/.virtualenvs/smc-console-api-d8bry_A7-py3.10/lib/python3.10/site-packages/",
-            #     "remoteRoot": "/opt/app/venv/lib/python3.10/site-packages"
-            # },
-            {
-                "localRoot": "/home/lieryan/Projects/SP-258/",
-                "remoteRoot": "/opt/app/app/"
-            },
-        ],
         request="attach",
         # stopOnEntry=True, # launch only
         # "name": "test",
     )
+    arguments.update(configuration or {})
     return client.remote_call(
         AttachRequest,
         "attach",
@@ -76,6 +109,20 @@ def attach(client: DAPClient):
     )
 
 
+def launch(client: DAPClient, configuration):
+    """ configuration is e.g. the program, its args and env, as understood by the debug adapter """
+    arguments: LaunchRequestArguments = dict(
+        justMyCode=False,
+        request="launch",
+    )
+    arguments.update(configuration)
+    return client.remote_call(
+        LaunchRequest,
+        "launch",
+        arguments,
+    )
+
+
 def configuration_done(client: DAPClient):
     arguments: ConfigurationDoneArguments = dict()
     return client.remote_call(
@@ -85,18 +132,16 @@ def configuration_done(client: DAPClient):
     )
 
 
-# def set_breakpoints(client: DAPClient, path, breakpoints):
-#     arguments = dict(
-#         source=dict(
-#             path=path,
-#         ),
-#         breakpoints=[{"line": bp} for bp in breakpoints],
-#     )
-#     return client.remote_call(
-#         dict,
-#         "setBreakpoints",
-#         arguments,
-#     )
+def set_breakpoints(client: DAPClient, *, source: Source, breakpoints: list[SourceBreakpoint]):
+    arguments: SetBreakpointsArguments = dict(
+        source=source,
+        breakpoints=breakpoints,
+    )
+    return client.remote_call(
+        SetBreakpointsRequest,
+        "setBreakpoints",
+        arguments,
+    )
 
 
 def threads(client: DAPClient):
@@ -107,10 +152,12 @@ def threads(client: DAPClient):
     )
 
 
-def stack_trace(client: DAPClient, *, thread_id: int):
+def stack_trace(client: DAPClient, *, thread_id: int, levels=None):
     arguments: StackTraceArguments = dict(
         threadId=thread_id,
     )
+    if levels is not None:
+        arguments["levels"] = levels
     return client.remote_call(
         StackTraceRequest,
         "stackTrace",
@@ -129,10 +176,15 @@ def scopes(client: DAPClient, *, frame_id):
     )
 
 
-def variables(client: DAPClient, *, variables_reference):
+def variables(client: DAPClient, *, variables_reference, start=None, count=None, filter=None):
     arguments: ... = dict(
         variablesReference=variables_reference,
     )
+    if filter is not None:
+        arguments["filter"] = filter
+    if count is not None:
+        arguments["start"] = start or 0
+        arguments["count"] = count
     return client.remote_call(
         dict,
         "variables",
@@ -140,14 +192,206 @@ def variables(client: DAPClient, *, variables_reference):
     )
 
 
+def pause(client: DAPClient, *, thread_id: int):
+    arguments: PauseArguments = dict(
+        threadId=thread_id,
+    )
+    return client.remote_call(
+        PauseRequest,
+        "pause",
+        arguments=arguments,
+    )
+
+
+async def pause_all(client: DAPClient, thread_ids, *, timeout=2.0):
+    """
+    Pause every thread and wait until they've stopped.
+
+    Adapters that stop all threads at once (e.g. debugpy) only get one pause
+    request, the other threads are paused concurrently when the `stopped`
+    event doesn't say allThreadsStopped.
+    """
+    if not thread_ids:
+        return
+    stopped: asyncio.Future = asyncio.get_running_loop().create_future()
+
+    def listener(event):
+        if not stopped.done():
+            stopped.set_result(event)
+
+    first, *rest = thread_ids
+    client.add_event_listener("stopped", listener)
+    try:
+        await pause(client, thread_id=first)
+        try:
+            event = await asyncio.wait_for(stopped, timeout)
+        except asyncio.TimeoutError:
+            event = {}
+    finally:
+        client.remove_event_listener("stopped", listener)
+
+    if rest and not event.get("body", {}).get("allThreadsStopped", False):
+        await asyncio.gather(*[pause(client, thread_id=thread_id) for thread_id in rest])
+
+
+def continue_(client: DAPClient, *, thread_id: int):
+    arguments: ContinueArguments = dict(
+        threadId=thread_id,
+    )
+    return client.remote_call(
+        ContinueRequest,
+        "continue",
+        arguments=arguments,
+    )
+
+
+def next_(client: DAPClient, *, thread_id: int):
+    arguments: NextArguments = dict(
+        threadId=thread_id,
+    )
+    return client.remote_call(
+        NextRequest,
+        "next",
+        arguments=arguments,
+    )
+
+
+def step_in(client: DAPClient, *, thread_id: int):
+    arguments: StepInArguments = dict(
+        threadId=thread_id,
+    )
+    return client.remote_call(
+        StepInRequest,
+        "stepIn",
+        arguments=arguments,
+    )
+
+
+def step_out(client: DAPClient, *, thread_id: int):
+    arguments: StepOutArguments = dict(
+        threadId=thread_id,
+    )
+    return client.remote_call(
+        StepOutRequest,
+        "stepOut",
+        arguments=arguments,
+    )
+
+
+def disconnect(client: DAPClient, *, terminate_debuggee=False):
+    arguments: DisconnectArguments = dict(
+        terminateDebuggee=terminate_debuggee,
+    )
+    return client.remote_call(
+        DisconnectRequest,
+        "disconnect",
+        arguments=arguments,
+    )
+
+
+def source(client: DAPClient, *, source: Source):
+    arguments: SourceArguments = dict(
+        source=source,
+        sourceReference=source.get("sourceReference", 0),
+    )
+    return client.remote_call(
+        SourceRequest,
+        "source",
+        arguments=arguments,
+    )
+
+
+def loaded_sources(client: DAPClient):
+    return client.remote_call(
+        LoadedSourcesRequest,
+        "loadedSources",
+        arguments={},
+    )
+
+
+def modules(client: DAPClient, *, start_module=0, module_count=0):
+    """ module_count 0 is all of them """
+    arguments: ModulesArguments = dict(
+        startModule=start_module,
+        moduleCount=module_count,
+    )
+    return client.remote_call(
+        ModulesRequest,
+        "modules",
+        arguments=arguments,
+    )
+
+
+def read_memory(client: DAPClient, *, memory_reference, count, offset=0):
+    arguments: ReadMemoryArguments = dict(
+        memoryReference=memory_reference,
+        offset=offset,
+        count=count,
+    )
+    return client.remote_call(
+        ReadMemoryRequest,
+        "readMemory",
+        arguments=arguments,
+    )
+
+
+def disassemble(client: DAPClient, *, memory_reference, instruction_count, instruction_offset=0, resolve_symbols=True):
+    arguments: DisassembleArguments = dict(
+        memoryReference=memory_reference,
+        instructionOffset=instruction_offset,
+        instructionCount=instruction_count,
+        resolveSymbols=resolve_symbols,
+    )
+    return client.remote_call(
+        DisassembleRequest,
+        "disassemble",
+        arguments=arguments,
+    )
+
+
+def evaluate(client: DAPClient, *, expression, frame_id=None, context="repl"):
+    arguments: EvaluateArguments = dict(
+        expression=expression,
+        context=context,
+    )
+    if frame_id is not None:
+        arguments["frameId"] = frame_id
+    return client.remote_call(
+        EvaluateRequest,
+        "evaluate",
+        arguments=arguments,
+    )
+
+
+def completions(client: DAPClient, *, text, column, frame_id=None):
+    arguments: CompletionsArguments = dict(
+        text=text,
+        column=column,
+    )
+    if frame_id is not None:
+        arguments["frameId"] = frame_id
+    return client.remote_call(
+        CompletionsRequest,
+        "completions",
+        arguments=arguments,
+    )
+
+
 class DAPClient:
     sequence: count
     connection: DAPConnection
 
-    def __init__(self, connection):
+    def __init__(self, connection, path_mapper=None):
         self.connection = connection
+        self.path_mapper = path_mapper or PathMapper()
         self.server_support = SupportFlags()
+        self.capabilities: Capabilities = {}
         self.sequence = count(1)
+        self.handle_request(None, self._unsupported_request)
+
+    async def _unsupported_request(self, arguments):
+        # answered so that the debug adapter doesn't wait for it
+        raise Exception("not supported by vidb")
 
     def wait_for_event(self, event_name):
         event = asyncio.Event()
@@ -168,7 +412,36 @@ class DAPClient:
         listeners = self.connection.dispatcher.events.setdefault(event_name, set())
         listeners.remove(listener)
 
-    async def initialize(self) -> None:
+    def handle_request(self, command, handler):
+        """
+        Answer the requests the debug adapter sends with command (None for
+        any other command) with what handler returns for their arguments.
+        """
+        async def _respond(request):
+            response = dict(
+                seq=next(self.sequence),
+                type="response",
+                request_seq=request["seq"],
+                command=request["command"],
+                success=True,
+            )
+            try:
+                body = await handler(request.get("arguments", {}))
+            except Exception as e:
+                response.update(success=False, message=str(e))
+            else:
+                if body is not None:
+                    response["body"] = body
+            self.connection.send_response(response)
+
+        self.connection.dispatcher.reverse_requests[command] = lambda request: asyncio.ensure_future(_respond(request))
+
+    async def initialize(self, configure=None, *, request="attach", configuration=None) -> None:
+        """
+        configure is awaited between the initialized event and
+        configurationDone, e.g. to set breakpoints. request is "attach" or
+        "launch", with configuration as its arguments.
+        """
         # Initialization sequence:
         #
         #     https://github.com/microsoft/vscode/issues/4902#issuecomment-368583522
@@ -178,12 +451,17 @@ class DAPClient:
 
         await initialize(self)
         # thread_stopped_event = self.wait_for_event("thread")
-        attach_response = attach(self)
+        # the response to launch or attach may only come after configurationDone
+        if request == "launch":
+            start_response = launch(self, configuration or {})
+        else:
+            start_response = attach(self, configuration)
         await initialized_event
-        # resp = await set_breakpoints(self, path="myscript.py", breakpoints=[2,9])
+        if configure is not None:
+            await configure()
         if self.server_support.configuration_done_request:
             await configuration_done(self)
-        await attach_response
+        await start_response
 
     def remote_call(self, request_cls: type[Request], command: str, arguments):
         async def _return_or_raise(future_response):
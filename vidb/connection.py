@@ -10,13 +10,20 @@ class Dispatcher:
     def __init__(self):
         self.futures = {}
         self.events = {}
+        # handlers of the requests sent by the debug adapter, by command
+        self.reverse_requests = {}
         self._messages = deque(maxlen=100)
+        # set once the connection is lost or closed, nothing will answer after that
+        self.closed = False
 
     def handle_request(self, message: Request) -> asyncio.Future:
         self._messages.append(message)
         assert message["seq"] not in self.futures
 
         future_response: asyncio.Future = asyncio.Future()
+        if self.closed:
+            future_response.set_exception(ConnectionError("the connection to the debug adapter is closed"))
+            return future_response
         self.futures[message["seq"]] = future_response
         return future_response
 
@@ -25,10 +32,36 @@ class Dispatcher:
         assert message["request_seq"] in self.futures
 
         future_response = self.futures.pop(message["request_seq"])
-        future_response.set_result(message)
+        # nobody waits for the response of a request that timed out
+        if not future_response.cancelled():
+            future_response.set_result(message)
 
         return future_response
 
+    def handle_reverse_request(self, message: Request):
+        self._messages.append(message)
+        handler = self.reverse_requests.get(message["command"]) or self.reverse_requests.get(None)
+        if handler is not None:
+            handler(message)
+
+    def handle_reverse_response(self, message: Response):
+        """ vidb answered a request of the debug adapter """
+        self._messages.append(message)
+
+    def handle_closed(self):
+        """ the connection was lost, the session ended as if with a terminated event """
+        if self.closed:
+            return
+        self.closed = True
+        for future in self.futures.values():
+            if not future.done():
+                future.set_exception(ConnectionError("the debug adapter closed the connection"))
+        self.futures.clear()
+        # not a message of the adapter, so it's not recorded
+        event: Event = {"seq": 0, "type": "event", "event": "terminated"}
+        for listener in list(self.events.get("terminated", ())):
+            listener(event)
+
     def handle_event(self, message: Event):
         self._messages.append(message)
         listeners = self.events.get(message["event"], {})
@@ -52,6 +85,9 @@ class BaseDAPConnection:
     async def read_headers(self) -> dict[str, str]:
         headers: dict[str, str] = {}
         while (header := await self.reader.readline()) != b"\r\n":
+            if not header:
+                # the other end closed the connection, e.g. the adapter process exited
+                raise asyncio.IncompleteReadError(b"", None)
             header_name, header_value = header.decode("ascii").split(":")
             header_value = header_value.strip()
             headers[header_name] = header_value
@@ -70,17 +106,24 @@ class DAPConnection(BaseDAPConnection):
     def __init__(self, reader, writer, dispatcher=None):
         super().__init__(reader, writer)
         self.dispatcher = dispatcher or Dispatcher()
+        self.__listener = None
 
     @classmethod
-    async def from_tcp(cls, host, address):
+    async def from_tcp(cls, host, address, dispatcher=None):
         reader, writer = await asyncio.open_connection(host, address)
-        conn = cls(reader, writer)
+        conn = cls(reader, writer, dispatcher=dispatcher)
         conn.start_listening()
         return conn
 
     def start_listening(self):
         self.__listener = asyncio.create_task(self.handle_messages())
 
+    def close(self):
+        if self.__listener is not None:
+            self.__listener.cancel()
+        self.writer.close()
+        self.dispatcher.handle_closed()
+
     async def request(self, request: Request) -> Response:
         future_response: asyncio.Future = self.send_message(request)
         response: Response = await future_response
@@ -90,19 +133,35 @@ class DAPConnection(BaseDAPConnection):
         assert request["type"] == "request"
         future_response = self.dispatch_message(request)
 
-        self.write_message(self.writer, request)
+        if not self.dispatcher.closed:
+            self.write_message(self.writer, request)
 
         return future_response
 
-    async def recv_message(self) -> Response | Event:
+    def send_response(self, response: Response):
+        """ answer a request of the debug adapter """
+        assert response["type"] == "response"
+        self.dispatcher.handle_reverse_response(response)
+        if not self.dispatcher.closed:
+            self.write_message(self.writer, response)
+
+    async def recv_message(self) -> Response | Event | Request:
         message = await super().recv_message()
-        assert message["type"] == "response" or message["type"] == "event"
+        assert message["type"] in ("response", "event", "request")
         return message
 
     async def handle_messages(self) -> None:
         while True:
-            message: Response | Event = await self.recv_message()
-            self.dispatch_message(message)
+            try:
+                message: Response | Event | Request = await self.recv_message()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.dispatcher.handle_closed()
+                return
+            if message["type"] == "request":
+                # requests sent to vidb, not ones vidb sent
+                self.dispatcher.handle_reverse_request(cast(Request, message))
+            else:
+                self.dispatch_message(message)
 
     def dispatch_message(self, message: ProtocolMessage) -> asyncio.Future:
         match message["type"]:
@@ -123,3 +182,17 @@ class DAPConnection(BaseDAPConnection):
 
             case _:
                 raise ValueError()
+
+
+class DAPServerConnection(BaseDAPConnection):
+    """ the debug adapter end of a connection """
+
+    def send_message(self, msg: Response | Event | Request):
+        # requests are reverse requests, e.g. startDebugging
+        assert msg["type"] in ["response", "event", "request"]
+        self.write_message(self.writer, msg)
+
+    async def recv_message(self) -> Request | Response:
+        message = await super().recv_message()
+        assert message["type"] in ["request", "response"]
+        return message
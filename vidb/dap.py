@@ -101,14 +101,14 @@ class InitializeRequestArguments(TypedDict):
     pathFormat: NotRequired[Literal["path", "uri"] | str]
     supportsVariableType: NotRequired[bool]
 
-    # supportsVariablePaging: NotRequired[bool]
+    supportsVariablePaging: NotRequired[bool]
     # supportsRunInTerminalRequest: NotRequired[bool]
-    # supportsMemoryReferences: NotRequired[bool]
+    supportsMemoryReferences: NotRequired[bool]
     # supportsProgressReporting: NotRequired[bool]
-    # supportsInvalidatedEvent: NotRequired[bool]
+    supportsInvalidatedEvent: NotRequired[bool]
     # supportsMemoryEvent: NotRequired[bool]
     # supportsArgsCanBeInterpretedByShell: NotRequired[bool]
-    # supportsStartDebuggingRequest: NotRequired[bool]
+    supportsStartDebuggingRequest: NotRequired[bool]
 
 
 class InitializeResponse(_Response):
@@ -192,7 +192,7 @@ class StackTraceArguments(TypedDict):
     threadId: int
 
     # startFrame: NotRequired[int]
-    # levels: NotRequired[int]
+    levels: NotRequired[int]
     # format: NotRequired[StackFrameFormat]  # requires supportsValueFormattingOptions
 
 
@@ -202,7 +202,487 @@ class StackTraceResponse(_Response):
 
 class _StackTraceResponseBody(TypedDict):
     stackFrames: list[StackFrame]
-    # totalFrames: NotRequired[int]
+    totalFrames: NotRequired[int]
+
+
+################
+## Disconnect ##
+################
+
+
+class DisconnectRequest(_Request):
+    command: Literal["disconnect"]
+
+    arguments: NotRequired[DisconnectArguments]
+
+
+class DisconnectArguments(TypedDict):
+    restart: NotRequired[bool]
+    terminateDebuggee: NotRequired[bool]
+    suspendDebuggee: NotRequired[bool]
+
+
+###########
+## Pause ##
+###########
+
+
+class PauseRequest(_Request):
+    command: Literal["pause"]
+
+    arguments: PauseArguments
+
+
+class PauseArguments(TypedDict):
+    threadId: int
+
+
+##############
+## Continue ##
+##############
+
+
+class ContinueRequest(_Request):
+    command: Literal["continue"]
+
+    arguments: ContinueArguments
+
+
+class ContinueArguments(TypedDict):
+    threadId: int
+
+    singleThread: NotRequired[bool]
+
+
+class ContinueResponse(_Response):
+    body: _ContinueResponseBody
+
+
+class _ContinueResponseBody(TypedDict):
+    allThreadsContinued: NotRequired[bool]
+
+
+##############
+## Stepping ##
+##############
+
+
+class NextRequest(_Request):
+    command: Literal["next"]
+
+    arguments: NextArguments
+
+
+class NextArguments(TypedDict):
+    threadId: int
+
+    singleThread: NotRequired[bool]
+    # granularity: NotRequired[SteppingGranularity]
+
+
+class StepInRequest(_Request):
+    command: Literal["stepIn"]
+
+    arguments: StepInArguments
+
+
+class StepInArguments(TypedDict):
+    threadId: int
+
+    singleThread: NotRequired[bool]
+    # targetId: NotRequired[int]
+    # granularity: NotRequired[SteppingGranularity]
+
+
+class StepOutRequest(_Request):
+    command: Literal["stepOut"]
+
+    arguments: StepOutArguments
+
+
+class StepOutArguments(TypedDict):
+    threadId: int
+
+    singleThread: NotRequired[bool]
+    # granularity: NotRequired[SteppingGranularity]
+
+
+############
+## Source ##
+############
+
+
+class SourceRequest(_Request):
+    command: Literal["source"]
+
+    arguments: SourceArguments
+
+
+class SourceArguments(TypedDict):
+    sourceReference: int
+
+    source: NotRequired[Source]
+
+
+class SourceResponse(_Response):
+    body: _SourceResponseBody
+
+
+class _SourceResponseBody(TypedDict):
+    content: str
+
+    mimeType: NotRequired[str]
+
+
+###################
+## LoadedSources ##
+###################
+
+
+class LoadedSourcesRequest(_Request):
+    command: Literal["loadedSources"]
+
+    arguments: NotRequired[LoadedSourcesArguments]
+
+
+class LoadedSourcesArguments(TypedDict):
+    pass
+
+
+class LoadedSourcesResponse(_Response):
+    body: _LoadedSourcesResponseBody
+
+
+class _LoadedSourcesResponseBody(TypedDict):
+    sources: list[Source]
+
+
+#############
+## Modules ##
+#############
+
+
+class ModulesRequest(_Request):
+    command: Literal["modules"]
+
+    arguments: ModulesArguments
+
+
+class ModulesArguments(TypedDict):
+    startModule: NotRequired[int]
+    moduleCount: NotRequired[int]
+
+
+class ModulesResponse(_Response):
+    body: _ModulesResponseBody
+
+
+class _ModulesResponseBody(TypedDict):
+    modules: list[Module]
+
+    totalModules: NotRequired[int]
+
+
+################
+## ReadMemory ##
+################
+
+
+class ReadMemoryRequest(_Request):
+    command: Literal["readMemory"]
+
+    arguments: ReadMemoryArguments
+
+
+class ReadMemoryArguments(TypedDict):
+    memoryReference: str
+    count: int
+
+    offset: NotRequired[int]
+
+
+class ReadMemoryResponse(_Response):
+    body: NotRequired[_ReadMemoryResponseBody]
+
+
+class _ReadMemoryResponseBody(TypedDict):
+    address: str
+
+    unreadableBytes: NotRequired[int]
+    data: NotRequired[str]
+
+
+#################
+## Disassemble ##
+#################
+
+
+class DisassembleRequest(_Request):
+    command: Literal["disassemble"]
+
+    arguments: DisassembleArguments
+
+
+class DisassembleArguments(TypedDict):
+    memoryReference: str
+    instructionCount: int
+
+    offset: NotRequired[int]
+    instructionOffset: NotRequired[int]
+    resolveSymbols: NotRequired[bool]
+
+
+class DisassembleResponse(_Response):
+    body: NotRequired[_DisassembleResponseBody]
+
+
+class _DisassembleResponseBody(TypedDict):
+    instructions: list[DisassembledInstruction]
+
+
+##############
+## Evaluate ##
+##############
+
+
+class EvaluateRequest(_Request):
+    command: Literal["evaluate"]
+
+    arguments: EvaluateArguments
+
+
+class EvaluateArguments(TypedDict):
+    expression: str
+
+    frameId: NotRequired[int]
+    context: NotRequired[Literal["watch", "repl", "hover", "clipboard", "variables"] | str]
+    # format: NotRequired[ValueFormat]  # requires supportsValueFormattingOptions
+
+
+class EvaluateResponse(_Response):
+    body: _EvaluateResponseBody
+
+
+class _EvaluateResponseBody(TypedDict):
+    result: str
+    variablesReference: int
+
+    type: NotRequired[str]
+    # presentationHint: NotRequired[VariablePresentationHint]
+    # namedVariables: NotRequired[int]
+    # indexedVariables: NotRequired[int]
+    memoryReference: NotRequired[str]
+
+
+#################
+## Completions ##
+#################
+
+
+class CompletionsRequest(_Request):
+    command: Literal["completions"]
+
+    arguments: CompletionsArguments
+
+
+class CompletionsArguments(TypedDict):
+    text: str
+    column: int
+
+    frameId: NotRequired[int]
+    line: NotRequired[int]
+
+
+class CompletionsResponse(_Response):
+    body: _CompletionsResponseBody
+
+
+class _CompletionsResponseBody(TypedDict):
+    targets: list[CompletionItem]
+
+
+####################
+## SetBreakpoints ##
+####################
+
+
+class SetBreakpointsRequest(_Request):
+    command: Literal["setBreakpoints"]
+
+    arguments: SetBreakpointsArguments
+
+
+class SetBreakpointsArguments(TypedDict):
+    source: Source
+
+    breakpoints: NotRequired[list[SourceBreakpoint]]
+    sourceModified: NotRequired[bool]
+
+
+class SetBreakpointsResponse(_Response):
+    body: _SetBreakpointsResponseBody
+
+
+class _SetBreakpointsResponseBody(TypedDict):
+    breakpoints: list[Breakpoint]
+
+
+class BreakpointEvent(Event):
+    event: Literal["breakpoint"]
+
+    body: _BreakpointEventBody
+
+
+class _BreakpointEventBody(TypedDict):
+    reason: Literal["changed", "new", "removed"] | str
+    breakpoint: Breakpoint
+
+
+####################
+## StartDebugging ##
+####################
+
+
+class StartDebuggingRequest(_Request):
+    """ sent by the debug adapter, e.g. for a subprocess """
+
+    command: Literal["startDebugging"]
+
+    arguments: StartDebuggingRequestArguments
+
+
+class StartDebuggingRequestArguments(TypedDict):
+    configuration: dict[str, Any]
+    request: Literal["launch", "attach"]
+
+
+class StartDebuggingResponse(_Response):
+    pass
+
+
+############
+## Output ##
+############
+
+
+class OutputEvent(Event):
+    event: Literal["output"]
+
+    body: _OutputEventBody
+
+
+class _OutputEventBody(TypedDict):
+    output: str
+
+    category: NotRequired[Literal["console", "important", "stdout", "stderr", "telemetry"] | str]
+    source: NotRequired[Source]
+    line: NotRequired[int]
+    column: NotRequired[int]
+    # group: NotRequired[Literal["start", "startCollapsed", "end"]]
+    # variablesReference: NotRequired[int]
+    # data: NotRequired[Any]
+
+
+#############
+## Stopped ##
+#############
+
+
+class StoppedEvent(Event):
+    event: Literal["stopped"]
+
+    body: _StoppedEventBody
+
+
+class _StoppedEventBody(TypedDict):
+    reason: Literal["step", "breakpoint", "exception", "pause", "entry", "goto"] | str
+
+    description: NotRequired[str]
+    threadId: NotRequired[int]
+    # preserveFocusHint: NotRequired[bool]
+    text: NotRequired[str]
+    allThreadsStopped: NotRequired[bool]
+    hitBreakpointIds: NotRequired[list[int]]
+
+
+############
+## Thread ##
+############
+
+
+class ThreadEvent(Event):
+    event: Literal["thread"]
+
+    body: _ThreadEventBody
+
+
+class _ThreadEventBody(TypedDict):
+    reason: Literal["started", "exited"] | str
+    threadId: int
+
+
+################
+## Terminated ##
+################
+
+
+class TerminatedEvent(Event):
+    event: Literal["terminated"]
+
+    body: NotRequired[_TerminatedEventBody]
+
+
+class _TerminatedEventBody(TypedDict):
+    restart: NotRequired[Any]
+
+
+#################
+## Invalidated ##
+#################
+
+
+class InvalidatedEvent(Event):
+    event: Literal["invalidated"]
+
+    body: _InvalidatedEventBody
+
+
+class _InvalidatedEventBody(TypedDict):
+    areas: NotRequired[list[Literal["all", "stacks", "threads", "variables"] | str]]
+    threadId: NotRequired[int]
+    stackFrameId: NotRequired[int]
+
+
+##################
+## LoadedSource ##
+##################
+
+
+class LoadedSourceEvent(Event):
+    event: Literal["loadedSource"]
+
+    body: _LoadedSourceEventBody
+
+
+class _LoadedSourceEventBody(TypedDict):
+    reason: Literal["new", "changed", "removed"]
+    source: Source
+
+
+############
+## Module ##
+############
+
+
+class ModuleEvent(Event):
+    event: Literal["module"]
+
+    body: _ModuleEventBody
+
+
+class _ModuleEventBody(TypedDict):
+    reason: Literal["new", "changed", "removed"]
+    module: Module
 
 
 ###########
@@ -213,8 +693,8 @@ class _StackTraceResponseBody(TypedDict):
 class Capabilities(TypedDict):
     supportsConfigurationDoneRequest: NotRequired[bool]
     # supportsFunctionBreakpoints: NotRequired[bool]
-    # supportsConditionalBreakpoints: NotRequired[bool]
-    # supportsHitConditionalBreakpoints: NotRequired[bool]
+    supportsConditionalBreakpoints: NotRequired[bool]
+    supportsHitConditionalBreakpoints: NotRequired[bool]
     # supportsEvaluateForHovers: NotRequired[bool]
     # exceptionBreakpointFilters: NotRequired[ExceptionBreakpointsFilter[]]
     # supportsStepBack: NotRequired[bool]
@@ -224,7 +704,7 @@ class Capabilities(TypedDict):
     # supportsStepInTargetsRequest: NotRequired[bool]
     # supportsCompletionsRequest: NotRequired[bool]
     # completionTriggerCharacters: NotRequired[List[str]]
-    # supportsModulesRequest: NotRequired[bool]
+    supportsModulesRequest: NotRequired[bool]
     # additionalModuleColumns: NotRequired[ColumnDescriptor[]]
     # supportedChecksumAlgorithms: NotRequired[ChecksumAlgorithm[]]
     # supportsRestartRequest: NotRequired[bool]
@@ -234,18 +714,18 @@ class Capabilities(TypedDict):
     # supportTerminateDebuggee: NotRequired[bool]
     # supportSuspendDebuggee: NotRequired[bool]
     # supportsDelayedStackTraceLoading: NotRequired[bool]
-    # supportsLoadedSourcesRequest: NotRequired[bool]
-    # supportsLogPoints: NotRequired[bool]
+    supportsLoadedSourcesRequest: NotRequired[bool]
+    supportsLogPoints: NotRequired[bool]
     # supportsTerminateThreadsRequest: NotRequired[bool]
     # supportsSetExpression: NotRequired[bool]
     # supportsTerminateRequest: NotRequired[bool]
     # supportsDataBreakpoints: NotRequired[bool]
-    # supportsReadMemoryRequest: NotRequired[bool]
+    supportsReadMemoryRequest: NotRequired[bool]
     # supportsWriteMemoryRequest: NotRequired[bool]
-    # supportsDisassembleRequest: NotRequired[bool]
+    supportsDisassembleRequest: NotRequired[bool]
     # supportsCancelRequest: NotRequired[bool]
     # supportsBreakpointLocationsRequest: NotRequired[bool]
-    # supportsClipboardContext: NotRequired[bool]
+    supportsClipboardContext: NotRequired[bool]
     # supportsSteppingGranularity: NotRequired[bool]
     # supportsInstructionBreakpoints: NotRequired[bool]
     # supportsExceptionFilterOptions: NotRequired[bool]
@@ -260,7 +740,7 @@ class Thread(TypedDict):
 class Source(TypedDict):
     name: NotRequired[str]
     path: NotRequired[str]
-    # sourceReference: NotRequired[int]
+    sourceReference: NotRequired[int]
     # presentationHint: NotRequired[Literal['normal', 'emphasize', 'deemphasize']]
     # origin: NotRequired[str]
     # sources: NotRequired[list[Source]]
@@ -268,6 +748,34 @@ class Source(TypedDict):
     # checksums: NotRequired[list[Checksum]]
 
 
+class Module(TypedDict):
+    id: int | str
+    name: str
+
+    path: NotRequired[str]
+    # isOptimized: NotRequired[bool]
+    # isUserCode: NotRequired[bool]
+    version: NotRequired[str]
+    # symbolStatus: NotRequired[str]
+    # symbolFilePath: NotRequired[str]
+    # dateTimeStamp: NotRequired[str]
+    # addressRange: NotRequired[str]
+
+
+class DisassembledInstruction(TypedDict):
+    address: str
+    instruction: str
+
+    instructionBytes: NotRequired[str]
+    symbol: NotRequired[str]
+    # location: NotRequired[Source]
+    line: NotRequired[int]
+    # column: NotRequired[int]
+    # endLine: NotRequired[int]
+    # endColumn: NotRequired[int]
+    # presentationHint: NotRequired[Literal["normal", "invalid"]]
+
+
 class StackFrame(TypedDict):
     id: int
     name: str
@@ -279,11 +787,72 @@ class StackFrame(TypedDict):
     # endColumn: NotRequired[int]
 
     # canRestart: NotRequired[bool]  # requires supportsRestartRequest
-    # instructionPointerReference: NotRequired[str]
+    instructionPointerReference: NotRequired[str]
     # moduleId: NotRequired[int | str]
     # presentationHint: NotRequired[Literal['normal', 'label', 'subtle']]
 
 
+class Scope(TypedDict):
+    name: str
+    variablesReference: int
+    expensive: bool
+
+    # presentationHint: NotRequired[Literal['arguments', 'locals', 'registers'] | str]
+    # namedVariables: NotRequired[int]
+    # indexedVariables: NotRequired[int]
+    # source: NotRequired[Source]
+    # line: NotRequired[int]
+
+
+class Variable(TypedDict):
+    name: str
+    value: str
+    variablesReference: int
+
+    type: NotRequired[str]
+    evaluateName: NotRequired[str]
+    # presentationHint: NotRequired[VariablePresentationHint]
+    namedVariables: NotRequired[int]
+    indexedVariables: NotRequired[int]
+    memoryReference: NotRequired[str]
+
+
+class SourceBreakpoint(TypedDict):
+    line: int
+
+    column: NotRequired[int]
+    condition: NotRequired[str]  # requires supportsConditionalBreakpoints
+    hitCondition: NotRequired[str]  # requires supportsHitConditionalBreakpoints
+    logMessage: NotRequired[str]  # requires supportsLogPoints
+
+
+class Breakpoint(TypedDict):
+    verified: bool
+
+    id: NotRequired[int]
+    message: NotRequired[str]
+    source: NotRequired[Source]
+    line: NotRequired[int]
+    column: NotRequired[int]
+    # endLine: NotRequired[int]
+    # endColumn: NotRequired[int]
+    # instructionReference: NotRequired[str]
+    # offset: NotRequired[int]
+
+
+class CompletionItem(TypedDict):
+    label: str
+
+    text: NotRequired[str]
+    type: NotRequired[str]
+    start: NotRequired[int]
+    length: NotRequired[int]
+    # sortText: NotRequired[str]
+    # detail: NotRequired[str]
+    # selectionStart: NotRequired[int]
+    # selectionLength: NotRequired[int]
+
+
 Request = (
     InitializeRequest
     | LaunchRequest
@@ -291,6 +860,16 @@ Request = (
     | ConfigurationDoneRequest
     | ThreadsRequest
     | StackTraceRequest
+    | DisconnectRequest
+    | PauseRequest
+    | ContinueRequest
+    | NextRequest
+    | StepInRequest
+    | StepOutRequest
+    | SourceRequest
+    | EvaluateRequest
+    | CompletionsRequest
+    | SetBreakpointsRequest
 )
 UnvalidatedRequest = Request | _UnvalidatedRequest
 
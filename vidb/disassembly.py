@@ -0,0 +1,140 @@
+"""
+Disassembly around the instruction pointer, fetched a page at a time.
+
+Instructions are counted from a memory reference, the selected frame's
+instructionPointerReference, so row 0 is the current instruction and the
+rows before it are negative. They're fetched with `disassemble` in pages of
+`page_size` instructions and cached by memory reference and page, least
+recently used first, so going back to a frame (or to a function another
+frame is in) doesn't fetch it again.
+
+Whenever rows are shown the pages around them are prefetched too, so that
+scrolling through a long function finds the next page already there
+instead of sending one request per keypress.
+
+A page that couldn't be fetched is cached empty until the session is
+cleared, e.g. when the debuggee runs or another session is shown, so that
+it's fetched again at the next stop but not at every redraw.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from typing import Callable
+
+from vidb.client import disassemble
+from vidb.dap import DisassembledInstruction
+from vidb.session import Session
+
+
+PAGE_SIZE = 64
+
+
+class DisassemblyCache:
+    def __init__(self, session: Session | None = None, *, page_size=PAGE_SIZE, max_pages=64, prefetch=1):
+        self.session = session
+        self.page_size = page_size
+        self.max_pages = max_pages
+        # pages fetched before and after the ones shown
+        self.prefetch = prefetch
+        # by (memory reference, page index), page index * page_size is the instruction offset of the page
+        self.pages: OrderedDict[tuple[str, int], list[DisassembledInstruction]] = OrderedDict()
+        self._pending: dict[tuple[str, int], asyncio.Task] = {}
+        # the pages that are cached empty because they couldn't be fetched
+        self.failed: set[tuple[str, int]] = set()
+        # bumped by drop_failed, fetches from an earlier epoch aren't kept
+        self.epoch = 0
+        self.listeners: set[Callable[[str, int], None]] = set()
+        if session is not None:
+            session.subscribe(self._on_session_changed)
+
+    def _on_session_changed(self, kind, key):
+        if kind == "clear":
+            self.drop_failed()
+
+    def drop_failed(self):
+        """ fetch the pages that failed again when they're next shown, and stop the fetches in flight """
+        self.epoch += 1
+        for task in self._pending.values():
+            task.cancel()
+        self._pending = {}
+        for key in self.failed:
+            self.pages.pop(key, None)
+        self.failed.clear()
+
+    def close(self):
+        if self.session is not None:
+            self.session.unsubscribe(self._on_session_changed)
+
+    def subscribe(self, listener):
+        self.listeners.add(listener)
+
+    def unsubscribe(self, listener):
+        self.listeners.discard(listener)
+
+    def notify(self, reference, index):
+        for listener in list(self.listeners):
+            listener(reference, index)
+
+    def instruction(self, reference: str, row: int) -> DisassembledInstruction | None:
+        """ the instruction row instructions after reference, None while its page isn't fetched """
+        index, position = divmod(row, self.page_size)
+        page = self.pages.get((reference, index))
+        if page is None:
+            return None
+        self.pages.move_to_end((reference, index))
+        return page[position] if position < len(page) else None
+
+    def fetched(self, reference: str, row: int) -> bool:
+        return (reference, row // self.page_size) in self.pages
+
+    def request(self, client, reference: str, index: int) -> asyncio.Task | None:
+        """ fetch the page in the background, unless it's cached or being fetched """
+        key = (reference, index)
+        if key in self.pages:
+            return None
+        task = self._pending.get(key)
+        if task is None:
+            task = self._pending[key] = asyncio.ensure_future(self.load(client, reference, index))
+        return task
+
+    def request_rows(self, client, reference: str, first: int, last: int) -> list[asyncio.Task]:
+        """ fetch the pages of rows first to last, and `prefetch` more pages on either side """
+        tasks = []
+        for index in range(first // self.page_size - self.prefetch, last // self.page_size + self.prefetch + 1):
+            task = self.request(client, reference, index)
+            if task is not None:
+                tasks.append(task)
+        return tasks
+
+    async def load(self, client, reference: str, index: int) -> list[DisassembledInstruction]:
+        key = (reference, index)
+        epoch = self.epoch
+        try:
+            body = await disassemble(
+                client,
+                memory_reference=reference,
+                instruction_offset=index * self.page_size,
+                instruction_count=self.page_size,
+            ) or {}
+        except Exception:
+            # e.g. past the end of the mapped memory, cached empty so that it isn't asked again at every redraw
+            body = {}
+            self.failed.add(key)
+        else:
+            self.failed.discard(key)
+        finally:
+            if epoch == self.epoch:
+                self._pending.pop(key, None)
+        page = self.pages[key] = body.get("instructions", [])
+        self.pages.move_to_end(key)
+        while len(self.pages) > self.max_pages:
+            evicted, _ = self.pages.popitem(last=False)
+            self.failed.discard(evicted)
+        self.notify(reference, index)
+        return page
+
+
+def format_instruction(instruction: DisassembledInstruction) -> str:
+    symbol = f"<{instruction['symbol']}> " if instruction.get("symbol") else ""
+    return f"{instruction['address']}  {instruction.get('instructionBytes', ''):<24} {symbol}{instruction['instruction']}"
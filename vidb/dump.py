@@ -0,0 +1,240 @@
+"""
+Headless dump of what every thread in the debuggee is doing.
+
+    python -m vidb dump PORT [--host HOST] [--locals DEPTH] [--group] [--json]
+
+Attaches, pauses the process, fetches the stacks of all threads concurrently
+(and optionally their locals), then resumes and detaches. Everything that
+doesn't need the process to be paused is done before pausing or after
+resuming, and the time the process was paused is reported on stderr.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from contextlib import asynccontextmanager
+
+from vidb.client import DAPClient, continue_, disconnect, pause_all
+from vidb.connection import DAPConnection
+from vidb.session import Session
+from vidb.stacks import group_stacks, load_all_threads
+
+
+STOPPED_TIMEOUT = 2.0
+
+
+class PauseTimer:
+    started: float
+    ended: float | None = None
+
+    @property
+    def duration(self) -> float:
+        return (self.ended or time.perf_counter()) - self.started
+
+
+async def resume_all(client: DAPClient, thread_ids):
+    """ resume the threads, with a single request when the adapter resumes all threads at once """
+    if not thread_ids:
+        return
+    first, *rest = thread_ids
+    response = await continue_(client, thread_id=first)
+    if rest and not (response or {}).get("allThreadsContinued", True):
+        await asyncio.gather(*[continue_(client, thread_id=thread_id) for thread_id in rest])
+
+
+@asynccontextmanager
+async def paused(client: DAPClient, thread_ids):
+    """
+    Pause the threads for the duration of the block, then resume them.
+
+    Yields a PauseTimer measuring how long the process was paused.
+    """
+    timer = PauseTimer()
+    timer.started = time.perf_counter()
+    try:
+        await pause_all(client, thread_ids, timeout=STOPPED_TIMEOUT)
+        yield timer
+    finally:
+        try:
+            await resume_all(client, thread_ids)
+        finally:
+            timer.ended = time.perf_counter()
+
+
+def variables_to_dict(session: Session, variables_reference: int):
+    return [
+        {
+            "name": variable["name"],
+            "type": variable.get("type"),
+            "value": variable["value"],
+            "children": (
+                variables_to_dict(session, variable["variablesReference"])
+                if variable["variablesReference"] in session.children
+                else None
+            ),
+        }
+        for variable in session.children_of(variables_reference)
+    ]
+
+
+def session_to_dict(session: Session, errors=None):
+    errors = errors or {}
+    return [
+        {
+            "id": thread["id"],
+            "name": thread["name"],
+            "error": str(errors[thread["id"]]) if thread["id"] in errors else None,
+            "frames": [
+                {
+                    "name": frame["name"],
+                    "path": frame.get("source", {}).get("path"),
+                    "line": frame["line"],
+                    "column": frame["column"],
+                    "scopes": [
+                        {
+                            "name": scope["name"],
+                            "variables": variables_to_dict(session, scope["variablesReference"]),
+                        }
+                        for scope in session.scopes_of(frame["id"])
+                    ],
+                }
+                for frame in session.frames_of(thread["id"])
+            ],
+        }
+        for thread in session.threads.values()
+    ]
+
+
+def groups_to_dict(session: Session, errors=None):
+    """ like session_to_dict, but threads with identical stacks are merged into one entry """
+    threads = {thread["id"]: thread for thread in session_to_dict(session, errors)}
+    groups = []
+    for group in group_stacks(session):
+        # the stack loaded, but the variables of some of the threads may not have
+        group_errors = [
+            f"thread {thread_id}: {threads[thread_id]['error']}"
+            for thread_id in group.thread_ids
+            if threads[thread_id]["error"]
+        ]
+        groups.append({
+            "count": group.count,
+            "threads": [
+                {"id": thread_id, "name": threads[thread_id]["name"]} for thread_id in group.thread_ids
+            ],
+            "error": "; ".join(group_errors) or None,
+            "frames": threads[group.thread_ids[0]]["frames"],
+        })
+    grouped = {thread["id"] for group in groups for thread in group["threads"]}
+    groups.extend(
+        {
+            "count": 1,
+            "threads": [{"id": thread["id"], "name": thread["name"]}],
+            "error": thread["error"],
+            "frames": [],
+        }
+        for thread in threads.values()
+        if thread["error"] and thread["id"] not in grouped
+    )
+    return groups
+
+
+def _format_frames(lines, frames):
+    def format_variables(variables, indent):
+        for variable in variables:
+            lines.append(f"{indent}{variable['name']} = {variable['value']}")
+            format_variables(variable["children"] or [], indent + "    ")
+
+    for frame in frames:
+        lines.append(f"  File \"{frame['path']}\", line {frame['line']}, in {frame['name']}")
+        for scope in frame["scopes"]:
+            format_variables(scope["variables"], "      ")
+
+
+def format_text(threads) -> str:
+    lines = []
+    for thread in threads:
+        lines.append(f"Thread {thread['id']} - {thread['name']}")
+        if thread["error"]:
+            lines.append(f"  <{thread['error']}>")
+        _format_frames(lines, thread["frames"])
+        lines.append("")
+    return "\n".join(lines)
+
+
+def format_groups_text(groups) -> str:
+    lines = []
+    for group in groups:
+        names = ", ".join(f"{thread['id']} - {thread['name']}" for thread in group["threads"])
+        lines.append(f"{group['count']} thread{'s' if group['count'] > 1 else ''}: {names}")
+        if group["error"]:
+            lines.append(f"  <{group['error']}>")
+        _format_frames(lines, group["frames"])
+        lines.append("")
+    return "\n".join(lines)
+
+
+async def dump(client: DAPClient, *, depth=0, group=False):
+    """ returns the dumped threads (or groups of threads) and the PauseTimer of the pause """
+    session = Session()
+    thread_list = await session.load_threads(client)
+    thread_ids = [thread["id"] for thread in thread_list]
+
+    async with paused(client, thread_ids) as timer:
+        errors = await load_all_threads(client, session, thread_ids, depth=depth)
+
+    if group:
+        return groups_to_dict(session, errors), timer
+    return session_to_dict(session, errors), timer
+
+
+async def run(host, port, *, depth=0, group=False, output_format="text", file=sys.stdout):
+    connection = await DAPConnection.from_tcp(host, port)
+    client = DAPClient(connection=connection)
+    try:
+        await client.initialize()
+        threads, timer = await dump(client, depth=depth, group=group)
+        await disconnect(client, terminate_debuggee=False)
+    finally:
+        connection.close()
+
+    if output_format == "json":
+        json.dump({"paused": timer.duration, "groups" if group else "threads": threads}, file, indent=2)
+        print(file=file)
+    elif group:
+        print(format_groups_text(threads), file=file)
+    else:
+        print(format_text(threads), file=file)
+    print(f"process was paused for {timer.duration * 1000:.1f}ms", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vidb dump", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("port", type=int)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument(
+        "--locals",
+        type=int,
+        default=0,
+        metavar="DEPTH",
+        help="include the locals of every frame, expanded up to DEPTH levels",
+    )
+    parser.add_argument(
+        "--group",
+        action="store_true",
+        help="merge threads with identical stacks, the locals shown are of the first thread of each group",
+    )
+    parser.add_argument("--json", action="store_true", help="output as JSON")
+    args = parser.parse_args(argv)
+
+    asyncio.run(
+        run(
+            args.host,
+            args.port,
+            depth=args.locals,
+            group=args.group,
+            output_format="json" if args.json else "text",
+        )
+    )
@@ -0,0 +1,321 @@
+"""
+Synthetic debug adapter for scaling tests and benchmarks.
+
+    python -m vidb fake-adapter [--port PORT | --stdio] [--threads N] [--depth D]
+                                [--variables K] [--string-size BYTES]
+
+FakeAdapter pretends to debug a process with N threads, each with a stack D
+frames deep, where every frame has a locals and a globals scope holding K
+variables. Some of the variables are strings of --string-size bytes and some
+are containers that can be expanded once. It can also flood the client with
+output events.
+
+The content is generated on demand from the ids, so large configurations
+don't cost memory in the adapter. It can be served over TCP, to point the TUI
+at it, over stdin and stdout, to be launched like a real adapter, or
+in-process over a socketpair with `serve_in_process`.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import socket
+import sys
+from itertools import count
+
+from vidb.connection import DAPConnection, DAPServerConnection
+from vidb.dap import Event, Request, Response, Scope, StackFrame, Thread, Variable
+
+
+class FakeAdapter:
+    """ answers requests with generated threads, stacks, scopes and variables """
+
+    def __init__(self, *, threads=10, depth=20, variables=20, string_size=100):
+        self.thread_count = threads
+        self.depth = depth
+        self.variable_count = variables
+        self.string_size = string_size
+        self.connection: DAPServerConnection | None = None
+        self.sequence = count(1)
+        self.breakpoint_ids = count(1)
+        # every step moves the top frame of the stepped thread one line down
+        self.steps: dict[int, int] = {}
+        # the arguments of the launch request, when launched instead of attached to
+        self.launched = None
+
+    # frame ids encode the thread and the level, variablesReferences encode the
+    # frame, the scope and the index of the expandable variable in the scope
+
+    def frame_id(self, thread_id: int, level: int) -> int:
+        return thread_id * self.depth + level
+
+    def scope_reference(self, frame_id: int, scope_index: int) -> int:
+        return (frame_id * 2 + scope_index) * (self.variable_count + 1) + 1
+
+    def make_thread(self, thread_id: int) -> Thread:
+        return {"id": thread_id, "name": "MainThread" if thread_id == 1 else f"Thread-{thread_id}"}
+
+    def make_frame(self, thread_id: int, level: int) -> StackFrame:
+        return {
+            "id": self.frame_id(thread_id, level),
+            "name": f"function_{level}",
+            "source": {"path": f"/fake/module_{level % 10}.py", "sourceReference": 0},
+            "line": level * 3 + 2 + (self.steps.get(thread_id, 0) if level == 0 else 0),
+            "column": 1,
+        }
+
+    def make_scopes(self, frame_id: int) -> list[Scope]:
+        return [
+            {
+                "name": name,
+                "variablesReference": self.scope_reference(frame_id, scope_index),
+                "expensive": False,
+            }
+            for scope_index, name in enumerate(["Locals", "Globals"])
+        ]
+
+    def make_variables(self, variables_reference: int) -> list[Variable]:
+        _, index = divmod(variables_reference - 1, self.variable_count + 1)
+        if index:
+            # an expanded container, whose items can't be expanded any further
+            return [
+                {"name": str(i), "value": str(i), "type": "int", "variablesReference": 0}
+                for i in range(self.variable_count)
+            ]
+        return [self.make_variable(variables_reference, i) for i in range(self.variable_count)]
+
+    def make_variable(self, scope_reference: int, i: int) -> Variable:
+        name = f"var_{i}"
+        match i % 4:
+            case 0:
+                value, type_, child = repr("x" * self.string_size), "str", 0
+            case 1:
+                value, type_, child = f"[0, 1, ...] ({self.variable_count} items)", "list", scope_reference + i + 1
+            case _:
+                value, type_, child = str(i), "int", 0
+        return {"name": name, "value": value, "type": type_, "variablesReference": child, "evaluateName": name}
+
+    ##############
+    ## Handlers ##
+    ##############
+
+    def on_initialize(self, arguments):
+        return {
+            "supportsConfigurationDoneRequest": True,
+            "supportsConditionalBreakpoints": True,
+            "supportsHitConditionalBreakpoints": True,
+            "supportsLogPoints": True,
+            "supportsLoadedSourcesRequest": True,
+        }
+
+    def on_attach(self, arguments):
+        return None
+
+    def on_launch(self, arguments):
+        self.launched = arguments
+        return None
+
+    def on_configurationDone(self, arguments):
+        return None
+
+    def on_disconnect(self, arguments):
+        return None
+
+    def on_threads(self, arguments):
+        return {"threads": [self.make_thread(thread_id) for thread_id in range(1, self.thread_count + 1)]}
+
+    def on_stackTrace(self, arguments):
+        thread_id = arguments["threadId"]
+        start = arguments.get("startFrame", 0)
+        levels = arguments.get("levels") or self.depth
+        frames = [self.make_frame(thread_id, level) for level in range(start, min(start + levels, self.depth))]
+        return {"stackFrames": frames, "totalFrames": self.depth}
+
+    def on_scopes(self, arguments):
+        return {"scopes": self.make_scopes(arguments["frameId"])}
+
+    def on_variables(self, arguments):
+        return {"variables": self.make_variables(arguments["variablesReference"])}
+
+    def on_pause(self, arguments):
+        return None
+
+    def on_continue(self, arguments):
+        return {"allThreadsContinued": True}
+
+    def on_next(self, arguments):
+        self.steps[arguments["threadId"]] = self.steps.get(arguments["threadId"], 0) + 1
+        return None
+
+    on_stepIn = on_stepOut = on_next
+
+    def on_setBreakpoints(self, arguments):
+        return {
+            "breakpoints": [
+                {"id": next(self.breakpoint_ids), "verified": True, "line": breakpoint["line"]}
+                for breakpoint in arguments.get("breakpoints", [])
+            ]
+        }
+
+    def on_source(self, arguments):
+        lines = [f"def function_{level}():\n    function_{level + 1}()\n" for level in range(self.depth)]
+        return {"content": "\n".join(lines)}
+
+    def on_loadedSources(self, arguments):
+        return {"sources": [{"path": f"/fake/module_{i}.py", "sourceReference": 0} for i in range(10)]}
+
+    def on_evaluate(self, arguments):
+        return {"result": repr(arguments["expression"]), "variablesReference": 0}
+
+    ############
+    ## Events ##
+    ############
+
+    def send_event(self, event, body=None):
+        message: Event = {"seq": next(self.sequence), "type": "event", "event": event}
+        if body is not None:
+            message["body"] = body
+        self.connection.send_message(message)
+
+    def stop(self, thread_id=1, *, reason="breakpoint"):
+        self.send_event("stopped", {"reason": reason, "threadId": thread_id, "allThreadsStopped": True})
+
+    def start_debugging(self, configuration, *, request="attach"):
+        """ ask the client for a child session, like debugpy does for a subprocess """
+        self.connection.send_message({
+            "seq": next(self.sequence),
+            "type": "request",
+            "command": "startDebugging",
+            "arguments": {"configuration": configuration, "request": request},
+        })
+
+    async def flood(self, events: int, *, size=100):
+        """ send a burst of output events, yielding to the loop now and then like a real socket would """
+        output = "x" * (size - 1) + "\n"
+        for i in range(events):
+            self.send_event("output", {"category": "stdout", "output": output})
+            if i % 100 == 99:
+                await self.connection.writer.drain()
+
+    #############
+    ## Serving ##
+    #############
+
+    def respond(self, request: Request):
+        handler = getattr(self, f"on_{request['command']}", None)
+        response: Response = {
+            "seq": next(self.sequence),
+            "type": "response",
+            "request_seq": request["seq"],
+            "command": request["command"],
+            "success": handler is not None,
+        }
+        if handler is None:
+            response["message"] = f"{request['command']} is not supported by the fake adapter"
+        else:
+            body = handler(request.get("arguments") or {})
+            if body is not None:
+                response["body"] = body
+        return response
+
+    async def serve(self, connection: DAPServerConnection):
+        """ answer requests until the client disconnects """
+        self.connection = connection
+        while True:
+            try:
+                request = await connection.recv_message()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+            if request["type"] == "response":
+                # the answer to a reverse request
+                continue
+            connection.send_message(self.respond(request))
+            if request["command"] in ("attach", "launch"):
+                self.send_event("initialized")
+            elif request["command"] == "configurationDone" and self.launched is not None:
+                self.send_event("process", {"name": self.launched.get("program", "fake"), "startMethod": "launch"})
+                if self.launched.get("stopOnEntry"):
+                    self.stop(1, reason="entry")
+            elif request["command"] == "pause":
+                self.stop(request["arguments"]["threadId"], reason="pause")
+            elif request["command"] in ("next", "stepIn", "stepOut"):
+                self.stop(request["arguments"]["threadId"], reason="step")
+            try:
+                await connection.writer.drain()
+            except ConnectionError:
+                # the client closed the connection without a disconnect
+                return
+            if request["command"] == "disconnect":
+                return
+
+
+async def serve_in_process(adapter: FakeAdapter, *, dispatcher=None) -> tuple[DAPConnection, asyncio.Task]:
+    """ connect a DAPConnection to the adapter over a socketpair, returns the connection and the serving task """
+    client_socket, adapter_socket = socket.socketpair()
+    adapter_reader, adapter_writer = await asyncio.open_connection(sock=adapter_socket)
+    reader, writer = await asyncio.open_connection(sock=client_socket)
+
+    task = asyncio.create_task(adapter.serve(DAPServerConnection(adapter_reader, adapter_writer)))
+    connection = DAPConnection(reader, writer, dispatcher=dispatcher)
+    connection.start_listening()
+    return connection, task
+
+
+async def serve_tcp(port, **kwargs):
+    async def _handle_client(reader, writer):
+        try:
+            await FakeAdapter(**kwargs).serve(DAPServerConnection(reader, writer))
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(_handle_client, "localhost", port)
+    print(f"fake adapter listening on port {server.sockets[0].getsockname()[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+async def serve_stdio(**kwargs):
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader()
+    await loop.connect_read_pipe(lambda: asyncio.StreamReaderProtocol(reader), sys.stdin)
+    transport, protocol = await loop.connect_write_pipe(asyncio.streams.FlowControlMixin, sys.stdout)
+    writer = asyncio.StreamWriter(transport, protocol, reader, loop)
+    await FakeAdapter(**kwargs).serve(DAPServerConnection(reader, writer))
+
+
+def add_adapter_arguments(parser):
+    parser.add_argument("--threads", type=int, default=10, help="number of threads, default 10")
+    parser.add_argument("--depth", type=int, default=20, help="frames per thread, default 20")
+    parser.add_argument("--variables", type=int, default=20, help="variables per scope, default 20")
+    parser.add_argument(
+        "--string-size",
+        type=int,
+        default=100,
+        metavar="BYTES",
+        help="size of the string values, default 100",
+    )
+
+
+def adapter_kwargs(args):
+    return dict(
+        threads=args.threads,
+        depth=args.depth,
+        variables=args.variables,
+        string_size=args.string_size,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vidb fake-adapter", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--port", type=int, default=0, help="port to listen on, default any free port")
+    parser.add_argument("--stdio", action="store_true", help="serve one client over stdin and stdout instead")
+    add_adapter_arguments(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.stdio:
+            asyncio.run(serve_stdio(**adapter_kwargs(args)))
+        else:
+            asyncio.run(serve_tcp(args.port, **adapter_kwargs(args)))
+    except KeyboardInterrupt:
+        pass
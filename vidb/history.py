@@ -0,0 +1,149 @@
+"""
+The values seen at each stop.
+
+Stepping through a loop is easier to follow when the variables that changed
+since the last stop stand out. StopHistory keeps a snapshot of the variables
+of every frame that was looked at during the last `maxlen` stops. Adapters
+give frames new ids at every stop, so a frame is recognized by its thread,
+stack level, function and file instead, and a variable by its evaluateName.
+The level tells the frames of a recursive function apart.
+
+Snapshots share structure: a scope or an expanded variable whose contents
+didn't change since the previous stop is the very same object in both
+snapshots. A long history of a loop costs little more than one stop, and
+comparing two stops skips everything they share without looking into it.
+"""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from vidb.dap import StackFrame
+from vidb.session import Session
+
+
+@dataclass(frozen=True)
+class ValueSnapshot:
+    value: str
+    type: Optional[str] = None
+    # by evaluateName, None when the children weren't loaded
+    children: Optional[dict[str, ValueSnapshot]] = None
+
+
+@dataclass
+class StopRecord:
+    frames: dict[tuple, ValueSnapshot] = field(default_factory=dict)
+
+
+def frame_key(thread_id: int, level: int, frame: StackFrame) -> tuple:
+    return (thread_id, level, frame["name"], frame.get("source", {}).get("path"))
+
+
+def changed_names(before: dict | None, after: dict | None) -> set[str]:
+    """ evaluateNames of the values in after that are new or differ from before """
+    if before is None or after is None or before is after:
+        return set()
+    changed = set()
+    for name, node in after.items():
+        previous = before.get(name)
+        if previous is node:
+            continue
+        if previous is None or (previous.value, previous.type) != (node.value, node.type):
+            changed.add(name)
+        if previous is not None:
+            changed |= changed_names(previous.children, node.children)
+    return changed
+
+
+class StopHistory:
+    def __init__(self, session: Session, *, maxlen=100):
+        self.session = session
+        self.records: deque[StopRecord] = deque(maxlen=maxlen)
+        # the record of the current stop, started by its first snapshot
+        self.current: StopRecord | None = None
+        session.subscribe(self._on_session_changed)
+
+    def _on_session_changed(self, kind, key):
+        if kind == "clear":
+            self.current = None
+
+    def previous(self, key: tuple) -> ValueSnapshot | None:
+        """ the snapshot of the frame at the last stop before this one that saw it """
+        for record in reversed(self.records):
+            if record is not self.current and key in record.frames:
+                return record.frames[key]
+        return None
+
+    def _key(self, frame_id: int) -> tuple | None:
+        frame = self.session.frames.get(frame_id)
+        if frame is None:
+            return None
+        thread_id = self.session.frame_thread[frame_id]
+        level = self.session.thread_frames[thread_id].index(frame_id)
+        return frame_key(thread_id, level, frame)
+
+    def snapshot(self, frame_id: int) -> ValueSnapshot | None:
+        """ record the loaded scopes and variables of a frame at this stop """
+        key = self._key(frame_id)
+        if key is None:
+            return None
+        frame = self.session.frames[frame_id]
+        previous = self.previous(key)
+        scopes = {}
+        for scope in self.session.scopes_of(frame_id):
+            previous_scope = previous.children.get(scope["name"]) if previous else None
+            children = self._snapshot_children(
+                scope["variablesReference"],
+                previous_scope.children if previous_scope else None,
+            )
+            scopes[scope["name"]] = self._share(ValueSnapshot(scope["name"], None, children), previous_scope)
+        snapshot = self._share(ValueSnapshot(frame["name"], None, scopes), previous)
+
+        if self.current is None:
+            self.current = StopRecord()
+            self.records.append(self.current)
+        self.current.frames[key] = snapshot
+        return snapshot
+
+    def changes(self, frame_id: int) -> set[str]:
+        """ evaluateNames of the variables of a frame that changed since the previous stop """
+        key = self._key(frame_id)
+        if key is None or self.current is None:
+            return set()
+        current = self.current.frames.get(key)
+        previous = self.previous(key)
+        if current is None or previous is None:
+            return set()
+        changed = set()
+        for name, scope in current.children.items():
+            previous_scope = previous.children.get(name)
+            if previous_scope is not None:
+                changed |= changed_names(previous_scope.children, scope.children)
+        return changed
+
+    def _snapshot_children(self, variables_reference: int, previous: dict | None) -> dict | None:
+        if variables_reference not in self.session.children:
+            return None
+        children = {}
+        for variable in self.session.children_of(variables_reference):
+            name = variable.get("evaluateName") or variable["name"]
+            previous_child = previous.get(name) if previous else None
+            grandchildren = None
+            if variable["variablesReference"]:
+                grandchildren = self._snapshot_children(
+                    variable["variablesReference"],
+                    previous_child.children if previous_child else None,
+                )
+            children[name] = self._share(
+                ValueSnapshot(variable["value"], variable.get("type"), grandchildren),
+                previous_child,
+            )
+        if previous is not None and children == previous:
+            return previous
+        return children
+
+    @staticmethod
+    def _share(node: ValueSnapshot, previous: ValueSnapshot | None) -> ValueSnapshot:
+        # children that are shared compare by identity, so this doesn't walk them again
+        return previous if previous == node else node
@@ -0,0 +1,212 @@
+"""
+Launching the debuggee under a debug adapter that vidb starts itself.
+
+    python -m vidb --launch NAME [--launch-config FILE] [--adapter COMMAND]
+
+Instead of attaching to a debuggee that's already listening on a port, vidb
+spawns the debug adapter, e.g. `python -m debugpy.adapter`, as a child
+process, speaks DAP with it over its stdin and stdout, and sends `launch` with
+the program, args, env and cwd of a profile. There are no ports to pick or to
+clean up.
+
+The profiles are the "configurations" of a VS Code style launch.json, by
+default .vscode/launch.json:
+
+    {
+        "configurations": [
+            {
+                "name": "app",
+                "type": "debugpy",
+                "program": "${workspaceFolder}/app.py",
+                "args": ["--verbose"],
+                "env": {"DEBUG": "1"},
+                "stopOnEntry": true
+            }
+        ]
+    }
+
+The adapter is picked by "type", or given as a command with "adapter" or
+--adapter. Everything else is passed on to the launch request as is.
+
+Child sessions connect to the address in their configuration when there's
+one, debugpy's point at the adapter that's already running, and otherwise
+get an adapter process of their own. The adapters are all stopped when vidb
+exits: stdin is closed, which makes the adapter end its debuggee and exit,
+and it's terminated, then killed, if it doesn't in time.
+LaunchTimer reports how long it took from starting the adapter to the first
+stop, when vidb exits.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from vidb.connection import DAPConnection
+
+
+DEFAULT_CONFIG = Path(".vscode", "launch.json")
+
+# the adapter to run for the "type" of a profile
+ADAPTERS = {
+    "python": [sys.executable, "-m", "debugpy.adapter"],
+    "debugpy": [sys.executable, "-m", "debugpy.adapter"],
+}
+
+_VARIABLE = re.compile(r"\$\{(\w+)(?::([^}]*))?\}")
+
+
+class LaunchError(Exception):
+    pass
+
+
+def _strip_comments(text: str) -> str:
+    # launch.json allows // comments on lines of their own
+    return "\n".join(line for line in text.splitlines() if not line.lstrip().startswith("//"))
+
+
+def expand(value, workspace: Path):
+    """ replace ${workspaceFolder} and ${env:NAME} in the strings of value """
+    if isinstance(value, str):
+        def _replace(match):
+            name, argument = match.groups()
+            if name == "workspaceFolder":
+                return str(workspace)
+            if name == "env":
+                return os.environ.get(argument or "", "")
+            raise LaunchError(f"unknown variable {match.group(0)}")
+
+        return _VARIABLE.sub(_replace, value)
+    if isinstance(value, list):
+        return [expand(item, workspace) for item in value]
+    if isinstance(value, dict):
+        return {key: expand(item, workspace) for key, item in value.items()}
+    return value
+
+
+def load_profile(path, name: str | None = None) -> dict:
+    """ the launch configuration called name in the launch.json at path, the first one without a name """
+    path = Path(path)
+    try:
+        profiles = json.loads(_strip_comments(path.read_text()))["configurations"]
+    except FileNotFoundError:
+        raise LaunchError(f"no launch configurations, {path} doesn't exist") from None
+    except (ValueError, KeyError) as e:
+        raise LaunchError(f"{path} isn't a launch.json: {e}") from None
+    profiles = [profile for profile in profiles if profile.get("request", "launch") == "launch"]
+    if not profiles:
+        raise LaunchError(f"{path} has no launch configurations")
+    if name is None:
+        profile = profiles[0]
+    else:
+        profile = next((profile for profile in profiles if profile.get("name") == name), None)
+        if profile is None:
+            names = ", ".join(repr(profile.get("name")) for profile in profiles)
+            raise LaunchError(f"no launch configuration {name!r} in {path}, there's {names}")
+    # .vscode/launch.json is in the workspace's .vscode
+    workspace = path.resolve().parent
+    if workspace.name == ".vscode":
+        workspace = workspace.parent
+    return expand(profile, workspace)
+
+
+def adapter_command(profile: dict, adapter: str | None = None) -> list[str]:
+    """ the command that starts the debug adapter of profile, adapter overrides it """
+    command = adapter or profile.get("adapter")
+    if command:
+        return shlex.split(command) if isinstance(command, str) else list(command)
+    if profile.get("type") in ADAPTERS:
+        return list(ADAPTERS[profile["type"]])
+    raise LaunchError(f"no adapter for type {profile.get('type')!r}, give its command with --adapter")
+
+
+def launch_configuration(profile: dict) -> dict:
+    """ the arguments of the launch request, what's only for vidb is left out """
+    return {key: value for key, value in profile.items() if key not in ("adapter", "request")}
+
+
+class AdapterProcess:
+    """ a debug adapter spawned as a child process, speaking DAP over its stdin and stdout """
+
+    def __init__(self, command: list[str], *, stderr=subprocess.DEVNULL):
+        self.command = command
+        # anything the adapter writes to stderr would garble the UI
+        self.stderr = stderr
+        self.process: asyncio.subprocess.Process | None = None
+        self.connection: DAPConnection | None = None
+
+    async def start(self, dispatcher=None) -> DAPConnection:
+        try:
+            self.process = await asyncio.create_subprocess_exec(
+                *self.command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=self.stderr,
+            )
+        except OSError as e:
+            raise LaunchError(f"can't start the debug adapter {shlex.join(self.command)}: {e}") from None
+        self.connection = DAPConnection(self.process.stdout, self.process.stdin, dispatcher=dispatcher)
+        self.connection.start_listening()
+        return self.connection
+
+    @property
+    def returncode(self) -> int | None:
+        return self.process and self.process.returncode
+
+    async def stop(self, timeout=2.0) -> int | None:
+        """ close stdin so that the adapter ends the debuggee and exits, terminate and then kill it if it doesn't """
+        if self.process is None:
+            return None
+        if self.connection is not None:
+            self.connection.close()
+        for signal in (None, self.process.terminate, self.process.kill):
+            if self.process.returncode is not None:
+                break
+            if signal is not None:
+                try:
+                    signal()
+                except ProcessLookupError:
+                    pass
+            try:
+                await asyncio.wait_for(self.process.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        return self.process.returncode
+
+
+class LaunchTimer:
+    """ times the launch, from starting the adapter to the debuggee's first stop """
+
+    EVENTS = {"initialized": "initialized", "process": "debuggee started", "stopped": "first stop"}
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.started = clock()
+        # the first time each step was reached, seconds since started
+        self.marks: dict[str, float] = {}
+
+    def mark(self, step: str):
+        self.marks.setdefault(step, self.clock() - self.started)
+
+    def watch(self, connection: DAPConnection):
+        for event_name, step in self.EVENTS.items():
+            listeners = connection.dispatcher.events.setdefault(event_name, set())
+            listeners.add(lambda event, step=step: self.mark(step))
+
+    @property
+    def first_stop(self) -> float | None:
+        return self.marks.get("first stop")
+
+    def report(self) -> str:
+        if self.first_stop is None:
+            steps = ", ".join(f"{step} after {seconds:.3f}s" for step, seconds in self.marks.items())
+            return f"launch: no stop{', ' if steps else ''}{steps}"
+        steps = ", ".join(f"{step} {seconds:.3f}s" for step, seconds in self.marks.items() if step != "first stop")
+        return f"launch to first stop: {self.first_stop:.3f}s ({steps})"
+
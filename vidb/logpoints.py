@@ -0,0 +1,120 @@
+"""
+Counting logpoint hits.
+
+A logpoint logs a message through an `output` event instead of stopping the
+debuggee, which makes it safe to put on a hot path of a production process.
+LogpointStats attributes each output event to the logpoint that produced it,
+by the source and line of the event when the adapter includes them, and
+otherwise by matching the output against the logpoint's message template.
+A template that's only expressions, e.g. "{request}", would match any
+output, so those logpoints are only counted by source and line.
+Hits are counted per logpoint and bucketed per second for the rate graph.
+"""
+from __future__ import annotations
+
+import re
+import time
+from collections import deque
+
+from vidb.breakpoints import BreakpointStore
+from vidb.dap import OutputEvent
+
+
+SPARKS = " ▁▂▃▄▅▆▇█"
+
+
+def template_pattern(log_message: str) -> re.Pattern | None:
+    """ regex matching the output of a logMessage, where each {expression} can be anything, None without any text """
+    parts = re.split(r"\{[^{}]*\}", log_message.strip())
+    if not any(part.strip() for part in parts):
+        return None
+    return re.compile(".*?".join(re.escape(part) for part in parts), re.DOTALL)
+
+
+class LogpointCounter:
+    def __init__(self, window=60):
+        self.count = 0
+        self.last_message = ""
+        self.window = window
+        # [second, hits in that second], oldest first
+        self.buckets: deque[list[int]] = deque()
+
+    def hit(self, message: str, now: float):
+        self.count += 1
+        self.last_message = message
+        second = int(now)
+        if self.buckets and self.buckets[-1][0] == second:
+            self.buckets[-1][1] += 1
+        else:
+            self.buckets.append([second, 1])
+            while self.buckets[0][0] <= second - self.window:
+                self.buckets.popleft()
+
+    def per_second(self, seconds: int, now: float) -> list[int]:
+        """ hits in each of the last `seconds` seconds, oldest first """
+        current = int(now)
+        counts = [0] * seconds
+        for second, hits in self.buckets:
+            age = current - second
+            if 0 <= age < seconds:
+                counts[seconds - 1 - age] = hits
+        return counts
+
+    def rate(self, now: float, seconds=10) -> float:
+        return sum(self.per_second(seconds, now)) / seconds
+
+    def sparkline(self, now: float, width=20) -> str:
+        counts = self.per_second(width, now)
+        peak = max(counts)
+        if not peak:
+            return SPARKS[0] * width
+        return "".join(SPARKS[round(hits / peak * (len(SPARKS) - 1))] for hits in counts)
+
+
+class LogpointStats:
+    def __init__(self, breakpoints: BreakpointStore, *, clock=time.monotonic):
+        self.breakpoints = breakpoints
+        self.clock = clock
+        self.counters: dict[tuple[str, int], LogpointCounter] = {}
+        self.client = None
+        self._keys: set[tuple[str, int]] = set()
+        self._patterns: list[tuple[tuple[str, int], re.Pattern]] = []
+        self.breakpoints.subscribe(lambda path: self._compile())
+        self._compile()
+
+    def _compile(self):
+        logpoints = self.breakpoints.logpoints()
+        self._keys = set(logpoints)
+        patterns = [(key, template_pattern(bp["logMessage"])) for key, bp in logpoints.items()]
+        self._patterns = [(key, pattern) for key, pattern in patterns if pattern is not None]
+        # counters of logpoints that were removed are kept, the hits did happen
+
+    def watch_events(self, client):
+        self.client = client
+        client.add_event_listener("output", self.handle_output_event)
+
+    def handle_output_event(self, event: OutputEvent):
+        if not self._keys:
+            return
+        body = event["body"]
+        key = self._key_of(body)
+        if key is None:
+            return
+        counter = self.counters.get(key)
+        if counter is None:
+            counter = self.counters[key] = LogpointCounter()
+        counter.hit(body["output"].rstrip("\n"), self.clock())
+
+    def _key_of(self, body):
+        path = body.get("source", {}).get("path")
+        if path and "line" in body:
+            if self.client is not None:
+                path = self.client.path_mapper.to_local(path)
+            key = (path, body["line"])
+            if key in self._keys:
+                return key
+        output = body["output"].strip()
+        for key, pattern in self._patterns:
+            if pattern.fullmatch(output):
+                return key
+        return None
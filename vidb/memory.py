@@ -0,0 +1,163 @@
+"""
+Memory of the debuggee, read a page at a time.
+
+The bytes behind a `memoryReference` (a buffer, a native object) are read
+with `readMemory` in fixed size pages as they're scrolled into view, and the
+last `max_pages` pages are kept so that scrolling back and forth doesn't read
+them again.
+
+The pages are decoded into slots of one buffer allocated up front, and an
+evicted page's slot is reused by the next one, so reading memory doesn't
+allocate as it goes. Rows are formatted straight from memoryviews of the
+buffer, and only the rows on screen.
+
+Memory changes as the debuggee runs, so the pages are dropped whenever the
+session is cleared, at every stop, step and continue, and read again.
+"""
+from __future__ import annotations
+
+import asyncio
+import binascii
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+from vidb.client import read_memory
+
+
+PAGE_SIZE = 4096
+ROW_SIZE = 16
+
+# printable ASCII as is, everything else as a dot
+_PRINTABLE = bytes(b if 0x20 <= b < 0x7f else ord(".") for b in range(256))
+
+
+@dataclass
+class MemoryPage:
+    # where the page starts, as given by the adapter
+    address: str
+    slot: int
+    # bytes that could be read from the start of the page, the rest is unreadable
+    length: int
+
+
+class MemoryPages:
+    def __init__(self, client, memory_reference: str, *, session=None, page_size=PAGE_SIZE, max_pages=64):
+        self.client = client
+        self.memory_reference = memory_reference
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.buffer = bytearray(page_size * max_pages)
+        self._view = memoryview(self.buffer)
+        # by page index, the page at offset index * page_size from the reference, least recently used first
+        self.pages: OrderedDict[int, MemoryPage] = OrderedDict()
+        self._free_slots = list(range(max_pages - 1, -1, -1))
+        self._pending: dict[int, asyncio.Task] = {}
+        self.listeners: set[Callable[[int | None], None]] = set()
+        # bumped when the pages are dropped, the reads in flight then are cancelled
+        self.epoch = 0
+        self.session = session
+        if session is not None:
+            session.subscribe(self._on_session_changed)
+
+    def _on_session_changed(self, kind, key):
+        if kind == "clear":
+            self.clear()
+
+    def clear(self):
+        """ drop every page, e.g. because the debuggee ran since they were read """
+        self.epoch += 1
+        for task in self._pending.values():
+            task.cancel()
+        self.pages.clear()
+        self._free_slots = list(range(self.max_pages - 1, -1, -1))
+        self._pending = {}
+        self.notify(None)
+
+    def close(self):
+        if self.session is not None:
+            self.session.unsubscribe(self._on_session_changed)
+
+    def subscribe(self, listener):
+        self.listeners.add(listener)
+
+    def notify(self, index):
+        for listener in list(self.listeners):
+            listener(index)
+
+    def page(self, index: int) -> MemoryPage | None:
+        page = self.pages.get(index)
+        if page is not None:
+            self.pages.move_to_end(index)
+        return page
+
+    def request(self, index: int) -> asyncio.Task | None:
+        """ read the page in the background, unless it's loaded or being read """
+        if index in self.pages:
+            return None
+        task = self._pending.get(index)
+        if task is None:
+            task = self._pending[index] = asyncio.ensure_future(self.load(index))
+        return task
+
+    async def load(self, index: int) -> MemoryPage:
+        epoch = self.epoch
+        try:
+            body = await read_memory(
+                self.client,
+                memory_reference=self.memory_reference,
+                offset=index * self.page_size,
+                count=self.page_size,
+            ) or {}
+        except Exception:
+            # unreadable, kept as an empty page so that it isn't read again at every redraw
+            body = {}
+        finally:
+            if epoch == self.epoch:
+                self._pending.pop(index, None)
+
+        previous = self.pages.pop(index, None)
+        if previous is not None:
+            slot = previous.slot
+        elif self._free_slots:
+            slot = self._free_slots.pop()
+        else:
+            slot = self.pages.popitem(last=False)[1].slot
+        start = slot * self.page_size
+        data = body.get("data", "")
+        # the decoded bytes are copied into the slot and dropped, rows are read from the slot
+        decoded = memoryview(binascii.a2b_base64(data) if data else b"")
+        length = min(len(decoded), self.page_size)
+        self._view[start:start + length] = decoded[:length]
+        page = self.pages[index] = MemoryPage(body.get("address", ""), slot, length)
+        self.notify(index)
+        return page
+
+    def view(self, offset: int, size: int) -> memoryview | None:
+        """
+        The readable bytes of [offset, offset + size) without copying, None when
+        its page isn't loaded. The range mustn't cross pages.
+        """
+        index, start = divmod(offset, self.page_size)
+        page = self.page(index)
+        if page is None:
+            return None
+        base = page.slot * self.page_size
+        return self._view[base + start:base + min(start + size, page.length)]
+
+    def address(self, offset: int) -> str:
+        page = self.pages.get(offset // self.page_size)
+        try:
+            return f"{int(page.address, 0) + offset % self.page_size:#014x}"
+        except (AttributeError, ValueError):
+            return f"{self.memory_reference}{offset:+#x}"
+
+    def format_row(self, offset: int, row_size=ROW_SIZE) -> str | None:
+        """ address, hex and ASCII of the row at offset, None while its page isn't loaded """
+        data = self.view(offset, row_size)
+        if data is None:
+            return None
+        missing = row_size - len(data)
+        hex_bytes = data.hex(" ") + " ??" * missing if len(data) else " ".join(["??"] * row_size)
+        text = data.tobytes().translate(_PRINTABLE).decode("ascii") + " " * missing
+        return f"{self.address(offset)}  {hex_bytes}  {text}"
@@ -0,0 +1,142 @@
+"""
+Event loop health monitoring for `vidb --profile`.
+
+Everything in vidb (reading the socket, the widgets' run loops and
+prompt_toolkit's rendering) shares one asyncio loop, so a single slow
+callback freezes the whole debugger. LoopMonitor puts the loop in debug mode
+to catch callbacks that run longer than slow_callback_duration, measures loop
+lag by timing a periodic sleep, and optionally runs cProfile or yappi over
+the session. The report is written when vidb exits.
+"""
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import re
+from collections import defaultdict
+
+
+PROFILERS = ["cprofile", "yappi", "none"]
+
+asyncio_logger = logging.getLogger("asyncio")
+
+
+def percentile(values, p):
+    """ nearest-rank percentile, p between 0 and 100 """
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def callback_name(handle: str) -> str:
+    """ strip what differs between calls of the same callback, so they can be aggregated """
+    handle = re.sub(r" at 0x[0-9a-f]+", "", handle)
+    return re.sub(r"Task-\d+", "Task", handle)
+
+
+class SlowCallbackHandler(logging.Handler):
+    """ collects asyncio's "Executing <handle> took N seconds" warnings """
+
+    def __init__(self):
+        super().__init__()
+        self.durations: dict[str, list[float]] = defaultdict(list)
+
+    def emit(self, record):
+        if record.msg.startswith("Executing %s took") and len(record.args) == 2:
+            handle, duration = record.args
+            self.durations[callback_name(str(handle))].append(duration)
+
+
+class LoopMonitor:
+    def __init__(self, *, slow_callback_duration=0.05, lag_interval=0.1, profiler="cprofile"):
+        assert profiler in PROFILERS
+        self.slow_callback_duration = slow_callback_duration
+        self.lag_interval = lag_interval
+        self.profiler_name = profiler
+        self.profiler = None
+        self.lags: list[float] = []
+        self.slow_callbacks = SlowCallbackHandler()
+        self._lag_task = None
+        self._previous_propagate = True
+
+    def start(self):
+        loop = asyncio.get_running_loop()
+        loop.set_debug(True)
+        loop.slow_callback_duration = self.slow_callback_duration
+
+        # the warnings would otherwise be printed over the TUI
+        asyncio_logger.addHandler(self.slow_callbacks)
+        self._previous_propagate = asyncio_logger.propagate
+        asyncio_logger.propagate = False
+
+        self._lag_task = asyncio.create_task(self._measure_lag())
+
+        if self.profiler_name == "cprofile":
+            import cProfile
+
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        elif self.profiler_name == "yappi":
+            import yappi
+
+            yappi.set_clock_type("wall")
+            yappi.start()
+            self.profiler = yappi
+
+    def stop(self):
+        if self.profiler_name == "cprofile":
+            self.profiler.disable()
+        elif self.profiler_name == "yappi":
+            self.profiler.stop()
+
+        self._lag_task.cancel()
+        asyncio_logger.removeHandler(self.slow_callbacks)
+        asyncio_logger.propagate = self._previous_propagate
+        asyncio.get_running_loop().set_debug(False)
+
+    async def _measure_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            await asyncio.sleep(self.lag_interval)
+            self.lags.append(max(0.0, loop.time() - started - self.lag_interval))
+
+    def report(self, *, top=20) -> str:
+        lines = ["Loop lag:"]
+        if self.lags:
+            lines.append(
+                "  "
+                + "  ".join(f"p{p} {percentile(self.lags, p) * 1000:.1f}ms" for p in [50, 90, 99])
+                + f"  max {max(self.lags) * 1000:.1f}ms  ({len(self.lags)} samples)"
+            )
+        else:
+            lines.append("  no samples")
+
+        lines.append("")
+        lines.append(f"Callbacks slower than {self.slow_callback_duration * 1000:.0f}ms:")
+        worst = sorted(self.slow_callbacks.durations.items(), key=lambda item: max(item[1]), reverse=True)
+        for name, durations in worst[:top]:
+            lines.append(
+                f"  max {max(durations) * 1000:7.1f}ms  total {sum(durations) * 1000:8.1f}ms"
+                f"  x{len(durations):<4} {name}"
+            )
+        if not worst:
+            lines.append("  none")
+
+        if self.profiler_name != "none":
+            lines.append("")
+            lines.append(self.profiler_report(top))
+        return "\n".join(lines)
+
+    def profiler_report(self, top) -> str:
+        out = io.StringIO()
+        if self.profiler_name == "cprofile":
+            import pstats
+
+            pstats.Stats(self.profiler, stream=out).sort_stats("cumulative").print_stats(top)
+        else:
+            out.write(f"{'ncall':>8} {'ttot':>9} {'tsub':>9}  function\n")
+            for stat in list(self.profiler.get_func_stats().sort("ttot"))[:top]:
+                out.write(f"{stat.ncall:>8} {stat.ttot:>9.3f} {stat.tsub:>9.3f}  {stat.full_name}\n")
+        return out.getvalue()
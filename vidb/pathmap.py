@@ -0,0 +1,115 @@
+"""
+Translating paths between the debuggee and the machine vidb runs on.
+
+When the debuggee runs in a container or on another machine, the paths in
+its stack frames don't exist locally. A PathMapper holds (localRoot,
+remoteRoot) pairs, in the same format as the pathMappings of VS Code's
+launch.json, compiled into two tries of path components, one per direction.
+A path is translated by its longest matching root in a single walk down the
+trie regardless of how many mappings there are, and translations are
+memoized since the same few files show up in every stack.
+
+Paths that don't match any mapping are left as they are.
+"""
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from pathlib import Path
+from typing import TypedDict
+
+
+class PathMapping(TypedDict):
+    localRoot: str
+    remoteRoot: str
+
+
+def split_path(path: str) -> tuple[str, ...]:
+    """ path components, the first one is "" for absolute paths """
+    return tuple(part for i, part in enumerate(path.replace("\\", "/").split("/")) if part or i == 0)
+
+
+def join_path(root: str, parts) -> str:
+    if not parts:
+        return root
+    separator = "\\" if "\\" in root else "/"
+    return root.rstrip("/\\") + separator + separator.join(parts)
+
+
+class PathTrie:
+    """ maps path prefixes to values, looked up by longest matching prefix """
+
+    _VALUE = object()
+
+    def __init__(self):
+        self.root: dict = {}
+
+    def insert(self, prefix: str, value):
+        node = self.root
+        for part in split_path(prefix):
+            node = node.setdefault(part, {})
+        node[self._VALUE] = value
+
+    def longest_prefix(self, path: str):
+        """ returns (value, the remaining components of path), or None if no prefix matches """
+        parts = split_path(path)
+        node = self.root
+        match = None
+        for depth, part in enumerate(parts):
+            if self._VALUE in node:
+                match = (node[self._VALUE], depth)
+            node = node.get(part)
+            if node is None:
+                break
+        else:
+            if self._VALUE in node:
+                match = (node[self._VALUE], len(parts))
+        if match is None:
+            return None
+        value, depth = match
+        return value, parts[depth:]
+
+
+class PathMapper:
+    def __init__(self, mappings: list[PathMapping] = (), *, cache_size=4096):
+        self.mappings = list(mappings)
+        self._to_local = PathTrie()
+        self._to_remote = PathTrie()
+        for mapping in self.mappings:
+            self._to_local.insert(mapping["remoteRoot"], mapping["localRoot"])
+            self._to_remote.insert(mapping["localRoot"], mapping["remoteRoot"])
+
+        self.to_local = lru_cache(maxsize=cache_size)(self._translate_to_local)
+        self.to_remote = lru_cache(maxsize=cache_size)(self._translate_to_remote)
+
+    def __bool__(self):
+        return bool(self.mappings)
+
+    def _translate_to_local(self, remote_path: str) -> str:
+        """ the local path of a path in the debuggee """
+        return self._translate(self._to_local, remote_path)
+
+    def _translate_to_remote(self, local_path: str) -> str:
+        """ the path in the debuggee of a local path """
+        return self._translate(self._to_remote, local_path)
+
+    @staticmethod
+    def _translate(trie: PathTrie, path: str) -> str:
+        match = trie.longest_prefix(path)
+        if match is None:
+            return path
+        root, rest = match
+        return join_path(root, rest)
+
+    @classmethod
+    def from_file(cls, path) -> PathMapper:
+        """ load a JSON list of {"localRoot": ..., "remoteRoot": ...} """
+        return cls(json.loads(Path(path).read_text()))
+
+
+def parse_mapping(text: str) -> PathMapping:
+    """ parse a LOCAL=REMOTE command line argument """
+    local_root, separator, remote_root = text.partition("=")
+    if not separator or not local_root or not remote_root:
+        raise ValueError(f"expected LOCAL=REMOTE, got {text!r}")
+    return {"localRoot": local_root, "remoteRoot": remote_root}
@@ -0,0 +1,215 @@
+"""
+Recording DAP sessions and replaying them.
+
+    python -m vidb PORT --record LOG
+    python -m vidb replay LOG [--port PORT] [--max-speed]
+
+A RecordingDispatcher appends every message going through a DAPConnection,
+with a timestamp, including the requests the adapter sends to vidb (e.g.
+`startDebugging`) and vidb's responses to them, to an append-only JSON lines log (gzipped if the file name
+ends in .gz). Serializing and writing is done by a background thread so that
+recording doesn't slow down the event loop.
+
+ReplayServer plays the adapter side of a recorded session back to a client,
+either with the original timing or as fast as possible. The adapter's
+requests are sent again, and the client is expected to answer them. That makes slowness
+seen in a real session reproducible, and lets fixes be benchmarked against
+it.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+from vidb.connection import DAPServerConnection, Dispatcher
+from vidb.dap import Event, ProtocolMessage, Request, Response
+
+
+_STOP = object()
+
+# the requests that DAP has the adapter send to the client, their commands tell them apart in a log
+REVERSE_REQUESTS = {"runInTerminal", "startDebugging"}
+
+
+def _open_log(path, mode):
+    if str(path).endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+class SessionRecorder:
+    """ appends (timestamp, message) lines to a log from a background thread """
+
+    def __init__(self, path):
+        self.path = path
+        self.started = time.monotonic()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = threading.Thread(target=self._write_messages, name="vidb-recorder", daemon=True)
+        self._writer.start()
+
+    def record(self, message: ProtocolMessage):
+        self._queue.put((time.monotonic() - self.started, message))
+
+    def close(self):
+        """ write out the messages that are still queued and stop the writer """
+        self._queue.put(_STOP)
+        self._writer.join()
+
+    def _write_messages(self):
+        with _open_log(self.path, "at") as log:
+            while True:
+                item = self._queue.get()
+                # write everything that's queued before flushing
+                while item is not _STOP:
+                    timestamp, message = item
+                    log.write(json.dumps([round(timestamp, 6), message], separators=(",", ":")))
+                    log.write("\n")
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                log.flush()
+                if item is _STOP:
+                    return
+
+
+def session_log_path(path, number: int) -> str:
+    """ the log of the number-th connection, e.g. of a subprocess: session.2.jsonl.gz for session.jsonl.gz """
+    if number == 1:
+        return str(path)
+    path = Path(path)
+    stem, dot, suffixes = path.name.partition(".")
+    return str(path.with_name(f"{stem}.{number}{dot}{suffixes}"))
+
+
+class RecordingDispatcher(Dispatcher):
+    """ Dispatcher that also records every message to a SessionRecorder """
+
+    def __init__(self, recorder: SessionRecorder):
+        super().__init__()
+        self.recorder = recorder
+
+    def handle_request(self, message: Request) -> asyncio.Future:
+        self.recorder.record(message)
+        return super().handle_request(message)
+
+    def handle_response(self, message: Response):
+        self.recorder.record(message)
+        return super().handle_response(message)
+
+    def handle_event(self, message: Event):
+        self.recorder.record(message)
+        return super().handle_event(message)
+
+    def handle_reverse_request(self, message: Request):
+        self.recorder.record(message)
+        return super().handle_reverse_request(message)
+
+    def handle_reverse_response(self, message: Response):
+        self.recorder.record(message)
+        return super().handle_reverse_response(message)
+
+
+def read_log(path) -> Iterator[tuple[float, ProtocolMessage]]:
+    with _open_log(path, "rt") as log:
+        for line in log:
+            if line.strip():
+                timestamp, message = json.loads(line)
+                yield timestamp, message
+
+
+class ReplayError(Exception):
+    pass
+
+
+class ReplayServer:
+    """
+    Serve the adapter side of a recorded session.
+
+    The client is expected to send the same requests in the same order as in
+    the recording. Recorded responses are rewritten to answer the live
+    request seq, events are sent as they were recorded. Recorded reverse
+    requests are sent as they were, and the client is expected to answer
+    them where it did in the recording.
+    """
+
+    def __init__(self, messages: list[tuple[float, ProtocolMessage]], *, max_speed=False):
+        self.messages = messages
+        self.max_speed = max_speed
+
+    @classmethod
+    def from_log(cls, path, **kwargs):
+        return cls(list(read_log(path)), **kwargs)
+
+    async def serve(self, connection: DAPServerConnection):
+        loop = asyncio.get_running_loop()
+        request_seqs: dict[int, int] = {}
+        started = loop.time()
+        first_timestamp = self.messages[0][0] if self.messages else 0.0
+
+        for timestamp, message in self.messages:
+            if not self.max_speed:
+                await asyncio.sleep(started + (timestamp - first_timestamp) - loop.time())
+
+            reverse = message.get("command") in REVERSE_REQUESTS
+            match message["type"]:
+                case "request" if reverse:
+                    connection.send_message(message)
+
+                case "response" if reverse:
+                    response = await connection.recv_message()
+                    if response["type"] != "response" or response.get("request_seq") != message["request_seq"]:
+                        raise ReplayError(
+                            f"expected the response to {message['command']!r}, got {response['type']} {response['command']!r}"
+                        )
+
+                case "request":
+                    request = await connection.recv_message()
+                    if request["command"] != message["command"]:
+                        raise ReplayError(
+                            f"expected {message['command']!r} request, got {request['command']!r}"
+                        )
+                    request_seqs[message["seq"]] = request["seq"]
+
+                case "response":
+                    connection.send_message(
+                        dict(message, request_seq=request_seqs[message["request_seq"]]),
+                    )
+
+                case "event":
+                    connection.send_message(message)
+
+
+async def serve_replay(path, port, *, max_speed=False):
+    replay = ReplayServer.from_log(path, max_speed=max_speed)
+
+    async def _handle_client(reader, writer):
+        try:
+            await replay.serve(DAPServerConnection(reader, writer))
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(_handle_client, "localhost", port)
+    print(f"replaying {path} on port {server.sockets[0].getsockname()[1]}")
+    async with server:
+        await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vidb replay", description="Serve a recorded DAP session")
+    parser.add_argument("log")
+    parser.add_argument("--port", type=int, default=0, help="port to listen on, default any free port")
+    parser.add_argument("--max-speed", action="store_true", help="don't wait for the original timing")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve_replay(args.log, args.port, max_speed=args.max_speed))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,177 @@
+"""
+Low frequency sampling profiler built on pause/stackTrace/continue.
+
+    python -m vidb profile PORT [--host HOST] [--interval SECONDS] [--duration SECONDS]
+                                [--max-overhead FRACTION] [--output FILE]
+
+Every interval the debuggee is paused, the stacks of all threads are fetched
+concurrently and the process is resumed right away. The samples are
+aggregated into collapsed stacks (`root;caller;leaf count` lines) that can
+be fed to flamegraph.pl or speedscope.
+
+Each sample pauses the process, so the interval is stretched whenever the
+time spent paused would exceed --max-overhead of the wall clock time.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+
+from vidb.client import DAPClient, disconnect
+from vidb.connection import DAPConnection
+from vidb.dap import StackFrame
+from vidb.dump import paused
+from vidb.session import Session
+from vidb.stacks import load_all_threads
+
+
+def frame_label(frame: StackFrame) -> str:
+    path = frame.get("source", {}).get("path")
+    file_name = Path(path).name if path else "?"
+    # collapsed stacks use ";" as frame separator and " " before the count
+    return f"{frame['name']} ({file_name}:{frame['line']})".replace(";", ":")
+
+
+class Profile:
+    def __init__(self):
+        self.stacks: Counter[str] = Counter()
+        self.pauses: list[float] = []
+        self.started = time.perf_counter()
+
+    def add_sample(self, session: Session, pause_duration: float):
+        self.pauses.append(pause_duration)
+        for thread_id in session.thread_frames:
+            frames = session.frames_of(thread_id)
+            self.stacks[";".join(frame_label(frame) for frame in reversed(frames))] += 1
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    @property
+    def overhead(self) -> float:
+        """ fraction of the wall clock time the process has spent paused """
+        return sum(self.pauses) / self.elapsed if self.pauses else 0.0
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def report(self) -> str:
+        if not self.pauses:
+            return "no samples collected"
+        return (
+            f"{len(self.pauses)} samples in {self.elapsed:.1f}s, "
+            f"pause per sample: mean {statistics.mean(self.pauses) * 1000:.1f}ms "
+            f"max {max(self.pauses) * 1000:.1f}ms, "
+            f"overhead {self.overhead:.1%}"
+        )
+
+
+def next_delay(interval: float, pause_duration: float, max_overhead: float) -> float:
+    """
+    How long to wait before the next sample.
+
+    Normally the rest of the interval, but stretched so that the pause stays
+    within max_overhead of the time between samples.
+    """
+    capped = pause_duration * (1 - max_overhead) / max_overhead
+    return max(interval - pause_duration, capped, 0.0)
+
+
+async def sample(client: DAPClient) -> tuple[Session, float]:
+    """ take one sample, returns the session holding every thread's stack and the pause duration """
+    session = Session()
+    thread_ids = [thread["id"] for thread in await session.load_threads(client)]
+    async with paused(client, thread_ids) as timer:
+        await load_all_threads(client, session, thread_ids)
+    return session, timer.duration
+
+
+async def profile(
+    client: DAPClient,
+    *,
+    interval=0.1,
+    duration=None,
+    samples=None,
+    max_overhead=0.05,
+    result=None,
+) -> Profile:
+    """ sample until duration seconds have elapsed, or samples were taken, or cancelled """
+    result = result or Profile()
+    if not result.pauses:
+        result.started = time.perf_counter()
+    while (duration is None or result.elapsed < duration) and (
+        samples is None or len(result.pauses) < samples
+    ):
+        session, pause_duration = await sample(client)
+        result.add_sample(session, pause_duration)
+        if samples is None or len(result.pauses) < samples:
+            await asyncio.sleep(next_delay(interval, pause_duration, max_overhead))
+    return result
+
+
+async def run(host, port, *, output=None, **kwargs):
+    connection = await DAPConnection.from_tcp(host, port)
+    client = DAPClient(connection=connection)
+    result = Profile()
+    try:
+        await client.initialize()
+        try:
+            await profile(client, result=result, **kwargs)
+        except asyncio.CancelledError:
+            pass
+        await disconnect(client, terminate_debuggee=False)
+    finally:
+        connection.close()
+
+        if output:
+            Path(output).write_text(result.collapsed())
+        else:
+            sys.stdout.write(result.collapsed())
+        print(result.report(), file=sys.stderr)
+
+
+def fraction(value: str) -> float:
+    """ an argparse type for a fraction strictly between 0 and 1 """
+    try:
+        result = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} isn't a number") from None
+    if not 0 < result < 1:
+        raise argparse.ArgumentTypeError(f"{value} isn't between 0 and 1")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vidb profile", description=__doc__.strip().splitlines()[0])
+    parser.add_argument("port", type=int)
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--interval", type=float, default=0.1, help="seconds between samples")
+    parser.add_argument("--duration", type=float, help="stop after this many seconds, default until Ctrl-C")
+    parser.add_argument(
+        "--max-overhead",
+        type=fraction,
+        default=0.05,
+        help="maximum fraction of time the process may spend paused, default 0.05",
+    )
+    parser.add_argument("--output", help="write the collapsed stacks to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(
+            run(
+                args.host,
+                args.port,
+                output=args.output,
+                interval=args.interval,
+                duration=args.duration,
+                max_overhead=args.max_overhead,
+            )
+        )
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,310 @@
+"""
+Normalized debuggee state shared by every frontend.
+
+The session keeps each DAP object once, keyed by its id, with indexes from
+thread to frames, frame to scopes and variablesReference to children. Widgets
+(or a headless frontend) read from the session and subscribe to it for
+updates instead of owning the data themselves.
+
+The thread list is fetched once and then kept up to date from `thread`
+events. It's only fetched again (resynced) when a thread turns up that the
+events didn't mention.
+
+An `invalidated` event only drops the parts of the cache it names, e.g. the
+variables of one frame after a setVariable, and notifies `invalidated` with
+the area and the thread or frame, so that the widgets showing them reload.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Callable
+
+from vidb.client import scopes, stack_trace, threads, variables
+from vidb.dap import (
+    InvalidatedEvent,
+    Scope,
+    StackFrame,
+    StoppedEvent,
+    Thread,
+    ThreadEvent,
+    Variable,
+)
+
+
+Listener = Callable[[str, object], None]
+
+
+class Session:
+    threads: dict[int, Thread]
+    frames: dict[int, StackFrame]
+    scopes: dict[int, Scope]
+
+    thread_frames: dict[int, list[int]]
+    # threads of which only the top of the stack was loaded
+    partial_stacks: set[int]
+    frame_thread: dict[int, int]
+    frame_scopes: dict[int, list[int]]
+    children: dict[int, list[Variable]]
+
+    def __init__(self):
+        self.listeners: set[Listener] = set()
+        self._pending: dict[tuple[str, object], asyncio.Future] = {}
+        self._resync: asyncio.Future | None = None
+        self.threads = {}
+        self.clear(notify=False)
+
+    def clear(self, notify=True):
+        """ forget everything about the paused state, e.g. when the debuggee resumes """
+        self.frames = {}
+        self.scopes = {}
+        self.thread_frames = {}
+        self.partial_stacks = set()
+        self.frame_thread = {}
+        self.frame_scopes = {}
+        self.children = {}
+        self._pending = {key: future for key, future in self._pending.items() if key[0] == "threads"}
+        if notify:
+            self.notify("clear", None)
+
+    def watch_events(self, client):
+        """ clear the paused state whenever the debuggee stops or resumes, and follow threads coming and going """
+        client.add_event_listener("stopped", lambda event: self.handle_stopped_event(client, event))
+        client.add_event_listener("continued", lambda event: self.clear())
+        client.add_event_listener("thread", self.handle_thread_event)
+        client.add_event_listener("invalidated", self.handle_invalidated_event)
+
+    def handle_stopped_event(self, client, event: StoppedEvent):
+        self.clear()
+        thread_id = event["body"].get("threadId")
+        if self.threads and thread_id is not None and thread_id not in self.threads:
+            # a thread event got lost, or the adapter doesn't send them
+            self._resync = asyncio.ensure_future(self.load_threads(client, refresh=True))
+
+    def handle_thread_event(self, event: ThreadEvent):
+        thread_id = event["body"]["threadId"]
+        if event["body"]["reason"] == "started":
+            # the name is only known after the next resync
+            self.add_thread(Thread(id=thread_id, name=""))
+        elif event["body"]["reason"] == "exited":
+            self.remove_thread(thread_id)
+
+    def handle_invalidated_event(self, event: InvalidatedEvent):
+        body = event.get("body", {})
+        areas = body.get("areas") or ["all"]
+        frame_id = body.get("stackFrameId")
+        thread_id = body.get("threadId")
+        if frame_id is not None:
+            if frame_id not in self.frame_thread:
+                # a frame of an earlier stop, already dropped, not a reason to drop everything
+                return
+            # the threadId is ignored when there's a stackFrameId
+            thread_id = self.frame_thread[frame_id]
+        if "all" in areas:
+            areas = ["threads", "stacks", "variables"]
+        if "threads" in areas:
+            self.notify("invalidated", ("threads", None))
+        if "stacks" in areas:
+            # the frames are gone, and their variables with them
+            self.invalidate_stacks(thread_id)
+        elif "variables" in areas:
+            if frame_id is not None:
+                self.invalidate_variables([frame_id])
+            elif thread_id is not None:
+                self.invalidate_variables(self.thread_frames.get(thread_id, []))
+            else:
+                self.invalidate_variables(None)
+
+    ###################
+    ## Subscriptions ##
+    ###################
+
+    def subscribe(self, listener: Listener):
+        self.listeners.add(listener)
+
+    def unsubscribe(self, listener: Listener):
+        self.listeners.discard(listener)
+
+    def notify(self, kind: str, key):
+        for listener in list(self.listeners):
+            listener(kind, key)
+
+    #############
+    ## Updates ##
+    #############
+
+    def set_threads(self, thread_list: list[Thread]):
+        self.threads = {t["id"]: t for t in thread_list}
+        self.notify("threads", None)
+
+    def add_thread(self, thread: Thread):
+        self.threads.setdefault(thread["id"], thread)
+        self.notify("threads", thread["id"])
+
+    def remove_thread(self, thread_id: int):
+        if self.threads.pop(thread_id, None) is None:
+            return
+        for frame_id in self.thread_frames.pop(thread_id, []):
+            self.frames.pop(frame_id, None)
+            self.frame_thread.pop(frame_id, None)
+        self.partial_stacks.discard(thread_id)
+        self.notify("threads", thread_id)
+
+    def set_stack_trace(self, thread_id: int, frame_list: list[StackFrame], *, partial=False):
+        if partial:
+            self.partial_stacks.add(thread_id)
+        else:
+            self.partial_stacks.discard(thread_id)
+        for frame_id in self.thread_frames.get(thread_id, []):
+            self.frames.pop(frame_id, None)
+            self.frame_thread.pop(frame_id, None)
+        for frame in frame_list:
+            self.frames[frame["id"]] = frame
+            self.frame_thread[frame["id"]] = thread_id
+        self.thread_frames[thread_id] = [frame["id"] for frame in frame_list]
+        self.notify("frames", thread_id)
+
+    def set_scopes(self, frame_id: int, scope_list: list[Scope]):
+        for scope in scope_list:
+            self.scopes[scope["variablesReference"]] = scope
+        self.frame_scopes[frame_id] = [scope["variablesReference"] for scope in scope_list]
+        self.notify("scopes", frame_id)
+
+    def set_variables(self, variables_reference: int, variable_list: list[Variable]):
+        self.children[variables_reference] = variable_list
+        self.notify("variables", variables_reference)
+
+    ##################
+    ## Invalidation ##
+    ##################
+
+    def invalidate_stacks(self, thread_id: int | None = None):
+        """ forget the stack of a thread, or of every thread, and everything under it """
+        thread_ids = list(self.thread_frames) if thread_id is None else [thread_id]
+        for thread_id_ in thread_ids:
+            frame_ids = self.thread_frames.pop(thread_id_, [])
+            self.partial_stacks.discard(thread_id_)
+            self._drop_pending("frames", lambda key: key[0] == thread_id_)
+            self._drop_frame_variables(frame_ids)
+            for frame_id in frame_ids:
+                self.frames.pop(frame_id, None)
+                self.frame_thread.pop(frame_id, None)
+                for ref in self.frame_scopes.pop(frame_id, []):
+                    self.scopes.pop(ref, None)
+                self._drop_pending("scopes", lambda key: key == frame_id)
+        self.notify("invalidated", ("stacks", thread_id))
+
+    def invalidate_variables(self, frame_ids: list[int] | None = None):
+        """ forget the variables of some frames, or all of them, the scopes are kept """
+        if frame_ids is None:
+            self.children = {}
+            self._drop_pending("variables", lambda key: True)
+            self.notify("invalidated", ("variables", None))
+            return
+        self._drop_frame_variables(frame_ids)
+        for frame_id in frame_ids:
+            self.notify("invalidated", ("variables", frame_id))
+
+    def _drop_frame_variables(self, frame_ids):
+        stack = [ref for frame_id in frame_ids for ref in self.frame_scopes.get(frame_id, [])]
+        while stack:
+            ref = stack.pop()
+            self._drop_pending("variables", lambda key: key == ref)
+            # expanded children go too, they were fetched from the same state
+            for variable in self.children.pop(ref, []):
+                if variable["variablesReference"]:
+                    stack.append(variable["variablesReference"])
+
+    def _drop_pending(self, kind, matches):
+        """ results of loads that are still in flight are thrown away when they arrive """
+        for key in [key for key in self._pending if key[0] == kind and matches(key[1])]:
+            del self._pending[key]
+
+    #############
+    ## Lookups ##
+    #############
+
+    def frames_of(self, thread_id: int) -> list[StackFrame]:
+        return [self.frames[frame_id] for frame_id in self.thread_frames.get(thread_id, [])]
+
+    def scopes_of(self, frame_id: int) -> list[Scope]:
+        return [self.scopes[ref] for ref in self.frame_scopes.get(frame_id, [])]
+
+    def children_of(self, variables_reference: int) -> list[Variable]:
+        return self.children.get(variables_reference, [])
+
+    #############
+    ## Loaders ##
+    #############
+
+    async def _load_once(self, kind, key, fetch, store):
+        """
+        Fetch and store a value unless it's already being fetched.
+
+        Concurrent loads of the same key share one request.
+        """
+        pending_key = (kind, key)
+        pending = self._pending.get(pending_key)
+        if pending is None:
+            async def _fetch():
+                value = await fetch()
+                # a clear() while the request was in flight makes the value stale
+                if self._pending.get(pending_key) is pending:
+                    store(value)
+
+            def _done(future):
+                if self._pending.get(pending_key) is future:
+                    del self._pending[pending_key]
+
+            pending = self._pending[pending_key] = asyncio.ensure_future(_fetch())
+            pending.add_done_callback(_done)
+        await asyncio.shield(pending)
+
+    async def load_threads(self, client, *, refresh=False) -> list[Thread]:
+        if refresh or not self.threads:
+            async def _fetch():
+                return (await threads(client))["threads"]
+
+            await self._load_once("threads", None, _fetch, self.set_threads)
+        return list(self.threads.values())
+
+    async def load_stack_trace(self, client, thread_id: int, *, refresh=False, levels=None) -> list[StackFrame]:
+        """ with levels, only the top of the stack is loaded, unless the whole stack already is """
+        partial = levels is not None
+        if refresh or thread_id not in self.thread_frames or (not partial and thread_id in self.partial_stacks):
+            async def _fetch():
+                return (await stack_trace(client, thread_id=thread_id, levels=levels))["stackFrames"]
+
+            def _store(frame_list):
+                if partial and thread_id in self.thread_frames and thread_id not in self.partial_stacks:
+                    # the whole stack arrived first
+                    return
+                self.set_stack_trace(thread_id, frame_list, partial=partial)
+
+            await self._load_once("frames", (thread_id, levels), _fetch, _store)
+        return self.frames_of(thread_id)
+
+    async def load_scopes(self, client, frame_id: int, *, refresh=False) -> list[Scope]:
+        if refresh or frame_id not in self.frame_scopes:
+            async def _fetch():
+                return (await scopes(client, frame_id=frame_id))["scopes"]
+
+            await self._load_once(
+                "scopes",
+                frame_id,
+                _fetch,
+                lambda scope_list: self.set_scopes(frame_id, scope_list),
+            )
+        return self.scopes_of(frame_id)
+
+    async def load_variables(self, client, variables_reference: int, *, refresh=False) -> list[Variable]:
+        if refresh or variables_reference not in self.children:
+            async def _fetch():
+                return (await variables(client, variables_reference=variables_reference))["variables"]
+
+            await self._load_once(
+                "variables",
+                variables_reference,
+                _fetch,
+                lambda variable_list: self.set_variables(variables_reference, variable_list),
+            )
+        return self.children_of(variables_reference)
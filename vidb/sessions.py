@@ -0,0 +1,210 @@
+"""
+Several debug sessions in one vidb, e.g. a service and its worker processes.
+
+The debug adapter asks for a session per subprocess with a `startDebugging`
+request. SessionManager opens another connection to the adapter for it and
+attaches or launches with the configuration the adapter gave, all on the
+same event loop. When the configuration has a `connect` address, as
+debugpy's do, it's where the child session has to connect: the adapter that
+is already running listens there and knows the subprocess.
+
+The UI only ever shows one session at a time. Its widgets are given the
+manager's SessionClient, which stands in for the client of the selected
+session: requests go to that session, and only that session's events are
+passed on. Switching sessions clears the one Session cache and reloads it
+from the newly selected session. Sessions in the background keep no cache
+and render nothing. Their events are dropped after their state (running,
+stopped, terminated) is noted for the sessions list.
+
+A child session that terminates, or whose connection is lost, is closed and
+dropped, so a pool of short-lived workers doesn't pile up connections. The
+main session stays listed, but a session that ended can't be switched to.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from itertools import count
+from typing import Callable, Optional
+
+from vidb.client import DAPClient
+from vidb.dap import StartDebuggingRequestArguments
+
+
+def connect_address(configuration: dict | None) -> tuple[str, int] | None:
+    """ the host and port that a child session's configuration says to connect to, if any """
+    connect = (configuration or {}).get("connect")
+    if not isinstance(connect, dict) or "port" not in connect:
+        return None
+    return connect.get("host", "localhost"), int(connect["port"])
+
+
+@dataclass(eq=False)
+class DebugSession:
+    id: int
+    name: str
+    client: DAPClient
+    parent: Optional[DebugSession] = None
+    state: str = "running"
+
+    @property
+    def ended(self) -> bool:
+        return self.state in ("terminated", "failed")
+
+
+class SessionClient:
+    """ the client of the selected session, with event listeners that stay across switches """
+
+    def __init__(self, manager: SessionManager):
+        self.manager = manager
+        self.listeners: dict[str, set[Callable]] = {}
+
+    @property
+    def client(self) -> DAPClient:
+        return self.manager.current.client
+
+    @property
+    def capabilities(self):
+        return self.client.capabilities
+
+    @property
+    def path_mapper(self):
+        return self.client.path_mapper
+
+    @property
+    def server_support(self):
+        return self.client.server_support
+
+    def remote_call(self, request_cls, command, arguments):
+        return self.client.remote_call(request_cls, command, arguments)
+
+    def initialize(self, configure=None, **kwargs):
+        return self.client.initialize(configure, **kwargs)
+
+    def wait_for_event(self, event_name):
+        event = asyncio.Event()
+        listener = lambda e: event.set()
+        self.add_event_listener(event_name, listener)
+
+        async def _waiter():
+            await event.wait()
+            self.remove_event_listener(event_name, listener)
+
+        return _waiter()
+
+    def add_event_listener(self, event_name, listener):
+        if event_name not in self.listeners:
+            self.listeners[event_name] = set()
+            for session in self.manager.sessions.values():
+                self.manager._forward(session, event_name)
+        self.listeners[event_name].add(listener)
+
+    def remove_event_listener(self, event_name, listener):
+        self.listeners.get(event_name, set()).discard(listener)
+
+    def dispatch(self, session: DebugSession, event):
+        if session is not self.manager.current:
+            return
+        for listener in list(self.listeners.get(event["event"], ())):
+            listener(event)
+
+
+class SessionManager:
+    def __init__(self, open_connection, *, session=None, breakpoints=None):
+        self.open_connection = open_connection
+        # the shared cache of the selected session
+        self.session = session
+        self.breakpoints = breakpoints
+        self.sessions: dict[int, DebugSession] = {}
+        self.current: DebugSession | None = None
+        self.client = SessionClient(self)
+        self.listeners: set[Callable[[str, DebugSession], None]] = set()
+        self._ids = count(1)
+        self._starting: set[asyncio.Task] = set()
+
+    def subscribe(self, listener):
+        self.listeners.add(listener)
+
+    def notify(self, kind, debug_session):
+        for listener in list(self.listeners):
+            listener(kind, debug_session)
+
+    def add(self, client: DAPClient, name: str, parent: DebugSession | None = None) -> DebugSession:
+        debug_session = DebugSession(next(self._ids), name, client, parent)
+        self.sessions[debug_session.id] = debug_session
+        if self.current is None:
+            self.current = debug_session
+        for event_name in self.client.listeners:
+            self._forward(debug_session, event_name)
+        for event_name, state in [("stopped", "stopped"), ("continued", "running")]:
+            client.add_event_listener(event_name, lambda event, state=state: self._set_state(debug_session, state))
+        client.add_event_listener("terminated", lambda event: self._end(debug_session))
+        client.handle_request(
+            "startDebugging",
+            lambda arguments: self.handle_start_debugging(debug_session, arguments),
+        )
+        self.notify("added", debug_session)
+        return debug_session
+
+    def _forward(self, debug_session: DebugSession, event_name: str):
+        debug_session.client.add_event_listener(event_name, lambda event: self.client.dispatch(debug_session, event))
+
+    def _set_state(self, debug_session: DebugSession, state: str):
+        if debug_session.state != state and not debug_session.ended:
+            debug_session.state = state
+            self.notify("state", debug_session)
+
+    def _end(self, debug_session: DebugSession, state="terminated"):
+        self._set_state(debug_session, state)
+        if debug_session.parent is None or debug_session.id not in self.sessions:
+            return
+        del self.sessions[debug_session.id]
+        debug_session.client.connection.close()
+        # the sessions list moves on to the parent when it was showing this one
+        self.notify("removed", debug_session)
+
+    async def handle_start_debugging(self, parent: DebugSession, arguments: StartDebuggingRequestArguments):
+        """ answered right away, the child session is started in the background """
+        if arguments["request"] not in ("attach", "launch"):
+            raise Exception(f"vidb can't {arguments['request']} child sessions")
+        configuration = arguments.get("configuration", {})
+        connection = await self.open_connection(configuration)
+        client = DAPClient(connection=connection, path_mapper=parent.client.path_mapper)
+        name = configuration.get("name") or f"{parent.name}/{len(self.sessions) + 1}"
+        child = self.add(client, name, parent)
+        task = asyncio.ensure_future(self._start(child, arguments["request"], configuration))
+        self._starting.add(task)
+        task.add_done_callback(self._starting.discard)
+        return None
+
+    async def _start(self, child: DebugSession, request, configuration):
+        async def configure():
+            if self.breakpoints is not None:
+                await self.breakpoints.send_all(child.client)
+
+        try:
+            await child.client.initialize(configure, request=request, configuration=configuration)
+        except Exception:
+            self._end(child, "failed")
+            raise
+
+    def can_switch(self, debug_session: DebugSession) -> bool:
+        """ a session that ended has nothing to show, and its connection may be closed """
+        return debug_session is self.current or (not debug_session.ended and debug_session.id in self.sessions)
+
+    async def switch(self, debug_session: DebugSession) -> bool:
+        """ show debug_session, the cache is reloaded from it, False when it can't be shown """
+        if not self.can_switch(debug_session):
+            return False
+        if debug_session is self.current:
+            return True
+        self.current = debug_session
+        if self.session is not None:
+            self.session.clear()
+            self.session.set_threads([])
+        if self.breakpoints is not None:
+            # the breakpoints and their results are those of the session shown
+            self.breakpoints.reset()
+            await self.breakpoints.sync(self.client)
+        self.notify("switched", debug_session)
+        return True
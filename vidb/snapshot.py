@@ -0,0 +1,250 @@
+"""
+Offline debug snapshots.
+
+    python -m vidb capture PORT -o SNAPSHOT [--host HOST] [--depth DEPTH]
+    python -m vidb open SNAPSHOT
+
+`capture` pauses the debuggee, concurrently loads the threads, stacks, scopes
+and variables up to --depth levels, and any source that only exists in the
+debugger (sourceReference > 0), then resumes it. Sources that have a path are
+fetched after resuming since they don't need the process to be paused. The
+result is written as gzipped JSON.
+
+`open` runs the TUI against a SnapshotConnection, a stand-in for
+DAPConnection that answers requests from the snapshot, so the investigation
+can continue with no process paused.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gzip
+import json
+import sys
+from itertools import count
+from pathlib import Path
+
+from vidb.client import DAPClient, disconnect, source
+from vidb.connection import Dispatcher, DAPConnection
+from vidb.dap import Request, Response, Source
+from vidb.dump import paused
+from vidb.session import Session
+from vidb.stacks import load_all_threads
+
+
+SNAPSHOT_VERSION = 1
+
+
+def source_key(src: Source) -> str:
+    if src.get("sourceReference"):
+        return f"ref:{src['sourceReference']}"
+    return f"path:{src.get('path')}"
+
+
+def referenced_sources(session: Session) -> dict[str, Source]:
+    sources = {}
+    for frame in session.frames.values():
+        if "source" in frame:
+            sources.setdefault(source_key(frame["source"]), frame["source"])
+    return sources
+
+
+async def load_sources(client, sources: dict[str, Source]) -> dict[str, str]:
+    """ fetch the content of the sources concurrently, skipping those that can't be fetched """
+    keys = list(sources)
+    results = await asyncio.gather(
+        *[source(client, source=sources[key]) for key in keys],
+        return_exceptions=True,
+    )
+    contents = {}
+    for key, result in zip(keys, results):
+        if isinstance(result, Exception):
+            path = sources[key].get("path")
+            if path and Path(path).is_file():
+                contents[key] = Path(path).read_text(errors="replace")
+        else:
+            contents[key] = result["content"]
+    return contents
+
+
+def session_to_snapshot(session: Session, *, capabilities=None, sources=None) -> dict:
+    return {
+        "version": SNAPSHOT_VERSION,
+        "capabilities": capabilities or {},
+        "threads": list(session.threads.values()),
+        "stackTraces": {thread_id: session.frames_of(thread_id) for thread_id in session.thread_frames},
+        "scopes": {frame_id: session.scopes_of(frame_id) for frame_id in session.frame_scopes},
+        "variables": session.children,
+        "sources": sources or {},
+    }
+
+
+def save(path, snapshot: dict):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        json.dump(snapshot, f, separators=(",", ":"))
+
+
+def load(path) -> dict:
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        snapshot = json.load(f)
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version {snapshot.get('version')}")
+    # JSON object keys are always strings
+    for key in ["stackTraces", "scopes", "variables"]:
+        snapshot[key] = {int(k): v for k, v in snapshot[key].items()}
+    return snapshot
+
+
+async def capture(client: DAPClient, *, depth=1):
+    """ returns the snapshot and the PauseTimer of the pause """
+    session = Session()
+    thread_ids = [thread["id"] for thread in await session.load_threads(client)]
+
+    async with paused(client, thread_ids) as timer:
+        await load_all_threads(client, session, thread_ids, depth=depth)
+        # sourceReferences are only valid while the process is paused
+        sources = referenced_sources(session)
+        contents = await load_sources(
+            client,
+            {key: src for key, src in sources.items() if src.get("sourceReference")},
+        )
+
+    contents.update(
+        await load_sources(
+            client,
+            {key: src for key, src in sources.items() if not src.get("sourceReference")},
+        )
+    )
+    snapshot = session_to_snapshot(session, capabilities=client.capabilities, sources=contents)
+    return snapshot, timer
+
+
+class SnapshotConnection:
+    """
+    Stand-in for DAPConnection that answers requests from a snapshot.
+
+    Nothing is sent anywhere, requests are answered on the next loop
+    iteration, and the process appears to be paused forever.
+    """
+
+    dispatcher: Dispatcher
+
+    def __init__(self, snapshot: dict):
+        self.snapshot = snapshot
+        self.dispatcher = Dispatcher()
+        self.sequence = count(1)
+
+    def start_listening(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def request(self, request: Request) -> Response:
+        return await self.send_message(request)
+
+    def send_message(self, request: Request) -> asyncio.Future:
+        assert request["type"] == "request"
+        future_response = self.dispatcher.handle_request(request)
+        asyncio.get_running_loop().call_soon(self._respond, request)
+        return future_response
+
+    def _respond(self, request: Request):
+        handler = getattr(self, f"on_{request['command']}", None)
+        response: Response = dict(
+            seq=next(self.sequence),
+            type="response",
+            request_seq=request["seq"],
+            command=request["command"],
+            success=handler is not None,
+        )
+        if handler is None:
+            response["message"] = f"{request['command']} is not available in a snapshot"
+        else:
+            try:
+                response["body"] = handler(request.get("arguments") or {})
+            except KeyError as e:
+                response["success"] = False
+                response["message"] = f"not captured in the snapshot: {e}"
+        self.dispatcher.handle_response(response)
+
+        if request["command"] == "attach":
+            self.send_event("initialized")
+        elif request["command"] == "pause":
+            self.send_event(
+                "stopped",
+                {
+                    "reason": "pause",
+                    "threadId": request["arguments"]["threadId"],
+                    "allThreadsStopped": True,
+                },
+            )
+
+    def send_event(self, event, body=None):
+        self.dispatcher.handle_event(dict(seq=next(self.sequence), type="event", event=event, body=body))
+
+    def on_initialize(self, arguments):
+        return self.snapshot["capabilities"]
+
+    def on_attach(self, arguments):
+        return None
+
+    def on_configurationDone(self, arguments):
+        return None
+
+    def on_disconnect(self, arguments):
+        return None
+
+    def on_pause(self, arguments):
+        return None
+
+    def on_continue(self, arguments):
+        # a snapshot can't be resumed, but pretending it can keeps dump working on it
+        return {"allThreadsContinued": True}
+
+    def on_threads(self, arguments):
+        return {"threads": self.snapshot["threads"]}
+
+    def on_stackTrace(self, arguments):
+        frames = self.snapshot["stackTraces"][arguments["threadId"]]
+        return {"stackFrames": frames, "totalFrames": len(frames)}
+
+    def on_scopes(self, arguments):
+        return {"scopes": self.snapshot["scopes"][arguments["frameId"]]}
+
+    def on_variables(self, arguments):
+        return {"variables": self.snapshot["variables"][arguments["variablesReference"]]}
+
+    def on_source(self, arguments):
+        src = arguments.get("source") or {"sourceReference": arguments["sourceReference"]}
+        return {"content": self.snapshot["sources"][source_key(src)]}
+
+
+async def run_capture(host, port, output, *, depth=1):
+    connection = await DAPConnection.from_tcp(host, port)
+    client = DAPClient(connection=connection)
+    try:
+        await client.initialize()
+        snapshot, timer = await capture(client, depth=depth)
+        await disconnect(client, terminate_debuggee=False)
+    finally:
+        connection.close()
+
+    save(output, snapshot)
+    print(f"process was paused for {timer.duration * 1000:.1f}ms", file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="vidb capture", description="Capture an offline debug snapshot")
+    parser.add_argument("port", type=int)
+    parser.add_argument("-o", "--output", required=True, help="snapshot file to write")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=1,
+        help="expand variables up to DEPTH levels, default 1",
+    )
+    args = parser.parse_args(argv)
+
+    asyncio.run(run_capture(args.host, args.port, args.output, depth=args.depth))
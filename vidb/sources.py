@@ -0,0 +1,223 @@
+"""
+Index of the sources and modules loaded by the debuggee.
+
+Opening a file that isn't on the current stack, e.g. to set a breakpoint in
+it, needs the list of what the debuggee loaded. SourceIndex fetches it once
+with `loadedSources` and `modules` and then keeps it current from the
+`loadedSource` and `module` events.
+
+A large application loads tens of thousands of files, too many to scan at
+every keypress, so the paths are indexed by their trigrams. A search looks
+up the trigrams of each word of the query, intersects the (few) entries that
+have all of them, starting with the rarest trigram, and only then checks the
+candidates. The words can be given in any order, e.g. "views admin" finds
+`django/contrib/admin/views/main.py`. A query that matches nothing exactly,
+e.g. because of a typo, falls back to the entries that share the most
+trigrams with it.
+"""
+from __future__ import annotations
+
+import asyncio
+import heapq
+from collections import Counter
+from dataclasses import dataclass
+from itertools import count
+from typing import Callable
+
+from vidb.client import loaded_sources, modules
+from vidb.dap import LoadedSourceEvent, Module, ModuleEvent, Source
+
+
+@dataclass
+class IndexEntry:
+    label: str
+    source: Source
+    module: Module | None = None
+
+
+def trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def source_label(source: Source) -> str:
+    if source.get("path"):
+        return source["path"]
+    return f"{source.get('name', '?')} <{source.get('sourceReference', 0)}>"
+
+
+class SourceIndex:
+    def __init__(self):
+        self.entries: dict[int, IndexEntry] = {}
+        self.listeners: set[Callable[[], None]] = set()
+        self.loaded = False
+        self.loading = False
+        # why the last load failed, it's tried again at the next one
+        self.error: str | None = None
+        # the lowercased label and file name of every entry, and their ids by label and by trigram
+        self._texts: dict[int, str] = {}
+        self._names: dict[int, str] = {}
+        self._by_label: dict[str, int] = {}
+        self._postings: dict[str, set[int]] = {}
+        self._module_labels: dict[int | str, str] = {}
+        self._ids = count(1)
+
+    def subscribe(self, listener):
+        self.listeners.add(listener)
+
+    def notify(self):
+        for listener in list(self.listeners):
+            listener()
+
+    def watch_events(self, client):
+        client.add_event_listener("loadedSource", self.handle_loaded_source_event)
+        client.add_event_listener("module", self.handle_module_event)
+
+    async def load(self, client):
+        """ fetch everything that was loaded before the events were watched, until it succeeds once """
+        if self.loaded or self.loading:
+            return
+        self.loading = True
+        requests = []
+        if client.capabilities.get("supportsLoadedSourcesRequest"):
+            requests.append(loaded_sources(client))
+        if client.capabilities.get("supportsModulesRequest"):
+            requests.append(modules(client))
+        try:
+            bodies = await asyncio.gather(*requests)
+        except Exception as e:
+            self.error = f"can't list the loaded sources: {e}"
+            self.notify()
+            return
+        finally:
+            self.loading = False
+        self.loaded = True
+        self.error = None
+        for body in bodies:
+            for source in body.get("sources", []):
+                self._add(source_label(source), source)
+            for module in body.get("modules", []):
+                self._add_module(module)
+        self.notify()
+
+    def handle_loaded_source_event(self, event: LoadedSourceEvent):
+        source = event["body"]["source"]
+        if event["body"]["reason"] == "removed":
+            self._remove(source_label(source))
+        else:
+            self._add(source_label(source), source)
+        self.notify()
+
+    def handle_module_event(self, event: ModuleEvent):
+        module = event["body"]["module"]
+        if event["body"]["reason"] == "removed":
+            self._remove_module(module["id"])
+        else:
+            self._add_module(module)
+        self.notify()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, label: str) -> IndexEntry | None:
+        entry_id = self._by_label.get(label)
+        return None if entry_id is None else self.entries[entry_id]
+
+    def search(self, query: str, limit=50) -> list[IndexEntry]:
+        """ the entries containing every word of query, best first: matching the file name, then shortest """
+        words = query.lower().split()
+        if not words:
+            return []
+        candidates = self._candidates(words)
+        texts = self._texts
+        for word in words:
+            candidates = [entry_id for entry_id in candidates if word in texts[entry_id]]
+        if not candidates:
+            return self._similar(query.lower(), limit)
+
+        # matches of the file name first, then the shortest
+        last = words[-1]
+        names = self._names
+        in_name = [entry_id for entry_id in candidates if last in names[entry_id]]
+        best = heapq.nsmallest(limit, in_name, key=lambda entry_id: len(texts[entry_id]))
+        if len(best) < limit:
+            in_name = set(in_name)
+            rest = [entry_id for entry_id in candidates if entry_id not in in_name]
+            best += heapq.nsmallest(limit - len(best), rest, key=lambda entry_id: len(texts[entry_id]))
+        return [self.entries[entry_id] for entry_id in best]
+
+    def _candidates(self, words) -> set[int] | dict[int, str]:
+        postings = []
+        for word in words:
+            for trigram in trigrams(word):
+                posting = self._postings.get(trigram)
+                if not posting:
+                    return set()
+                postings.append(posting)
+        if not postings:
+            # only words too short to have trigrams
+            return self._texts
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates &= posting
+            if not candidates:
+                break
+        return candidates
+
+    def _similar(self, query: str, limit) -> list[IndexEntry]:
+        query_trigrams = trigrams(query.replace(" ", ""))
+        shared = Counter()
+        for trigram in query_trigrams:
+            shared.update(self._postings.get(trigram, ()))
+        threshold = max(1, len(query_trigrams) // 2)
+        best = heapq.nsmallest(
+            limit,
+            (entry_id for entry_id, n in shared.items() if n >= threshold),
+            key=lambda entry_id: (-shared[entry_id], len(self._texts[entry_id])),
+        )
+        return [self.entries[entry_id] for entry_id in best]
+
+    def _add_module(self, module: Module):
+        if module.get("path"):
+            source = Source(name=module["name"], path=module["path"])
+            label = module["path"]
+        else:
+            # nothing to open, but still worth finding
+            source = Source(name=module["name"])
+            label = f"{module['name']} <module>"
+        if self._module_labels.get(module["id"], label) != label:
+            # a changed module that moved
+            self._remove_module(module["id"])
+        self._module_labels[module["id"]] = label
+        self._add(label, source, module)
+
+    def _remove_module(self, module_id):
+        label = self._module_labels.pop(module_id, None)
+        if label is not None:
+            self._remove(label)
+
+    def _add(self, label: str, source: Source, module: Module | None = None):
+        entry_id = self._by_label.get(label)
+        if entry_id is not None:
+            # changed, the label and so the trigrams are the same
+            self.entries[entry_id] = IndexEntry(label, source, module or self.entries[entry_id].module)
+            return
+        entry_id = next(self._ids)
+        self.entries[entry_id] = IndexEntry(label, source, module)
+        self._by_label[label] = entry_id
+        text = self._texts[entry_id] = label.lower()
+        self._names[entry_id] = text[text.rfind("/") + 1:]
+        for trigram in trigrams(text):
+            self._postings.setdefault(trigram, set()).add(entry_id)
+
+    def _remove(self, label: str):
+        entry_id = self._by_label.pop(label, None)
+        if entry_id is None:
+            return
+        del self.entries[entry_id]
+        del self._names[entry_id]
+        for trigram in trigrams(self._texts.pop(entry_id)):
+            posting = self._postings[trigram]
+            posting.discard(entry_id)
+            if not posting:
+                del self._postings[trigram]
@@ -0,0 +1,93 @@
+"""
+Loading the stacks of many threads at once, and grouping threads by stack.
+
+Large thread pools mostly have threads parked on the same idle stack.
+Grouping threads with identical stacks (like a goroutine dump) leaves a
+handful of unique stacks to look at instead of hundreds of threads.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass, field
+
+from vidb.dap import StackFrame
+from vidb.session import Session
+
+
+async def load_variables_tree(client, session: Session, variables_reference: int, depth: int):
+    """ load the children of variables_reference, and their children, up to depth levels """
+    if depth <= 0:
+        return
+    variable_list = await session.load_variables(client, variables_reference)
+    await asyncio.gather(*[
+        load_variables_tree(client, session, variable["variablesReference"], depth - 1)
+        for variable in variable_list
+        if variable["variablesReference"]
+    ])
+
+
+async def load_thread(client, session: Session, thread_id: int, *, depth=0):
+    """ load the stack of a thread, and the locals of every frame up to depth levels """
+    frames = await session.load_stack_trace(client, thread_id)
+    if depth > 0:
+        async def _load_frame(frame):
+            scope_list = await session.load_scopes(client, frame["id"])
+            await asyncio.gather(*[
+                load_variables_tree(client, session, scope["variablesReference"], depth)
+                for scope in scope_list
+                if not scope.get("expensive")
+            ])
+
+        await asyncio.gather(*[_load_frame(frame) for frame in frames])
+
+
+async def load_all_threads(client, session: Session, thread_ids, *, depth=0):
+    """
+    Concurrently load every thread's stack, returns the errors by thread id.
+
+    A thread that exits while loading shouldn't prevent dumping the others.
+    """
+    results = await asyncio.gather(
+        *[load_thread(client, session, thread_id, depth=depth) for thread_id in thread_ids],
+        return_exceptions=True,
+    )
+    return {
+        thread_id: result
+        for thread_id, result in zip(thread_ids, results)
+        if isinstance(result, Exception)
+    }
+
+
+def frame_signature(frame: StackFrame) -> tuple:
+    """ what identifies a frame across threads, frame ids are unique per thread so they're not part of it """
+    return (frame["name"], frame.get("source", {}).get("path"), frame.get("line"))
+
+
+@dataclass
+class StackGroup:
+    signature: tuple
+    frames: list[StackFrame]
+    thread_ids: list[int] = field(default_factory=list)
+
+    @property
+    def count(self) -> int:
+        return len(self.thread_ids)
+
+
+def group_stacks(session: Session, thread_ids=None) -> list[StackGroup]:
+    """
+    Group threads with identical stacks, largest group first.
+
+    Only threads whose stack is already loaded in the session are grouped.
+    """
+    groups: dict[tuple, StackGroup] = {}
+    for thread_id in session.threads if thread_ids is None else thread_ids:
+        if thread_id not in session.thread_frames:
+            continue
+        frames = session.frames_of(thread_id)
+        signature = tuple(frame_signature(frame) for frame in frames)
+        group = groups.get(signature)
+        if group is None:
+            group = groups[signature] = StackGroup(signature=signature, frames=frames)
+        group.thread_ids.append(thread_id)
+    return sorted(groups.values(), key=lambda group: group.count, reverse=True)
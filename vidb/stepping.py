@@ -0,0 +1,149 @@
+"""
+Stepping through the debuggee.
+
+A step can only change what the stepped thread is doing, so after each step
+the Stepper refreshes just its top frame and that frame's locals. Steps that
+are requested while one is still in flight (holding down `n` repeats faster
+than most adapters can step) are queued, at most `max_pending` of them, and
+sent back to back as each one stops, without refreshing in between. The rest
+of the UI, the thread list, the whole stack and the other scopes, is
+refreshed once stepping has been idle for `settle_delay` seconds.
+
+Stops that weren't caused by a step (breakpoints, exceptions, pauses)
+refresh everything right away.
+
+A step that doesn't stop within `stop_timeout` seconds, e.g. into a long
+running call, or because the debuggee exited, ends stepping so that the
+next step isn't queued behind it forever.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+
+from vidb.client import continue_, next_, step_in, step_out
+
+
+STEP_REQUESTS = {
+    "next": next_,
+    "stepIn": step_in,
+    "stepOut": step_out,
+}
+
+
+class Stepper:
+    def __init__(self, ui, *, max_pending=1, settle_delay=0.3, stop_timeout=10.0):
+        self.ui = ui
+        self.client = None
+        self.max_pending = max_pending
+        self.settle_delay = settle_delay
+        self.stop_timeout = stop_timeout
+        self.pending: deque[str] = deque()
+        self.stepping = False
+        # the thread the last stop was in
+        self.thread_id = None
+        self._stopped: asyncio.Future | None = None
+        self._step_task: asyncio.Task | None = None
+        self._refresh_task: asyncio.Task | None = None
+        self._settle_handle: asyncio.TimerHandle | None = None
+
+    def attach(self, client):
+        self.client = client
+        client.add_event_listener("stopped", self.handle_stopped_event)
+        # also sent when the connection to the adapter is lost
+        client.add_event_listener("terminated", self.handle_ended_event)
+        client.add_event_listener("exited", self.handle_ended_event)
+
+    def step(self, kind: str) -> bool:
+        """ step the selected thread, returns whether the step was sent or queued """
+        if self.client is None or self.ui.threads_widget.current_value is None:
+            return False
+        if not self.stepping:
+            self.stepping = True
+            self._cancel_full_refresh()
+            self._step_task = asyncio.ensure_future(self._run(kind))
+            return True
+        if kind == "continue":
+            # steps that haven't been sent yet would run after the continue
+            self.pending.clear()
+        elif len(self.pending) >= self.max_pending:
+            # coalesce the key repeats that the adapter can't keep up with
+            return False
+        self.pending.append(kind)
+        return True
+
+    def handle_stopped_event(self, event):
+        if self._stopped is not None and not self._stopped.done():
+            self._stopped.set_result(event)
+        elif not self.stepping:
+            self.thread_id = event["body"].get("threadId", self.thread_id)
+            self.schedule_full_refresh(0)
+
+    def handle_ended_event(self, event):
+        # the step won't stop
+        if self._stopped is not None and not self._stopped.done():
+            self._stopped.set_result(None)
+
+    async def _run(self, kind):
+        thread_id = self.ui.threads_widget.current_value
+        try:
+            while kind is not None:
+                if kind == "continue":
+                    await continue_(self.client, thread_id=thread_id)
+                    # whatever stops it next isn't a step
+                    return
+                self._stopped = asyncio.get_running_loop().create_future()
+                await STEP_REQUESTS[kind](self.client, thread_id=thread_id)
+                event = await asyncio.wait_for(self._stopped, self.stop_timeout)
+                if event is None:
+                    # the debuggee exited, there's nothing to show
+                    return
+                thread_id = event["body"].get("threadId", thread_id)
+                kind = self.pending.popleft() if self.pending else None
+            self.thread_id = thread_id
+            await self.refresh_top_frame(thread_id)
+        except asyncio.TimeoutError:
+            # still running, whatever stops it next is shown in full
+            return
+        finally:
+            self.pending.clear()
+            self.stepping = False
+            self._stopped = None
+        self.schedule_full_refresh()
+
+    async def refresh_top_frame(self, thread_id):
+        """ show only the top frame and its locals, enough to follow the step """
+        if thread_id != self.ui.stacktrace_widget.thread_id:
+            self.ui.threads_widget.current_value = thread_id
+            return
+        self.ui.variables_widget.locals_only = True
+        # the stack widget renders the new top frame when it's stored, which
+        # updates the source, the variables and the repl
+        await self.ui.session.load_stack_trace(self.client, thread_id, levels=1)
+
+    def schedule_full_refresh(self, delay=None):
+        self._cancel_full_refresh()
+        self._settle_handle = asyncio.get_event_loop().call_later(
+            self.settle_delay if delay is None else delay,
+            self._start_full_refresh,
+        )
+
+    def _cancel_full_refresh(self):
+        if self._settle_handle is not None:
+            self._settle_handle.cancel()
+            self._settle_handle = None
+
+    def _start_full_refresh(self):
+        self._settle_handle = None
+        self._refresh_task = asyncio.ensure_future(self.full_refresh())
+
+    async def full_refresh(self):
+        self.ui.variables_widget.locals_only = False
+        await self.ui.threads_widget.update_threads(self.client, resync=False)
+        if self.stepping:
+            return
+        thread_id = self.thread_id
+        if thread_id not in self.ui.session.threads:
+            thread_id = self.ui.threads_widget.current_value
+        # reselecting the thread reloads the whole stack and all the scopes
+        self.ui.threads_widget.current_value = thread_id
@@ -0,0 +1,130 @@
+"""
+Evaluating one expression in every thread.
+
+Finding which of hundreds of threads holds a lock, or serves a request,
+means evaluating the same expression in each of them. The threads' stacks
+and the evaluations are requested concurrently, but at most `concurrency` at
+a time so that the adapter isn't flooded, and each with its own timeout so
+that a thread that's stuck doesn't hold up the rest. Results are passed to
+`on_result` as they arrive, and can be sorted and filtered afterwards.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from vidb.client import evaluate
+from vidb.session import Session
+
+
+@dataclass
+class SweepResult:
+    thread_id: int
+    thread_name: str
+    # None when the stack couldn't be loaded
+    frame_id: Optional[int] = None
+    frame_name: str = ""
+    level: int = 0
+    value: Optional[str] = None
+    type: Optional[str] = None
+    error: Optional[str] = None
+
+
+SORT_KEYS = ["thread", "frame", "value"]
+
+
+def _value_key(value):
+    # numbers in numeric order before everything else
+    try:
+        return (0, float(value), "")
+    except (TypeError, ValueError):
+        return (1, 0.0, value or "")
+
+
+def sort_results(results: list[SweepResult], key="thread", *, reverse=False) -> list[SweepResult]:
+    if key == "thread":
+        sort_key = lambda result: (result.thread_id, result.level)
+    elif key == "frame":
+        sort_key = lambda result: (result.frame_name, result.thread_id, result.level)
+    elif key == "value":
+        # errors last
+        sort_key = lambda result: (result.error is not None, _value_key(result.value), result.thread_id)
+    else:
+        raise ValueError(f"unknown sort key {key!r}")
+    return sorted(results, key=sort_key, reverse=reverse)
+
+
+def filter_results(results: list[SweepResult], text: str) -> list[SweepResult]:
+    """ the results whose thread, frame, value or error contain text """
+    if not text:
+        return results
+    text = text.lower()
+    return [
+        result for result in results
+        if any(
+            text in (field or "").lower()
+            for field in (result.thread_name, result.frame_name, result.value, result.error)
+        )
+    ]
+
+
+async def evaluate_everywhere(
+    client,
+    session: Session,
+    expression: str,
+    *,
+    all_frames=False,
+    concurrency=16,
+    timeout=2.0,
+    on_result: Callable[[SweepResult], None] | None = None,
+) -> list[SweepResult]:
+    """ evaluate expression in the top frame of every thread, or in all their frames """
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def bounded(awaitable):
+        async with semaphore:
+            return await asyncio.wait_for(awaitable, timeout)
+
+    def report(result):
+        results.append(result)
+        if on_result is not None:
+            on_result(result)
+
+    async def _evaluate(thread, level, frame):
+        result = SweepResult(thread["id"], thread["name"], frame["id"], frame["name"], level)
+        try:
+            response = await bounded(
+                evaluate(client, expression=expression, frame_id=frame["id"], context="watch"),
+            )
+        except asyncio.TimeoutError:
+            result.error = f"timed out after {timeout:g}s"
+        except Exception as e:
+            result.error = str(e)
+        else:
+            result.value, result.type = response["result"], response.get("type")
+        report(result)
+
+    async def _thread(thread):
+        try:
+            frames = await bounded(
+                session.load_stack_trace(client, thread["id"], levels=None if all_frames else 1),
+            )
+        except asyncio.TimeoutError:
+            report(SweepResult(thread["id"], thread["name"], error=f"stack timed out after {timeout:g}s"))
+            return
+        except Exception as e:
+            report(SweepResult(thread["id"], thread["name"], error=str(e)))
+            return
+        if not frames:
+            # e.g. a thread that's running
+            report(SweepResult(thread["id"], thread["name"], error="no frames"))
+            return
+        await asyncio.gather(*[
+            _evaluate(thread, level, frame)
+            for level, frame in enumerate(frames if all_frames else frames[:1])
+        ])
+
+    await asyncio.gather(*[_thread(thread) for thread in await session.load_threads(client)])
+    return results
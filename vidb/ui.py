@@ -3,6 +3,9 @@ from uuid import uuid4
 
 import asyncio
 import io
+import os
+import re
+import tempfile
 from pathlib import Path
 from asyncio.locks import Condition
 from typing import Optional
@@ -11,21 +14,50 @@ from contextlib import asynccontextmanager
 from prompt_toolkit import HTML, Application
 from prompt_toolkit.application import get_app
 from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.completion import Completer, Completion, DynamicCompleter
 from prompt_toolkit.document import Document
 from prompt_toolkit.enums import EditingMode
+from prompt_toolkit.filters import Condition as FilterCondition
 from prompt_toolkit.filters.base import Never
+from prompt_toolkit.formatted_text import to_formatted_text
 from prompt_toolkit.key_binding import KeyBindings
-from prompt_toolkit.layout.containers import VSplit, HSplit, Window
-from prompt_toolkit.layout.controls import BufferControl, FormattedTextControl
+from prompt_toolkit.layout.containers import (
+    ConditionalContainer,
+    DynamicContainer,
+    Float,
+    FloatContainer,
+    VSplit,
+    HSplit,
+    Window,
+)
+from prompt_toolkit.layout.controls import (
+    BufferControl,
+    FormattedTextControl,
+    UIContent,
+    UIControl,
+)
 from prompt_toolkit.layout.layout import Layout
-from prompt_toolkit.layout.margins import NumberedMargin
+from prompt_toolkit.layout.margins import Margin, NumberedMargin
+from prompt_toolkit.layout.menus import CompletionsMenu
+from prompt_toolkit.layout.processors import BeforeInput
+from prompt_toolkit.layout.screen import Point
 from prompt_toolkit.lexers.pygments import PygmentsLexer
 from prompt_toolkit.styles import Style
 from prompt_toolkit.widgets import RadioList
-from ptterm import Terminal
-from pygments.lexers.python import PythonLexer
 
-from vidb.client import stack_trace, threads
+from vidb.breakpoints import BreakpointStore
+from vidb.client import completions, evaluate, pause_all, source as fetch_source
+from vidb.disassembly import DisassemblyCache, format_instruction
+from vidb.history import StopHistory
+from vidb.logpoints import LogpointStats
+from vidb.memory import ROW_SIZE, MemoryPages
+from vidb.session import Session
+from vidb.sources import SourceIndex
+from vidb.stacks import group_stacks, load_all_threads
+from vidb.stepping import Stepper
+from vidb.sweep import SORT_KEYS, evaluate_everywhere, filter_results, sort_results
+from vidb.values import iter_full_value, preview, save_value
+from vidb.watches import Watches
 
 
 border_style = "fg:lightblue bg:darkred bold"
@@ -37,6 +69,7 @@ def create_background_task(coro):
     task = asyncio.create_task(coro)
     background_tasks.add(task)
     task.add_done_callback(background_tasks.discard)
+    return task
 
 
 def TitledWindow(
@@ -75,36 +108,216 @@ def VSeparator():
     )
 
 
+def python_lexer():
+    """ pygments is slow to import, so it's only loaded once there is source to highlight """
+    from pygments.lexers.python import PythonLexer
+
+    return PygmentsLexer(PythonLexer)
+
+
+class BreakpointMargin(Margin):
+    """ marks the lines of the source widget that have a breakpoint """
+
+    def __init__(self, source_widget):
+        self.source_widget = source_widget
+
+    def get_width(self, get_ui_content):
+        return 1
+
+    def create_margin(self, window_render_info, width, height):
+        store = self.source_widget.breakpoints
+        path = self.source_widget.path
+        lines = store.files.get(path, {})
+
+        result = []
+        last_lineno = None
+        for lineno in window_render_info.displayed_lines:
+            if lineno is not None and lineno != last_lineno and lineno + 1 in lines:
+                breakpoint = lines[lineno + 1]
+                if breakpoint.get("logMessage"):
+                    marker = "L"
+                elif breakpoint.get("condition") or breakpoint.get("hitCondition"):
+                    marker = "?"
+                else:
+                    marker = "*"
+                verification = store.verification(path, lineno + 1)
+                if verification is not None and not verification["verified"]:
+                    result.append(("class:breakpoint-unverified", marker))
+                else:
+                    result.append(("class:breakpoint", marker))
+            last_lineno = lineno
+            result.append(("", "\n"))
+        return result
+
+
+class PromptLine:
+    """
+    One line input for asking e.g. a logpoint's message.
+
+    Hidden except while asking, enter accepts and escape cancels. In between
+    it shows messages, e.g. the outcome of a background task, for a while.
+    """
+
+    def __init__(self, message_duration=5.0):
+        self.label = ""
+        self.on_accept = None
+        self.previous_window = None
+        self.completer = None
+        self.message = ""
+        self.message_duration = message_duration
+        self._message_handle = None
+        self.buffer = Buffer(
+            multiline=False,
+            completer=DynamicCompleter(lambda: self.completer),
+            complete_while_typing=True,
+        )
+
+        kb = KeyBindings()
+
+        @kb.add("enter")
+        def accept(event):
+            on_accept = self.on_accept
+            self.close(event.app)
+            on_accept(self.buffer.text)
+
+        @kb.add("escape")
+        @kb.add("c-c")
+        def cancel(event):
+            self.close(event.app)
+
+        self.container = HSplit([
+            ConditionalContainer(
+                Window(
+                    content=BufferControl(
+                        buffer=self.buffer,
+                        input_processors=[BeforeInput(lambda: self.label)],
+                        key_bindings=kb,
+                    ),
+                    height=1,
+                ),
+                filter=FilterCondition(lambda: self.on_accept is not None),
+            ),
+            ConditionalContainer(
+                Window(FormattedTextControl(lambda: self.message), height=1),
+                filter=FilterCondition(lambda: self.on_accept is None and bool(self.message)),
+            ),
+        ])
+
+    def show(self, message):
+        """ show message until message_duration passes or something is asked """
+        self.message = message
+        if self._message_handle is not None:
+            self._message_handle.cancel()
+        self._message_handle = asyncio.get_running_loop().call_later(self.message_duration, self.clear_message)
+        get_app().invalidate()
+
+    def clear_message(self):
+        self.message = ""
+        if self._message_handle is not None:
+            self._message_handle.cancel()
+            self._message_handle = None
+        get_app().invalidate()
+
+    def ask(self, app, label, on_accept, default="", completer=None):
+        self.clear_message()
+        self.label = label
+        self.on_accept = on_accept
+        self.completer = completer
+        self.previous_window = app.layout.current_window
+        self.buffer.document = Document(default)
+        app.layout.focus(self.buffer)
+
+    def close(self, app):
+        self.on_accept = None
+        self.completer = None
+        if self.previous_window is not None:
+            app.layout.focus(self.previous_window)
+
+    def __pt_container__(self):
+        return self.container
+
+
 class SourceWidget(Window):
-    def __init__(self):
+    def __init__(self, session=None, breakpoints=None, prompt=None):
+        self.session = session or Session()
+        self.breakpoints = breakpoints or BreakpointStore()
+        self.prompt = prompt or PromptLine()
+        self.breakpoints.subscribe(lambda path: get_app().invalidate())
+        self.client = None
+        # local path of the source being shown, None when it was fetched from the adapter
+        self.path = None
+        self.shown_source = None
         self.key_bindings = KeyBindings()
+        self._lexer = None
+
+        @self.key_bindings.add("b")
+        def toggle_breakpoint(event):
+            self.toggle_breakpoint(self.content.buffer.document.cursor_position_row + 1)
+
+        def ask_option(option, label):
+            def _(event):
+                if self.path is None:
+                    return
+                line = self.content.buffer.document.cursor_position_row + 1
+                breakpoint = self.breakpoints.files.get(self.path, {}).get(line, {})
+                self.prompt.ask(
+                    event.app,
+                    label,
+                    lambda text: self.update_breakpoint(line, **{option: text}),
+                    default=breakpoint.get(option, ""),
+                )
+            return _
+
+        self.key_bindings.add("L")(ask_option("logMessage", "log message: "))
+        self.key_bindings.add("C")(ask_option("condition", "condition: "))
+        self.key_bindings.add("H")(ask_option("hitCondition", "hit condition: "))
+
         super().__init__(
             content=BufferControl(
-                lexer=PygmentsLexer(PythonLexer),
+                buffer=Buffer(
+                    document=Document("Waiting for the debuggee to stop..."),
+                    read_only=True,
+                ),
                 key_bindings=self.key_bindings,
             ),
             left_margins=[
+                BreakpointMargin(self),
                 NumberedMargin(),
             ],
             cursorline=True,
         )
 
     async def attach(self, client, stacktrace_widget):
+        self.client = client
         create_background_task(self.run(client, stacktrace_widget))
 
+    def toggle_breakpoint(self, line):
+        if self.path is None:
+            return
+        self.breakpoints.toggle(self.path, line)
+        if self.client is not None:
+            create_background_task(self.breakpoints.sync(self.client))
+
+    def update_breakpoint(self, line, **options):
+        """ add or change a logpoint or conditional breakpoint """
+        self.breakpoints.update(self.path, line, **options)
+        if self.client is not None:
+            create_background_task(self.breakpoints.sync(self.client))
+
     async def run(self, client, stacktrace_widget):
         async with stacktrace_widget.watch() as on_current_stackframe_changed:
             while True:
                 frame_id = await on_current_stackframe_changed()
 
-                frame = next(frame for frame in stacktrace_widget.frames if frame["id"] == frame_id)
-                if frame["source"]["sourceReference"] == 0:
-                    self.source_file = open(frame["source"]["path"])
-                else:
-                    arguments = {"source": frame["source"], "sourceReference": frame["source"]["sourceReference"]}
-                    src = await client.remote_call(dict, "source", arguments=arguments)
-
-                    self.source_file = io.StringIO(src["content"])
+                frame = self.session.frames.get(frame_id)
+                if frame is None:
+                    # the debuggee resumed or stopped again since the frame was selected
+                    continue
+                try:
+                    await self.show_source(client, frame["source"])
+                except ConnectionError:
+                    # the session shown ended, the next one's frames follow
+                    continue
                 self.content.buffer.cursor_position = self.content.buffer.document.translate_row_col_to_index(
                     frame["line"] - 1,
                     frame["column"] - 1,
@@ -116,6 +329,35 @@ class SourceWidget(Window):
 
                 get_app().invalidate()
 
+    async def show_source(self, client, source):
+        if source != self.shown_source:
+            self.source_file = await self.open_source(client, source)
+            self.shown_source = source
+
+    def move_cursor_optimistically(self):
+        """ move to the next line of code before a `next` stops, the stop puts the cursor where it really is """
+        document = self.content.buffer.document
+        row = document.cursor_position_row + 1
+        while row < document.line_count - 1 and document.lines[row].strip()[:1] in ("", "#"):
+            row += 1
+        self.content.buffer.cursor_position = document.translate_row_col_to_index(row, 0)
+        get_app().invalidate()
+
+    async def open_source(self, client, source):
+        if source.get("sourceReference", 0) == 0:
+            local_path = client.path_mapper.to_local(source["path"])
+            try:
+                file = open(local_path)
+            except OSError:
+                # not available locally, e.g. when debugging remotely or from a snapshot
+                pass
+            else:
+                self.path = local_path
+                return file
+        src = await fetch_source(client, source=source)
+        self.path = None if source.get("sourceReference") else client.path_mapper.to_local(source["path"])
+        return io.StringIO(src["content"])
+
     def _center_cursor(self, buffer):
         """
         Center Window vertically around cursor.
@@ -152,6 +394,8 @@ class SourceWidget(Window):
 
     @source_file.setter
     def source_file(self, file):
+        if self._lexer is None:
+            self._lexer = self.content.lexer = python_lexer()
         self.content.buffer = Buffer(
             document=Document(
                 file.read(),
@@ -160,13 +404,748 @@ class SourceWidget(Window):
         )
 
 
-class TerminalWidget(Terminal):
+class TerminalWidget:
+    """
+    Python shell pane.
+
+    Starting ipython is slow, so the process is only spawned the first time
+    the pane is focused; until then a placeholder is shown in its place.
+    """
+
     def __init__(self):
         self.key_bindings = KeyBindings()
-        super().__init__(
-            ["ipython"],
+        self.terminal = None
+        self.placeholder = Window(
+            content=FormattedTextControl(
+                text="Press ! to start the Python shell",
+                focusable=True,
+            ),
             height=10,
         )
+        self.container = DynamicContainer(lambda: self.terminal or self.placeholder)
+
+    @property
+    def process(self):
+        return self.terminal and self.terminal.process
+
+    def spawn(self):
+        if self.terminal is None:
+            from ptterm import Terminal
+
+            self.terminal = Terminal(
+                ["ipython"],
+                height=10,
+            )
+        return self.terminal
+
+    def spawn_if_focused(self, app):
+        if self.terminal is None and app.layout.has_focus(self.placeholder):
+            app.layout.focus(self.spawn())
+
+    def kill(self):
+        if self.terminal is not None:
+            self.terminal.process.kill()
+
+    def __pt_container__(self):
+        return self.container
+
+
+class ScrollbackControl(UIControl):
+    """
+    Append-only text pane that only formats the lines that are visible.
+
+    Long lines are hard wrapped and old lines are dropped past `max_lines`, so
+    appending stays cheap no matter how much text has been written. With
+    max_lines None nothing is dropped, it's up to the writer to stop.
+    """
+
+    def __init__(self, max_lines=10_000, max_line_length=1_000, focusable=False):
+        self.max_lines = max_lines
+        self.max_line_length = max_line_length
+        self.focusable = focusable
+        self.lines = [""]
+        # the line kept in view, None to follow the end
+        self.cursor_row = None
+
+    def write(self, text):
+        for index, line in enumerate(text.split("\n")):
+            if index:
+                self.lines.append("")
+            start = 0
+            while start < len(line):
+                room = self.max_line_length - len(self.lines[-1])
+                if room <= 0:
+                    self.lines.append("")
+                    continue
+                self.lines[-1] += line[start:start + room]
+                start += room
+
+        # trim in batches so that dropping lines is amortized
+        if self.max_lines is not None and len(self.lines) > self.max_lines + self.max_lines // 4:
+            del self.lines[:len(self.lines) - self.max_lines]
+
+    async def write_stream(self, text, chunk_size=64 * 1024):
+        """ write text in chunks, letting the UI repaint in between """
+        for start in range(0, len(text), chunk_size):
+            self.write(text[start:start + chunk_size])
+            get_app().invalidate()
+            await asyncio.sleep(0)
+
+    def is_focusable(self):
+        return self.focusable
+
+    def scroll(self, lines):
+        row = len(self.lines) - 1 if self.cursor_row is None else self.cursor_row
+        self.cursor_row = max(0, min(row + lines, len(self.lines) - 1))
+
+    def create_content(self, width, height):
+        lines = self.lines
+        row = len(lines) - 1 if self.cursor_row is None else min(self.cursor_row, len(lines) - 1)
+        return UIContent(
+            get_line=lambda i: [("", lines[i])],
+            line_count=len(lines),
+            cursor_position=Point(x=0, y=row),
+            show_cursor=False,
+        )
+
+
+async def save_and_report(save, path, prompt_line: PromptLine | None) -> str:
+    """ run save(path), which returns the number of characters written, and show how it went """
+    try:
+        written = await save(path)
+    except Exception as e:
+        message = f"couldn't save the value to {path}: {e}"
+    else:
+        message = f"saved {written:,} characters to {path}"
+    if prompt_line is not None:
+        prompt_line.show(message)
+    return message
+
+
+class ValueViewer:
+    """
+    Full value of a variable, shown in place of the source as it's fetched.
+
+    Hidden except while viewing, q or escape closes it. The viewer keeps the
+    start of the value in view, so rather than dropping it to make room, it
+    stops at `max_lines` and the whole value is saved to a file instead.
+    """
+
+    def __init__(self, prompt_line: PromptLine | None = None, max_lines=100_000):
+        self.prompt_line = prompt_line
+        self.max_lines = max_lines
+        self.title = ""
+        self.visible = False
+        self.previous_window = None
+        self.task = None
+        self.output = ScrollbackControl(focusable=True)
+
+        kb = KeyBindings()
+
+        @kb.add("q")
+        @kb.add("escape")
+        def close(event):
+            self.close(event.app)
+
+        def scroll(lines):
+            def _(event):
+                self.output.scroll(lines)
+            return _
+
+        for key, lines in [("up", -1), ("k", -1), ("down", 1), ("j", 1), ("pageup", -20), ("pagedown", 20)]:
+            kb.add(key)(scroll(lines))
+        kb.add("g")(scroll(-max_lines))
+        kb.add("G")(scroll(max_lines))
+
+        self.window = Window(content=self.output, wrap_lines=False)
+        self.container = HSplit([TitledWindow(lambda: self.title, self.window)], key_bindings=kb)
+
+    def open(self, app, title, chunks, save=None):
+        """
+        show the chunks of an async iterator as they arrive, past max_lines the
+        async save(path) writes the whole value to a file
+        """
+        if self.task is not None:
+            self.task.cancel()
+        self.title = title
+        self.output = ScrollbackControl(max_lines=None, focusable=True)
+        self.output.cursor_row = 0
+        self.window.content = self.output
+        if not self.visible:
+            self.previous_window = app.layout.current_window
+        self.visible = True
+        app.layout.focus(self.window)
+        self.task = create_background_task(self._stream(chunks, save))
+
+    async def _stream(self, chunks, save):
+        try:
+            async for chunk in chunks:
+                self.output.write(chunk)
+                get_app().invalidate()
+                if len(self.output.lines) > self.max_lines:
+                    break
+                await asyncio.sleep(0)
+            else:
+                return
+        except Exception as e:
+            self.output.write(f"\n{e}")
+            get_app().invalidate()
+            return
+        finally:
+            await chunks.aclose()
+
+        if save is None:
+            self.output.write(f"\n… cut at {self.max_lines:,} lines")
+            get_app().invalidate()
+            return
+        fd, path = tempfile.mkstemp(prefix="vidb-value-", suffix=".txt")
+        os.close(fd)
+        self.output.write(f"\n… more than {self.max_lines:,} lines, saving the whole value to {path}")
+        get_app().invalidate()
+        self.output.write("\n" + await save_and_report(save, path, self.prompt_line))
+        get_app().invalidate()
+
+    def close(self, app):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.visible = False
+        # drop the value, it can be large
+        self.output = self.window.content = ScrollbackControl(focusable=True)
+        if self.previous_window is not None:
+            app.layout.focus(self.previous_window)
+
+    def __pt_container__(self):
+        return self.container
+
+
+class MemoryControl(UIControl):
+    """ hex and ASCII rows of memory, read as they're scrolled into view """
+
+    def __init__(self, pages: MemoryPages | None = None, row_size=ROW_SIZE):
+        self.pages = pages
+        self.row_size = row_size
+        # the first row shown, rows are counted from the memory reference and can be negative
+        self.top_row = 0
+
+    def is_focusable(self):
+        return True
+
+    def scroll(self, rows):
+        self.top_row += rows
+
+    def get_line(self, row):
+        offset = row * self.row_size
+        line = self.pages.format_row(offset, self.row_size)
+        if line is None:
+            self.pages.request(offset // self.pages.page_size)
+            return [("class:memory-loading", f"{self.pages.address(offset)}  reading…")]
+        return [("", line)]
+
+    def create_content(self, width, height):
+        if self.pages is None:
+            return UIContent(line_count=0)
+        top_row = self.top_row
+        # only the rows on screen are formatted, and a page is only read when one of its rows is
+        return UIContent(
+            get_line=lambda i: self.get_line(top_row + i),
+            line_count=height,
+            show_cursor=False,
+        )
+
+
+class MemoryViewer:
+    """
+    Memory behind a memoryReference, shown in place of the source.
+
+    Hidden except while viewing, q or escape closes it.
+    """
+
+    def __init__(self):
+        self.title = ""
+        self.visible = False
+        self.previous_window = None
+        self.control = MemoryControl()
+
+        kb = KeyBindings()
+
+        @kb.add("q")
+        @kb.add("escape")
+        def close(event):
+            self.close(event.app)
+
+        def scroll(rows):
+            def _(event):
+                self.control.scroll(rows)
+            return _
+
+        for key, rows in [("up", -1), ("k", -1), ("down", 1), ("j", 1), ("pageup", -16), ("pagedown", 16)]:
+            kb.add(key)(scroll(rows))
+
+        @kb.add("g")
+        def top(event):
+            self.control.top_row = 0
+
+        self.window = Window(content=self.control, wrap_lines=False)
+        self.container = HSplit([TitledWindow(lambda: self.title, self.window)], key_bindings=kb)
+
+    def open(self, app, title, pages: MemoryPages):
+        self.title = title
+        if self.control.pages is not None:
+            self.control.pages.close()
+        pages.subscribe(lambda index: get_app().invalidate())
+        self.control.pages = pages
+        self.control.top_row = 0
+        if not self.visible:
+            self.previous_window = app.layout.current_window
+        self.visible = True
+        app.layout.focus(self.window)
+
+    def close(self, app):
+        self.visible = False
+        # drop the pages and their buffer
+        if self.control.pages is not None:
+            self.control.pages.close()
+        self.control.pages = None
+        if self.previous_window is not None:
+            app.layout.focus(self.previous_window)
+
+    def __pt_container__(self):
+        return self.container
+
+
+class DisassemblyControl(UIControl):
+    """ instructions around a memory reference, fetched as they come near the screen """
+
+    def __init__(self, cache: DisassemblyCache | None = None):
+        self.cache = cache or DisassemblyCache()
+        self.client = None
+        self.reference = None
+        # the first row shown, row 0 is the instruction at the reference
+        self.top_row = 0
+
+    def is_focusable(self):
+        return True
+
+    def scroll(self, rows):
+        self.top_row += rows
+
+    def get_line(self, row):
+        instruction = self.cache.instruction(self.reference, row)
+        marker = "=> " if row == 0 else "   "
+        if instruction is None:
+            missing = "??" if self.cache.fetched(self.reference, row) else "…"
+            return [("class:disassembly-loading", f"{marker}{missing}")]
+        style = "class:disassembly-current" if row == 0 else ""
+        return [(style, marker + format_instruction(instruction))]
+
+    def create_content(self, width, height):
+        if self.client is not None and not self.client.capabilities.get("supportsDisassembleRequest"):
+            return UIContent(get_line=lambda i: [("", "The debug adapter can't disassemble")], line_count=1)
+        if self.reference is None:
+            return UIContent(get_line=lambda i: [("", "No instruction pointer for this frame")], line_count=1)
+        top_row = self.top_row
+        if self.client is not None:
+            self.cache.request_rows(self.client, self.reference, top_row, top_row + height - 1)
+        return UIContent(
+            get_line=lambda i: self.get_line(top_row + i),
+            line_count=height,
+            show_cursor=False,
+        )
+
+
+class DisassemblyViewer:
+    """
+    Disassembly at the selected frame's instruction pointer, shown in place of the source.
+
+    D shows and hides it, it follows the selected frame while shown.
+    """
+
+    def __init__(self, cache: DisassemblyCache | None = None):
+        self.visible = False
+        self.previous_window = None
+        self.control = DisassemblyControl(cache)
+        self.control.cache.subscribe(self._on_page_loaded)
+
+        kb = KeyBindings()
+
+        @kb.add("q")
+        @kb.add("escape")
+        def close(event):
+            self.close(event.app)
+
+        def scroll(rows):
+            def _(event):
+                self.control.scroll(rows)
+            return _
+
+        for key, rows in [("up", -1), ("k", -1), ("down", 1), ("j", 1), ("pageup", -20), ("pagedown", 20)]:
+            kb.add(key)(scroll(rows))
+
+        @kb.add("g")
+        def back_to_instruction_pointer(event):
+            self.center()
+
+        self.window = Window(content=self.control, wrap_lines=False)
+        self.container = HSplit(
+            [TitledWindow("Disassembly (g:instruction pointer q:close)", self.window)],
+            key_bindings=kb,
+        )
+
+    async def attach(self, client, stacktrace_widget):
+        self.control.client = client
+        create_background_task(self.run(stacktrace_widget))
+
+    async def run(self, stacktrace_widget):
+        async with stacktrace_widget.watch() as on_current_stackframe_changed:
+            while True:
+                frame_id = await on_current_stackframe_changed()
+
+                frame = stacktrace_widget.session.frames.get(frame_id) or {}
+                self.control.reference = frame.get("instructionPointerReference")
+                self.center()
+                get_app().invalidate()
+
+    def _on_page_loaded(self, reference, index):
+        if self.visible and reference == self.control.reference:
+            get_app().invalidate()
+
+    def center(self):
+        """ scroll the instruction pointer to a third of the way down """
+        info = self.window.render_info
+        self.control.top_row = -(info.window_height // 3 if info else 5)
+
+    def open(self, app):
+        if not self.visible:
+            self.previous_window = app.layout.current_window
+        self.visible = True
+        self.center()
+        app.layout.focus(self.window)
+
+    def close(self, app):
+        self.visible = False
+        if self.previous_window is not None:
+            app.layout.focus(self.previous_window)
+
+    def __pt_container__(self):
+        return self.container
+
+
+class SweepViewer:
+    """
+    Results of evaluating an expression in every thread, as a table in place of the source.
+
+    enter goes to the thread and frame of a row, o changes the column the rows
+    are sorted by, O reverses the order, / filters them and f evaluates in all
+    frames instead of only the top ones.
+    """
+
+    def __init__(self, session=None, prompt=None, on_select=None):
+        self.session = session or Session()
+        self.prompt = prompt or PromptLine()
+        self.on_select = on_select
+        self.client = None
+        self.visible = False
+        self.previous_window = None
+        self.expression = ""
+        self.all_frames = False
+        self.sort_key = "thread"
+        self.reverse = False
+        self.filter_text = ""
+        self.results = []
+        self.shown = []
+        self.task = None
+        self._render_scheduled = False
+        self.radio = RadioList(values=[(None, "No results yet")])
+        self.radio.window.dont_extend_height = Never()
+
+        kb = self.radio.control.key_bindings
+
+        @kb.add("q")
+        @kb.add("escape")
+        def close(event):
+            self.close(event.app)
+
+        @kb.add("enter")
+        def go_to_result(event):
+            result = self.radio.values[self.radio._selected_index][0]
+            if result is not None and result.frame_id is not None and self.on_select is not None:
+                self.close(event.app)
+                self.on_select(result)
+
+        @kb.add("o")
+        def next_sort_key(event):
+            self.sort_key = SORT_KEYS[(SORT_KEYS.index(self.sort_key) + 1) % len(SORT_KEYS)]
+            self.render()
+
+        @kb.add("O")
+        def reverse_order(event):
+            self.reverse = not self.reverse
+            self.render()
+
+        @kb.add("/")
+        def filter_rows(event):
+            self.prompt.ask(event.app, "filter: ", self.set_filter, default=self.filter_text)
+
+        @kb.add("f")
+        def toggle_all_frames(event):
+            self.all_frames = not self.all_frames
+            self.run(self.client, self.expression)
+
+        self.container = HSplit([TitledWindow(self.title, self.radio)])
+
+    def title(self):
+        frames = "all frames" if self.all_frames else "top frames"
+        order = " reversed" if self.reverse else ""
+        running = " …" if self.task is not None and not self.task.done() else ""
+        return (
+            f"{self.expression} in {frames}: {len(self.shown)}/{len(self.results)}{running}"
+            f" (sort:{self.sort_key}{order} filter:{self.filter_text or '-'})"
+        )
+
+    def open(self, app, client, expression):
+        if not self.visible:
+            self.previous_window = app.layout.current_window
+        self.visible = True
+        self.run(client, expression)
+        app.layout.focus(self.radio)
+
+    def run(self, client, expression):
+        if client is None or not expression:
+            return
+        if self.task is not None:
+            self.task.cancel()
+        self.client = client
+        self.expression = expression
+        self.results = []
+        self.render()
+        self.task = create_background_task(self._run(client, expression))
+
+    async def _run(self, client, expression):
+        await evaluate_everywhere(
+            client,
+            self.session,
+            expression,
+            all_frames=self.all_frames,
+            on_result=self._add,
+        )
+        self.render()
+        get_app().invalidate()
+
+    def _add(self, result):
+        self.results.append(result)
+        # results arriving in a burst are rendered once
+        if not self._render_scheduled:
+            self._render_scheduled = True
+            asyncio.get_event_loop().call_soon(self._render_results)
+
+    def _render_results(self):
+        self._render_scheduled = False
+        self.render()
+        get_app().invalidate()
+
+    def set_filter(self, text):
+        self.filter_text = text
+        self.render()
+
+    def render(self):
+        self.shown = sort_results(filter_results(self.results, self.filter_text), self.sort_key, reverse=self.reverse)
+        selected = self.radio.values[self.radio._selected_index][0]
+        self.radio.values = [(result, self._render_result(result)) for result in self.shown] or [(None, "No results yet")]
+        rows = [value for value, _ in self.radio.values]
+        self.radio._selected_index = rows.index(selected) if selected in rows else 0
+
+    def _render_result(self, result):
+        thread = f"{(result.thread_name or str(result.thread_id))[:20]:<20}"
+        frame = f"{result.frame_name + '#' + str(result.level) if result.frame_id is not None else '':<24.24}"
+        if result.error is not None:
+            return HTML("{thread} {frame} <watch-error>{error}</watch-error>").format(
+                thread=thread,
+                frame=frame,
+                error=preview(result.error),
+            )
+        return HTML("{thread} {frame} <variables-value>{value}</variables-value>").format(
+            thread=thread,
+            frame=frame,
+            value=preview(result.value),
+        )
+
+    def close(self, app):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+        self.visible = False
+        if self.previous_window is not None:
+            app.layout.focus(self.previous_window)
+
+    def __pt_container__(self):
+        return self.container
+
+
+class DAPCompleter(Completer):
+    """
+    Complete from the debuggee using DAP `completions` requests.
+
+    Completions are cached per frame and per stem, the text before the word
+    being typed, and filtered locally as the word grows. On a cache miss the
+    request is sent in the background and completion is restarted once the
+    response arrives. A request that fails is cached as no completions, so
+    that it isn't sent again at every keystroke.
+    """
+
+    _word_re = re.compile(r"[A-Za-z0-9_]*$")
+
+    def __init__(self, repl):
+        self.repl = repl
+        self.cache = {}
+        self.pending = {}
+
+    def clear(self):
+        self.cache.clear()
+
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor
+        word = self._word_re.search(text).group()
+        stem = text[:len(text) - len(word)]
+        key = (self.repl.frame_id, stem)
+
+        client = self.repl.client
+        if client is None or not client.capabilities.get("supportsCompletionsRequest"):
+            return
+        targets = self.cache.get(key)
+        if targets is None:
+            if key not in self.pending:
+                self.pending[key] = create_background_task(self._fetch(key))
+            return
+
+        for target in targets:
+            label = target["label"]
+            if label.startswith(word):
+                yield Completion(
+                    target.get("text", label),
+                    start_position=-len(word),
+                    display=label,
+                    display_meta=target.get("type", ""),
+                )
+
+    async def _fetch(self, key):
+        frame_id, stem = key
+        try:
+            response = await completions(
+                self.repl.client,
+                text=stem,
+                column=len(stem) + 1,
+                frame_id=frame_id,
+            )
+        except Exception:
+            self.cache[key] = []
+            return
+        else:
+            self.cache[key] = response["targets"]
+        finally:
+            del self.pending[key]
+
+        buffer = self.repl.input_buffer
+        if buffer.document.text_before_cursor.startswith(stem):
+            buffer.start_completion()
+
+
+class SourceIndexCompleter(Completer):
+    """ fuzzy completion of the loaded sources and modules, the whole line is replaced """
+
+    def __init__(self, index, limit=50):
+        self.index = index
+        self.limit = limit
+
+    def get_completions(self, document, complete_event):
+        if self.index.error is not None and not len(self.index):
+            yield Completion(document.text, start_position=-len(document.text), display=self.index.error)
+            return
+        for entry in self.index.search(document.text, self.limit):
+            yield Completion(
+                entry.label,
+                start_position=-len(document.text),
+                display=Path(entry.label).name if entry.source.get("path") else entry.label,
+                display_meta=entry.label,
+            )
+
+
+class ReplWidget:
+    """
+    REPL that evaluates expressions in the debuggee, in the selected frame.
+    """
+
+    def __init__(self, session=None):
+        self.session = session or Session()
+        self.client = None
+        self.stacktrace_widget = None
+
+        self.key_bindings = KeyBindings()
+        self.key_bindings.add("enter")(lambda event: self.submit())
+
+        self.output = ScrollbackControl()
+        self.completer = DAPCompleter(self)
+        self.input_buffer = Buffer(
+            completer=self.completer,
+            complete_while_typing=True,
+            multiline=False,
+        )
+        self._write_lock = asyncio.Lock()
+        self.container = HSplit(
+            [
+                Window(content=self.output, wrap_lines=False),
+                Window(
+                    content=BufferControl(
+                        buffer=self.input_buffer,
+                        input_processors=[BeforeInput(">>> ")],
+                        key_bindings=self.key_bindings,
+                    ),
+                    height=1,
+                ),
+            ],
+            height=10,
+        )
+
+    @property
+    def frame_id(self):
+        return self.stacktrace_widget and self.stacktrace_widget.current_value
+
+    async def attach(self, client, stacktrace_widget):
+        self.client = client
+        self.stacktrace_widget = stacktrace_widget
+        self.session.subscribe(self._on_session_changed)
+
+    def _on_session_changed(self, kind, key):
+        if kind == "clear":
+            self.completer.clear()
+
+    def submit(self):
+        expression = self.input_buffer.text
+        self.input_buffer.reset(append_to_history=True)
+        if expression.strip():
+            create_background_task(self.evaluate(expression))
+
+    async def evaluate(self, expression):
+        if self.client is None:
+            result = "Not connected"
+        else:
+            try:
+                response = await evaluate(
+                    self.client,
+                    expression=expression,
+                    frame_id=self.frame_id,
+                    context="repl",
+                )
+                result = response["result"]
+            except Exception as e:
+                result = str(e)
+
+        async with self._write_lock:
+            self.output.write(f">>> {expression}\n")
+            await self.output.write_stream(result + "\n")
+
+    def __pt_container__(self):
+        return self.container
 
 
 class forward_property:
@@ -196,6 +1175,9 @@ class RadioListWithWatchableCurrentValue(RadioList):
 
     @current_value.setter
     def current_value(self, new_value):
+        # set synchronously so the list can be rendered before the watchers are notified
+        self._current_value = new_value
+
         async def update():
             async with self._watch_current_value:
                 self._current_value = new_value
@@ -249,78 +1231,284 @@ class GroupableRadioList:
 
 
 class ThreadsWidget(GroupableRadioList):
-    def __init__(self):
+    def __init__(self, session=None):
         super().__init__(values=[(None, "No threads")])
-        self.threads = []
+        self.session = session or Session()
+        self.client = None
+        self.grouped = False
+        self.groups = []
+        self._render_scheduled = False
 
-    async def attach(self, client):
+        kb = self.radio.control.key_bindings
+
+        @kb.add("g")
+        def toggle_grouping(event):
+            create_background_task(self.set_grouped(not self.grouped))
+
+        @kb.add("u")
+        def resync(event):
+            if self.client is not None:
+                create_background_task(self.update_threads(self.client))
+
+    @property
+    def threads(self):
+        return list(self.session.threads.values())
+
+    async def attach(self, client, *, pause=True):
+        """ without pause, e.g. a launched debuggee runs on until a breakpoint """
+        self.session.subscribe(self._on_session_changed)
         await self.update_threads(client)
-        for thread in self.threads:
-            await client.remote_call(dict, "pause", arguments={"threadId": thread["id"]})
-        # create_background_task(self.run(client))
-
-    async def update_threads(self, client):
-        thread_list = await threads(client)
-        self.threads = thread_list["threads"]
-        self.values = [(t["id"], self._render_thread_to_radiolist_text(t)) for t in self.threads]
-        self.current_value = self.values[0][0]
+        if pause:
+            await pause_all(client, list(self.session.threads))
+
+    def _on_session_changed(self, kind, key):
+        # threads that start and exit in a burst are rendered once
+        if kind == "threads" and not self._render_scheduled:
+            self._render_scheduled = True
+            asyncio.get_event_loop().call_soon(self._render_threads)
+        elif kind == "invalidated" and key[0] == "threads" and self.client is not None:
+            create_background_task(self.update_threads(self.client))
+
+    def _render_threads(self):
+        self._render_scheduled = False
+        self.render()
+        get_app().invalidate()
+
+    async def set_grouped(self, grouped):
+        """ show one entry per unique stack instead of one entry per thread """
+        self.grouped = grouped
+        if grouped and self.client is not None:
+            await load_all_threads(self.client, self.session, list(self.session.threads))
+        self.render()
+        get_app().invalidate()
+
+    async def update_threads(self, client, *, resync=True):
+        """ without resync, the thread list that was kept up to date from thread events is used """
+        self.client = client
+        await self.session.load_threads(client, refresh=resync)
+        if self.grouped:
+            await load_all_threads(client, self.session, list(self.session.threads))
+        self.render()
+
+    def render(self):
+        if self.grouped:
+            self.groups = group_stacks(self.session)
+            values = [
+                (group.thread_ids[0], self._render_group_to_radiolist_text(group))
+                for group in self.groups
+            ]
+        else:
+            values = [(t["id"], self._render_thread_to_radiolist_text(t)) for t in self.threads]
+        self.values = values or [(None, "No threads")]
+        if self.current_value not in [value for value, _ in self.values]:
+            self.current_value = self.values[0][0]
 
     def _render_thread_to_radiolist_text(self, thread):
+        if not thread["name"]:
+            return str(thread["id"])
         return f"{thread['id']} - {thread['name']}"
 
+    def _render_group_to_radiolist_text(self, group):
+        if group.count == 1:
+            label = self._render_thread_to_radiolist_text(self.session.threads[group.thread_ids[0]])
+        else:
+            label = f"{group.count} threads"
+        if not group.frames:
+            return label
+        top = group.frames[0]
+        file_name = Path(top.get("source", {}).get("path", "?")).name
+        return f"{label}: {top['name']} {file_name}:{top['line']}"
+
     def __pt_container__(self):
         return TitledWindow(
-            "Threads:",
+            lambda: "Threads (grouped by stack):" if self.grouped else "Threads:",
+            self.radio,
+        )
+
+
+class SessionsWidget(GroupableRadioList):
+    """ the debug sessions, e.g. of subprocesses, enter shows one """
+
+    def __init__(self, threads_widget=None, stacktrace_widget=None):
+        super().__init__(values=[(None, "No sessions")])
+        self.threads_widget = threads_widget or ThreadsWidget()
+        self.stacktrace_widget = stacktrace_widget
+        self.manager = None
+        self.key_bindings = self.radio.control.key_bindings
+
+    async def attach(self, manager):
+        self.manager = manager
+        manager.subscribe(self._on_sessions_changed)
+        self.render()
+        create_background_task(self.run())
+
+    async def run(self):
+        async with self.watch() as on_current_session_changed:
+            while True:
+                session_id = await on_current_session_changed()
+
+                debug_session = self.manager.sessions.get(session_id)
+                if debug_session is not None:
+                    await self.switch(debug_session)
+
+    async def switch(self, debug_session):
+        if not self.manager.can_switch(debug_session):
+            return
+        if self.stacktrace_widget is not None:
+            # the thread shown was one of the previous session's
+            self.stacktrace_widget.thread_id = None
+        await self.manager.switch(debug_session)
+        await self.threads_widget.update_threads(self.manager.client)
+        # the stacks of a running session can't be loaded, they're shown when it stops
+        thread_id = self.threads_widget.values[0][0]
+        if debug_session.state == "stopped" and thread_id is not None:
+            self.threads_widget.current_value = thread_id
+        get_app().invalidate()
+
+    def _on_sessions_changed(self, kind, debug_session):
+        if kind == "removed" and debug_session is self.manager.current:
+            # the session shown ended, show the closest one that hasn't
+            parent = debug_session.parent
+            while parent is not None and not self.manager.can_switch(parent):
+                parent = parent.parent
+            if parent is not None:
+                create_background_task(self.switch(parent))
+        self.render()
+        get_app().invalidate()
+
+    def render(self):
+        def depth(debug_session):
+            return 0 if debug_session.parent is None else depth(debug_session.parent) + 1
+
+        self.values = [
+            (
+                debug_session.id,
+                f"{'*' if debug_session is self.manager.current else ' '}"
+                f"{'  ' * depth(debug_session)}{debug_session.name} [{debug_session.state}]",
+            )
+            for debug_session in self.manager.sessions.values()
+        ] or [(None, "No sessions")]
+        self._selected_index = min(self._selected_index, len(self.values) - 1)
+
+    def __pt_container__(self):
+        return TitledWindow(
+            "Sessions:",
             self.radio,
         )
 
 
 class VariablesWidget(GroupableRadioList):
-    def __init__(self):
+    def __init__(self, session=None, history=None):
         super().__init__(
             values=[(None, "No variables")],
         )
+        self.session = session or Session()
+        self.history = history or StopHistory(self.session)
+        self.client = None
+        self.frame_id = None
+        # while stepping only the first scope is loaded
+        self.locals_only = False
+        # evaluateNames of the variables that changed since the previous stop
+        self.changed: set[str] = set()
+        # rows are only formatted again when the variable changed
+        self._rows = {}
+        self._variables = {}
         self.key_bindings = self.radio.control.key_bindings
 
     async def attach(self, client, stacktrace_widget):
+        self.client = client
+        self.session.subscribe(self._on_session_changed)
         create_background_task(self.run(client, stacktrace_widget))
 
+    def _on_session_changed(self, kind, key):
+        if kind == "variables" and key in self.session.frame_scopes.get(self.frame_id, []):
+            self.render()
+            get_app().invalidate()
+        elif kind == "invalidated" and key[0] == "variables" and self.frame_id is not None:
+            if key[1] in (None, self.frame_id):
+                create_background_task(self.load(self.client, self.frame_id))
+
     async def run(self, client, stacktrace_widget):
-        from vidb.client import scopes, variables
         async with stacktrace_widget.watch() as on_current_stackframe_changed:
             while True:
                 frame_id = await on_current_stackframe_changed()
 
-                scope_list = await scopes(client, frame_id=frame_id)
-                values = []
-                for scope in scope_list["scopes"]:
-                    values.append((("scope", scope["name"]), scope["name"]))
-                    if True:
-                    # if scope.get("presentationHint") in ["locals", "globals"]:
-                        variable_list = await variables(client, variables_reference=scope["variablesReference"])
-                        for variable in variable_list["variables"]:
-                            var_uuid = uuid4()
-                            values.append((
-                                variable["variablesReference"] or var_uuid,
-                                HTML("{expand_marker} <variables-name>{name}</variables-name>: <variables-type>{type}</variables-type> = <variables-value>{value}</variables-value>").format(
-                                    **variable,
-                                    expand_marker="+" if variable["variablesReference"] else "-",
-                                ),
-                            ))
-                            misc = variable.copy()
-                            if misc["evaluateName"] == misc["name"]: del misc["evaluateName"]
-                            del misc["name"]
-                            del misc["type"]
-                            del misc["value"]
-                            del misc["variablesReference"]
-                            if misc.get("presentationHint") == {"attributes": ["rawString"]}:
-                                del misc["presentationHint"]
-                            for k, v in misc.items():
-                                k = str(k)[:5]
-                                values.append((variable["variablesReference"] or var_uuid, f"-- {k}={v}"))
-                self.values = values
-                self.current_value = self.values[0][0]
-                get_app().invalidate()
+                self.frame_id = frame_id
+                if frame_id is None:
+                    # no stack, e.g. right after switching to another session
+                    self.render()
+                    continue
+                try:
+                    await self.load(client, frame_id)
+                except ConnectionError:
+                    # the session shown ended, the next one's frames follow
+                    continue
+
+    async def load(self, client, frame_id):
+        self.changed = set()
+        scope_list = await self.session.load_scopes(client, frame_id)
+        if self.locals_only:
+            scope_list = scope_list[:1]
+        await asyncio.gather(*[
+            self.session.load_variables(client, scope["variablesReference"])
+            for scope in scope_list
+        ])
+        if frame_id == self.frame_id:
+            self.history.snapshot(frame_id)
+            self.changed = self.history.changes(frame_id)
+        self.render()
+        get_app().invalidate()
+
+    def selected_variable(self):
+        """ the variable under the cursor """
+        return self._variables.get(self.values[self._selected_index][0])
+
+    def render(self):
+        values = []
+        rows = {}
+        self._variables = {}
+        for scope in self.session.scopes_of(self.frame_id):
+            values.append((("scope", scope["name"]), scope["name"]))
+            if True:
+            # if scope.get("presentationHint") in ["locals", "globals"]:
+                for variable in self.session.children_of(scope["variablesReference"]):
+                    var_uuid = uuid4()
+                    changed = (variable.get("evaluateName") or variable["name"]) in self.changed
+                    row_key = (
+                        variable["name"],
+                        variable.get("type"),
+                        variable["value"],
+                        bool(variable["variablesReference"]),
+                        changed,
+                    )
+                    row = rows[row_key] = self._rows.get(row_key) or self._render_variable(variable, changed)
+                    values.append((variable["variablesReference"] or var_uuid, row))
+                    self._variables[variable["variablesReference"] or var_uuid] = variable
+                    misc = variable.copy()
+                    # type and evaluateName are optional
+                    if misc.get("evaluateName") == misc["name"]: del misc["evaluateName"]
+                    del misc["name"]
+                    misc.pop("type", None)
+                    del misc["value"]
+                    del misc["variablesReference"]
+                    if misc.get("presentationHint") == {"attributes": ["rawString"]}:
+                        del misc["presentationHint"]
+                    for k, v in misc.items():
+                        k = str(k)[:5]
+                        values.append((variable["variablesReference"] or var_uuid, f"-- {k}={v}"))
+        self._rows = rows
+        self.values = values or [(None, "No variables")]
+        self.current_value = self.values[0][0]
+
+    def _render_variable(self, variable, changed):
+        # only a preview of the value, v shows all of it
+        row = HTML("{expand_marker} <variables-name>{name}</variables-name>: <variables-type>{type}</variables-type> = <variables-value>{value}</variables-value>").format(
+            **dict(variable, type=variable.get("type", ""), value=preview(variable["value"])),
+            expand_marker="+" if variable["variablesReference"] else "-",
+        )
+        if changed:
+            return [("class:variables-changed " + style, text) for style, text in to_formatted_text(row)]
+        return row
 
     def __pt_container__(self):
         return TitledWindow(
@@ -329,27 +1517,135 @@ class VariablesWidget(GroupableRadioList):
         )
 
 
+class WatchWidget(GroupableRadioList):
+    """ watch expressions, evaluated in the selected frame """
+
+    def __init__(self, watches=None, prompt=None):
+        super().__init__(values=[(None, "No watches, a:add")])
+        self.watches = watches or Watches(Session())
+        self.watches.subscribe(self._on_watches_changed)
+        self.prompt = prompt or PromptLine()
+        self.client = None
+        self.frame_id = None
+        self.key_bindings = self.radio.control.key_bindings
+
+        @self.key_bindings.add("a")
+        def add_watch(event):
+            self.prompt.ask(event.app, "watch: ", self._add)
+
+        @self.key_bindings.add("d")
+        @self.key_bindings.add("delete")
+        def delete_watch(event):
+            expression = self.values[self._selected_index][0]
+            if expression is not None:
+                self.watches.remove(expression)
+
+    async def attach(self, client, stacktrace_widget):
+        self.client = client
+        create_background_task(self.run(client, stacktrace_widget))
+
+    async def run(self, client, stacktrace_widget):
+        async with stacktrace_widget.watch() as on_current_stackframe_changed:
+            while True:
+                self.frame_id = await on_current_stackframe_changed()
+                self.render()
+                if self.frame_id is not None:
+                    create_background_task(self.watches.evaluate_all(client, self.frame_id))
+
+    def _add(self, expression):
+        self.watches.add(expression.strip())
+        if self.client is not None and self.frame_id is not None:
+            create_background_task(self.watches.evaluate_all(self.client, self.frame_id))
+
+    def _on_watches_changed(self):
+        self.render()
+        get_app().invalidate()
+
+    def render(self):
+        self.values = [
+            (expression, self._render_watch(expression, self.watches.result(self.frame_id, expression)))
+            for expression in self.watches.expressions
+        ] or [(None, "No watches, a:add")]
+        self._selected_index = min(self._selected_index, len(self.values) - 1)
+
+    def _render_watch(self, expression, result):
+        if self.frame_id is None:
+            return f"{expression}"
+        if result is None:
+            return f"{expression} = …"
+        if result.error is not None:
+            return HTML("{expression} <watch-error>{error}</watch-error>").format(
+                expression=expression,
+                error=preview(result.error),
+            )
+        return HTML("<variables-name>{expression}</variables-name>: <variables-type>{type}</variables-type> = <variables-value>{value}</variables-value>").format(
+            expression=expression,
+            type=result.type or "",
+            value=preview(result.value),
+        )
+
+    def __pt_container__(self):
+        return TitledWindow(
+            "Watches (a:add d:delete):",
+            self.radio,
+        )
+
+
 class StacktraceWidget(GroupableRadioList):
-    def __init__(self):
+    def __init__(self, session=None):
         super().__init__(values=[(None, "No stacktrace")])
+        self.session = session or Session()
+        self.client = None
+        self.thread_id = None
+        # the frame to select once the stack of the thread being selected is shown, instead of the top one
+        self.select_next = None
         self.key_bindings = self.radio.control.key_bindings
 
+    @property
+    def frames(self):
+        return self.session.frames_of(self.thread_id)
+
     async def attach(self, client, threads_widget):
+        self.client = client
+        self.session.subscribe(self._on_session_changed)
         create_background_task(self.run(client, threads_widget))
 
+    def _on_session_changed(self, kind, key):
+        if kind == "frames" and key == self.thread_id:
+            self.render()
+            get_app().invalidate()
+        elif kind == "invalidated" and key[0] == "stacks" and self.thread_id is not None:
+            if key[1] in (None, self.thread_id):
+                # rendered when the frames arrive, which reloads the variables and the source too
+                create_background_task(self.session.load_stack_trace(self.client, self.thread_id))
+
     async def run(self, client, threads_widget):
         async with threads_widget.watch() as on_current_thread_changed:
             while True:
                 thread_id = await on_current_thread_changed()
 
-                stack_trace_list = await stack_trace(client, thread_id=thread_id)
-                self.frames = stack_trace_list["stackFrames"]
-                self.values = [
-                    (frame["id"], self._render_frame_to_radiolist_text(frame)) for frame in self.frames
-                ]
-                self.current_value = self.values[0][0]
+                self.thread_id = thread_id
+                if thread_id is not None:
+                    try:
+                        await self.session.load_stack_trace(client, thread_id)
+                    except ConnectionError:
+                        # the session shown ended, the next one's threads follow
+                        continue
+                self.render()
+                self.select_next = None
                 get_app().invalidate()
 
+    def render(self):
+        self.values = [
+            (frame["id"], self._render_frame_to_radiolist_text(frame)) for frame in self.frames
+        ] or [(None, "No stacktrace")]
+        frame_ids = [frame_id for frame_id, _ in self.values]
+        if self.select_next in frame_ids:
+            self._selected_index = frame_ids.index(self.select_next)
+            self.current_value = self.select_next
+        else:
+            self.current_value = self.values[0][0]
+
     def _render_frame_to_radiolist_text(self, frame):
         def short_path(path: str):
             return Path(path).name
@@ -367,15 +1663,52 @@ class StacktraceWidget(GroupableRadioList):
 
 
 class BreakpointWidget(GroupableRadioList):
-    def __init__(self):
-        super().__init__(
-            values=[
-                (None, "No breakpoints"),
-                *[(x, f"Breakpoint {x}") for x in range(10)],
-            ],
-        )
+    def __init__(self, breakpoints=None):
+        super().__init__(values=[(None, "No breakpoints")])
+        self.breakpoints = breakpoints or BreakpointStore()
+        self.breakpoints.subscribe(self._on_breakpoints_changed)
+        self.client = None
         self.key_bindings = self.radio.control.key_bindings
 
+        @self.key_bindings.add("d")
+        @self.key_bindings.add("delete")
+        def delete_breakpoint(event):
+            if self.current_value is not None:
+                self.breakpoints.remove(*self.current_value)
+                if self.client is not None:
+                    create_background_task(self.breakpoints.sync(self.client))
+
+        self.render()
+
+    async def attach(self, client):
+        self.client = client
+
+    def _on_breakpoints_changed(self, path):
+        self.render()
+        get_app().invalidate()
+
+    def render(self):
+        values = []
+        for path in sorted(self.breakpoints.files):
+            for breakpoint in self.breakpoints.breakpoints_of(path):
+                values.append(((path, breakpoint["line"]), self._render_breakpoint_to_radiolist_text(path, breakpoint)))
+        self.values = values or [(None, "No breakpoints")]
+        if self.current_value not in [value for value, _ in self.values]:
+            self.current_value = self.values[0][0]
+
+    def _render_breakpoint_to_radiolist_text(self, path, breakpoint):
+        text = f"{Path(path).name}:{breakpoint['line']}"
+        if breakpoint.get("condition"):
+            text += f" if {breakpoint['condition']}"
+        if breakpoint.get("hitCondition"):
+            text += f" hits {breakpoint['hitCondition']}"
+        if breakpoint.get("logMessage"):
+            text += f" log {breakpoint['logMessage']!r}"
+        verification = self.breakpoints.verification(path, breakpoint["line"])
+        if verification is not None and not verification["verified"]:
+            text += f" (unverified{': ' + verification['message'] if verification.get('message') else ''})"
+        return text
+
     def __pt_container__(self):
         return TitledWindow(
             "Breakpoints:",
@@ -383,6 +1716,52 @@ class BreakpointWidget(GroupableRadioList):
         )
 
 
+class LogpointWidget(GroupableRadioList):
+    """ hits of every logpoint, with their rate over the last seconds """
+
+    refresh_interval = 1.0
+
+    def __init__(self, stats=None):
+        super().__init__(values=[(None, "No logpoint hits")])
+        self.stats = stats or LogpointStats(BreakpointStore())
+        self.key_bindings = self.radio.control.key_bindings
+
+    async def attach(self, client):
+        self.stats.watch_events(client)
+        create_background_task(self.run())
+
+    async def run(self):
+        # the counters change on every hit, redrawing on a timer keeps floods of output cheap
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            if self.stats.counters:
+                self.render()
+                get_app().invalidate()
+
+    def render(self):
+        now = self.stats.clock()
+        values = [
+            (key, self._render_counter_to_radiolist_text(key, counter, now))
+            for key, counter in sorted(self.stats.counters.items(), key=lambda item: -item[1].count)
+        ]
+        self.values = values or [(None, "No logpoint hits")]
+        if self.current_value not in [value for value, _ in self.values]:
+            self.current_value = self.values[0][0]
+
+    def _render_counter_to_radiolist_text(self, key, counter, now):
+        path, line = key
+        return (
+            f"{Path(path).name}:{line} x{counter.count} {counter.rate(now):.1f}/s "
+            f"{counter.sparkline(now, width=10)} {counter.last_message}"
+        )
+
+    def __pt_container__(self):
+        return TitledWindow(
+            "Logpoints:",
+            self.radio,
+        )
+
+
 class RadioListGroup:
     def __init__(self, split_cls, children, *args, **kwargs):
         assert all(isinstance(c, GroupableRadioList) for c in children)
@@ -406,20 +1785,39 @@ class RadioListGroup:
 class UI:
     _ptk: Application
 
-    def __init__(self):
-        self.source_widget = SourceWidget()
+    def __init__(self, *, input=None, output=None, breakpoints=None, watches=()):
+        self.session = Session()
+        self.breakpoints = breakpoints or BreakpointStore()
+        self.logpoints = LogpointStats(self.breakpoints)
+        self.prompt_line = PromptLine()
+        self.value_viewer = ValueViewer(self.prompt_line)
+        self.memory_viewer = MemoryViewer()
+        self.disassembly_viewer = DisassemblyViewer(DisassemblyCache(self.session))
+        self.sweep_viewer = SweepViewer(self.session, self.prompt_line, self.select_frame)
+        self.sources = SourceIndex()
+        self.source_widget = SourceWidget(self.session, self.breakpoints, self.prompt_line)
         self.terminal_widget = TerminalWidget()
-        self.threads_widget = ThreadsWidget()
-        self.variables_widget = VariablesWidget()
-        self.stacktrace_widget = StacktraceWidget()
-        self.breakpoint_widget = BreakpointWidget()
+        self.repl_widget = ReplWidget(self.session)
+        self.threads_widget = ThreadsWidget(self.session)
+        self.history = StopHistory(self.session)
+        self.variables_widget = VariablesWidget(self.session, self.history)
+        self.watches = Watches(self.session, watches)
+        self.watch_widget = WatchWidget(self.watches, self.prompt_line)
+        self.stacktrace_widget = StacktraceWidget(self.session)
+        self.sessions_widget = SessionsWidget(self.threads_widget, self.stacktrace_widget)
+        self.breakpoint_widget = BreakpointWidget(self.breakpoints)
+        self.logpoint_widget = LogpointWidget(self.logpoints)
+        self.stepper = Stepper(self)
         self.right_sidebar = RadioListGroup(
             HSplit,
             [
+                self.sessions_widget,
                 self.threads_widget,
                 self.variables_widget,
+                self.watch_widget,
                 self.stacktrace_widget,
                 self.breakpoint_widget,
+                self.logpoint_widget,
             ],
             width=40,
         )
@@ -432,6 +1830,8 @@ class UI:
             full_screen=True,
             mouse_support=True,
             editing_mode=EditingMode.VI,
+            input=input,
+            output=output,
             style=Style.from_dict(
                 {
                     "frame-name": "fg:lightblue",
@@ -439,33 +1839,101 @@ class UI:
                     "variables-name": "fg:green",
                     "variables-type": "fg:lightblue",
                     "variables-value": "fg:red",
+                    "variables-changed": "reverse",
+                    "watch-error": "fg:gray italic",
+                    "memory-loading": "fg:gray",
+                    "disassembly-loading": "fg:gray",
+                    "disassembly-current": "reverse",
+                    "breakpoint": "fg:red bold",
+                    "breakpoint-unverified": "fg:gray",
                 },
             ),
         )
-
-        self.source_widget.source_file = open("vidb/ui.py")
+        self._ptk.before_render += lambda app: self.terminal_widget.spawn_if_focused(app)
 
     def run(self, *args, **kwargs):
         return self._ptk.run_async(*args, **kwargs)
 
+    def exit(self, *args, **kwargs):
+        return self._ptk.exit(*args, **kwargs)
+
+    def select_frame(self, result):
+        """ select the thread and frame of a result of evaluating in every thread """
+        self.stacktrace_widget.select_next = result.frame_id
+        thread_ids = [value for value, _ in self.threads_widget.values]
+        if result.thread_id in thread_ids:
+            self.threads_widget._selected_index = thread_ids.index(result.thread_id)
+        self.threads_widget.current_value = result.thread_id
+
+    async def open_loaded_source(self, app, client, text):
+        """ show the loaded source labelled text, or the best match for it """
+        entry = self.sources.get(text) or next(iter(self.sources.search(text, limit=1)), None)
+        if entry is None or not (entry.source.get("path") or entry.source.get("sourceReference")):
+            return
+        if self.value_viewer.visible:
+            self.value_viewer.close(app)
+        if self.memory_viewer.visible:
+            self.memory_viewer.close(app)
+        if self.disassembly_viewer.visible:
+            self.disassembly_viewer.close(app)
+        if self.sweep_viewer.visible:
+            self.sweep_viewer.close(app)
+        await self.source_widget.show_source(client, entry.source)
+        app.layout.focus(self.source_widget)
+        app.invalidate()
+
+    def view_memory(self, app, client, variable):
+        """ show the memory of variable, or why it can't be shown """
+        name = variable.get("evaluateName") or variable["name"]
+        if not client.capabilities.get("supportsReadMemoryRequest"):
+            self.prompt_line.show("the debug adapter can't read memory")
+            return
+        if not variable.get("memoryReference"):
+            self.prompt_line.show(f"{name} has no memory reference")
+            return
+        self.memory_viewer.open(
+            app,
+            f"{name} memory (q:close)",
+            MemoryPages(client, variable["memoryReference"], session=self.session),
+        )
+
     def _create_layout(self):
         root_container = TitledWindow(
-            "ViDB 0.1.0 - ?:help  n:next  s:step into  b:breakpoint  !:python command line",
+            "ViDB 0.1.0 - ?:help  n:next  s:step into  r:step out  c:continue  b:breakpoint  L:logpoint  R:repl  O:open  E:evaluate everywhere  D:disassembly  !:python command line",
             self._create_main_container(),
         )
 
-        return Layout(root_container)
+        return Layout(
+            FloatContainer(
+                content=root_container,
+                floats=[
+                    Float(
+                        xcursor=True,
+                        ycursor=True,
+                        content=CompletionsMenu(max_height=12),
+                    ),
+                ],
+            ),
+        )
 
     def _create_main_container(self):
         return VSplit(
             [
                 HSplit(
                     [
-                        # Source code buffer
-                        self.source_widget,
+                        # Source code buffer, or the value or memory being viewed
+                        DynamicContainer(self._main_pane),
+                        self.prompt_line,
                         HSeparator(),
-                        # Shell buffer
-                        self.terminal_widget,
+                        VSplit(
+                            [
+                                # Debuggee REPL
+                                self.repl_widget,
+                                VSeparator(),
+                                # Shell buffer
+                                self.terminal_widget,
+                            ]
+                        ),
                     ]
                 ),
                 VSeparator(),
@@ -473,45 +1941,167 @@ class UI:
             ]
         )
 
+    def _main_pane(self):
+        if self.value_viewer.visible:
+            return self.value_viewer
+        if self.memory_viewer.visible:
+            return self.memory_viewer
+        if self.disassembly_viewer.visible:
+            return self.disassembly_viewer
+        if self.sweep_viewer.visible:
+            return self.sweep_viewer
+        return self.source_widget
+
     def _create_keybinds(self):
         kb = self.global_bindings
         source_kb = self.source_widget.key_bindings
         stacktrace_kb = self.stacktrace_widget.key_bindings
         variables_kb = self.variables_widget.key_bindings
+        watch_kb = self.watch_widget.key_bindings
         breakpoint_kb = self.breakpoint_widget.key_bindings
+        logpoint_kb = self.logpoint_widget.key_bindings
         threads_kb = self.threads_widget.radio.control.key_bindings
 
-        @kb.add("q")
+        # global bindings win over typing, so letters are only shortcuts outside of inputs, e.g. the REPL's
+        @FilterCondition
+        def not_typing():
+            app = get_app()
+            return not app.layout.buffer_has_focus or app.current_buffer.read_only()
+
+        @kb.add("q", filter=not_typing)
         def exit_(event):
             event.app.exit()
-            self.terminal_widget.process.kill()
+            self.terminal_widget.kill()
 
         def focus_source_widget(event):
             event.app.layout.focus(self.source_widget)
 
-        @kb.add("T")
+        @kb.add("M", filter=not_typing)
+        def focus_sessions_widget(event):
+            event.app.layout.focus(self.sessions_widget)
+
+        @kb.add("T", filter=not_typing)
         @source_kb.add("right")
         def focus_threads_widget(event):
             event.app.layout.focus(self.threads_widget)
 
-        @kb.add("V")
+        @kb.add("V", filter=not_typing)
         def focus_variable_widget(event):
             event.app.layout.focus(self.variables_widget)
 
-        @kb.add("S")
+        @kb.add("W", filter=not_typing)
+        def focus_watch_widget(event):
+            event.app.layout.focus(self.watch_widget)
+
+        @kb.add("S", filter=not_typing)
         def focus_stacktrace_widget(event):
             event.app.layout.focus(self.stacktrace_widget)
 
-        @kb.add("B")
+        @kb.add("B", filter=not_typing)
         def focus_breakpoint_widget(event):
             event.app.layout.focus(self.breakpoint_widget)
 
-        @kb.add("X")
-        @kb.add("!")
+        @kb.add("P", filter=not_typing)
+        def focus_logpoint_widget(event):
+            event.app.layout.focus(self.logpoint_widget)
+
+        @kb.add("R", filter=not_typing)
+        def focus_repl_widget(event):
+            event.app.layout.focus(self.repl_widget)
+
+        @kb.add("X", filter=not_typing)
+        @kb.add("!", filter=not_typing)
         def focus_terminal_widget(event):
-            event.app.layout.focus(self.terminal_widget)
+            event.app.layout.focus(self.terminal_widget.spawn())
+
+        @kb.add("n", filter=not_typing)
+        def next_(event):
+            if self.stepper.step("next"):
+                self.source_widget.move_cursor_optimistically()
+
+        kb.add("s", filter=not_typing)(lambda event: self.stepper.step("stepIn"))
+        kb.add("r", filter=not_typing)(lambda event: self.stepper.step("stepOut"))
+        kb.add("c", filter=not_typing)(lambda event: self.stepper.step("continue"))
+
+        @kb.add("D", filter=not_typing)
+        def toggle_disassembly(event):
+            if self.disassembly_viewer.visible:
+                self.disassembly_viewer.close(event.app)
+            else:
+                self.disassembly_viewer.open(event.app)
+
+        @kb.add("E", filter=not_typing)
+        def evaluate_in_every_thread(event):
+            client = self.source_widget.client
+            if client is None:
+                return
+            self.prompt_line.ask(
+                event.app,
+                "evaluate in every thread: ",
+                lambda expression: self.sweep_viewer.open(event.app, client, expression.strip()),
+                default=self.sweep_viewer.expression,
+            )
+
+        @kb.add("O", filter=not_typing)
+        def open_loaded_source(event):
+            client = self.source_widget.client
+            if client is None:
+                return
+            create_background_task(self.sources.load(client))
+            self.prompt_line.ask(
+                event.app,
+                "open: ",
+                lambda text: create_background_task(self.open_loaded_source(event.app, client, text)),
+                completer=SourceIndexCompleter(self.sources),
+            )
+
+        @variables_kb.add("v")
+        def view_value(event):
+            variable = self.variables_widget.selected_variable()
+            client = self.variables_widget.client
+            if variable is None or client is None:
+                return
+            frame_id = self.variables_widget.frame_id
+
+            def save(path):
+                return save_value(client, variable, path, frame_id=frame_id)
+
+            self.value_viewer.open(
+                event.app,
+                f"{variable.get('evaluateName') or variable['name']} (q:close)",
+                iter_full_value(client, variable, frame_id=frame_id),
+                save=save,
+            )
+
+        @variables_kb.add("m")
+        def view_memory(event):
+            variable = self.variables_widget.selected_variable()
+            client = self.variables_widget.client
+            if variable is None or client is None:
+                return
+            self.view_memory(event.app, client, variable)
+
+        @variables_kb.add("w")
+        def save_value_to_file(event):
+            variable = self.variables_widget.selected_variable()
+            client = self.variables_widget.client
+            if variable is None or client is None:
+                return
+            frame_id = self.variables_widget.frame_id
+
+            def save(path):
+                return save_value(client, variable, path, frame_id=frame_id)
+
+            self.prompt_line.ask(
+                event.app,
+                "save value to: ",
+                lambda path: path and create_background_task(save_and_report(save, path, self.prompt_line)),
+            )
 
         threads_kb.add("left")(focus_source_widget)
+        self.sessions_widget.key_bindings.add("left")(focus_source_widget)
         variables_kb.add("left")(focus_source_widget)
+        watch_kb.add("left")(focus_source_widget)
         stacktrace_kb.add("left")(focus_source_widget)
         breakpoint_kb.add("left")(focus_source_widget)
+        logpoint_kb.add("left")(focus_source_widget)
@@ -0,0 +1,92 @@
+"""
+Previews and full values of variables.
+
+A variable's value can be a repr of many megabytes, which is far more than
+a row of the variables pane can show, so rows only get a bounded preview.
+The full value is fetched on demand, by evaluating the variable in the
+`clipboard` context when the adapter has one (other contexts may truncate
+it), or for containers by fetching their children a page at a time. It's
+yielded in chunks, so it can be written to the value viewer or a file as it
+arrives without keeping more than the one copy that was received.
+"""
+from __future__ import annotations
+
+from typing import AsyncIterator
+
+from vidb.client import evaluate, variables
+from vidb.dap import Variable
+
+
+PREVIEW_LENGTH = 200
+CHUNK_SIZE = 64 * 1024
+PAGE_SIZE = 500
+
+
+def preview(value: str, length=PREVIEW_LENGTH) -> str:
+    """ the first line of value, at most length characters, with the size of the whole when it's cut """
+    end = value.find("\n", 0, length)
+    if end == -1:
+        end = length
+    if end >= len(value):
+        return value
+    return f"{value[:end]}… ({len(value):,} chars)"
+
+
+async def fetch_full_value(client, variable: Variable, *, frame_id=None) -> str:
+    expression = variable.get("evaluateName")
+    if not expression:
+        # nothing to evaluate, the adapter's value is all there is
+        return variable["value"]
+    context = "clipboard" if client.capabilities.get("supportsClipboardContext") else "repl"
+    response = await evaluate(client, expression=expression, frame_id=frame_id, context=context)
+    return response["result"]
+
+
+async def iter_children(client, variable: Variable, *, page_size=PAGE_SIZE) -> AsyncIterator[Variable]:
+    """ the children of a container, a page at a time when the adapter says how many there are """
+    reference = variable["variablesReference"]
+    indexed = variable.get("indexedVariables")
+    if not indexed:
+        for child in (await variables(client, variables_reference=reference))["variables"]:
+            yield child
+        return
+    if variable.get("namedVariables"):
+        for child in (await variables(client, variables_reference=reference, filter="named"))["variables"]:
+            yield child
+    for start in range(0, indexed, page_size):
+        page = await variables(
+            client,
+            variables_reference=reference,
+            filter="indexed",
+            start=start,
+            count=min(page_size, indexed - start),
+        )
+        for child in page["variables"]:
+            yield child
+
+
+async def iter_full_value(
+    client,
+    variable: Variable,
+    *,
+    frame_id=None,
+    chunk_size=CHUNK_SIZE,
+    page_size=PAGE_SIZE,
+) -> AsyncIterator[str]:
+    """ the full value of a variable in chunks, for containers one child per line """
+    if variable["variablesReference"]:
+        async for child in iter_children(client, variable, page_size=page_size):
+            yield f"{child['name']} = {child['value']}\n"
+        return
+    value = await fetch_full_value(client, variable, frame_id=frame_id)
+    for start in range(0, len(value), chunk_size):
+        yield value[start:start + chunk_size]
+
+
+async def save_value(client, variable: Variable, path, *, frame_id=None) -> int:
+    """ write the full value of a variable to a file, returns the number of characters written """
+    written = 0
+    with open(path, "w") as file:
+        async for chunk in iter_full_value(client, variable, frame_id=frame_id):
+            written += file.write(chunk)
+    return written
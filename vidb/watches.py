@@ -0,0 +1,100 @@
+"""
+Watch expressions, evaluated at every stop.
+
+Watches evaluates all its expressions against a frame concurrently, each
+with its own timeout so that a slow one (a property that takes a lock, a
+query) doesn't hold back the others. Results are cached by frame and
+expression until the debuggee resumes or stops again, so selecting a frame
+again or redrawing doesn't evaluate anything.
+"""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from vidb.client import evaluate
+from vidb.session import Session
+
+
+@dataclass
+class WatchResult:
+    value: Optional[str] = None
+    type: Optional[str] = None
+    error: Optional[str] = None
+
+
+class Watches:
+    def __init__(self, session: Session, expressions=(), *, timeout=2.0):
+        self.session = session
+        self.expressions: list[str] = list(expressions)
+        self.timeout = timeout
+        self.listeners: set[Callable[[], None]] = set()
+        # by (frame id, expression), for the current stop
+        self.results: dict[tuple[int, str], WatchResult] = {}
+        self._pending: dict[tuple[int, str], asyncio.Task] = {}
+        # bumped whenever the debuggee stops or resumes, results of older evaluations are dropped
+        self.epoch = 0
+        session.subscribe(self._on_session_changed)
+
+    def _on_session_changed(self, kind, key):
+        if kind == "clear":
+            self.epoch += 1
+            self.results = {}
+            self._pending = {}
+            self.notify()
+
+    def subscribe(self, listener):
+        self.listeners.add(listener)
+
+    def notify(self):
+        for listener in list(self.listeners):
+            listener()
+
+    def add(self, expression: str):
+        if expression and expression not in self.expressions:
+            self.expressions.append(expression)
+            self.notify()
+
+    def remove(self, expression: str):
+        if expression in self.expressions:
+            self.expressions.remove(expression)
+            self.notify()
+
+    def result(self, frame_id: int, expression: str) -> WatchResult | None:
+        """ None while it hasn't been evaluated yet """
+        return self.results.get((frame_id, expression))
+
+    async def evaluate_all(self, client, frame_id: int):
+        """ evaluate the expressions that have no result for the frame yet, concurrently """
+        tasks = []
+        for expression in self.expressions:
+            key = (frame_id, expression)
+            if key in self.results:
+                continue
+            task = self._pending.get(key)
+            if task is None:
+                task = self._pending[key] = asyncio.ensure_future(self._evaluate(client, frame_id, expression))
+            tasks.append(task)
+        await asyncio.gather(*tasks)
+
+    async def _evaluate(self, client, frame_id, expression):
+        epoch = self.epoch
+        try:
+            response = await asyncio.wait_for(
+                evaluate(client, expression=expression, frame_id=frame_id, context="watch"),
+                self.timeout,
+            )
+        except asyncio.TimeoutError:
+            result = WatchResult(error=f"timed out after {self.timeout:g}s")
+        except Exception as e:
+            result = WatchResult(error=str(e))
+        else:
+            result = WatchResult(value=response["result"], type=response.get("type"))
+        if epoch != self.epoch:
+            return
+        key = (frame_id, expression)
+        self.results[key] = result
+        self._pending.pop(key, None)
+        # each result is shown as soon as it's there
+        self.notify()